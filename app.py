@@ -15,17 +15,23 @@ Python only handles the UI (Streamlit)
 """
 import streamlit as st
 import subprocess
-import json
 import os
-import pandas as pd
-from datetime import datetime
-import time
+from functools import lru_cache
+import textwrap
+
+from collect.engine_output import ParseStats, iter_json_records, iter_search_results, stream_lines
+from collect.facets import FacetIndex
+from collect.search_index import build_search_index
+from collect.storage import NewsCache, article_key, get_storage
+from collect.worker_client import WorkerError, WorkerPool
 
 # Paths
 RUST_BIN = "../rust/target/release"
 CPP_BIN = "../cpp/bin"
 JS_BIN = "js/src"
 DATA_FILE = "data/news.json"
+PAGE_SIZE = 25
+CARD_CACHE_SIZE = 4096
 
 # Page Config
 st.set_page_config(
@@ -93,32 +99,42 @@ def run_rust(binary, args=[]):
     except Exception as e:
         return None
 
+def stream_rust(binary, args=[]):
+    """Run Rust binary, yielding its output lines as they arrive"""
+    try:
+        yield from stream_lines([f"{RUST_BIN}/{binary}"] + args, cwd=".")
+    except OSError:
+        return
+
+def iter_news_rust(stats=None):
+    """Stream articles from the Rust RSS fetcher (one JSON object per line)"""
+    return iter_json_records(stream_rust("rss_fetcher"), stats)
+
 def fetch_news_rust():
     """Fetch news using Rust RSS fetcher"""
-    output = run_rust("rss_fetcher")
-    if output:
-        lines = output.strip().split("\n")
-        items = []
-        for line in lines:
-            if line.startswith("{"):
-                try:
-                    items.append(json.loads(line))
-                except:
-                    pass
-        return items
-    return []
+    return list(iter_news_rust())
+
+@st.cache_resource
+def get_search_pool():
+    """Long-lived `search --serve` workers, shared by every session"""
+    binary = f"{RUST_BIN}/search"
+    if not os.path.exists(binary):
+        return None
+    return WorkerPool([binary, "--serve"], cwd=".")
 
 def search_rust(query, limit=20):
     """Search using Rust engine"""
-    output = run_rust("search", [query, "--limit", str(limit)])
-    # Parse search results
-    results = []
-    if output:
-        lines = output.strip().split("\n")
-        for line in lines:
-            if line.startswith("1.") or line.startswith("2."):
-                results.append(line)
-    return results
+    pool = get_search_pool()
+    if pool is not None:
+        try:
+            response = pool.request("search", query=query, limit=limit)
+            return [f"{i}. [{r['category']}] {r['title']}"
+                    for i, r in enumerate(response["results"], 1)]
+        except WorkerError:
+            pass  # fall back to a one-shot run
+    lines = stream_rust("search", [query, "--limit", str(limit)])
+    return [f"{r['rank']}. [{r['category']}] {r['title']}"
+            for r in iter_search_results(lines)]
 
 # === NODE.JS FUNCTIONS ===
 def run_node(script, args=[]):
@@ -164,21 +180,78 @@ def dedup_cpp():
     return output
 
 # === LOAD DATA ===
+@st.cache_resource
+def get_news_cache():
+    """One news cache per server process, shared by every session"""
+    return NewsCache()
+
 def load_news():
-    """Load news from JSON file"""
+    """Load news from the article store (parsed once per data version)"""
     try:
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, 'r') as f:
-                return json.load(f)
+        return get_news_cache().get()
     except:
         pass
     return []
 
+def load_facets():
+    """(news, facet index over it), built once per data version"""
+    return get_news_cache().get_derived("facets", FacetIndex)
+
+def get_indexed_store():
+    """The article store if it filters and pages with its own indexes (sqlite), else None"""
+    storage = get_news_cache().storage
+    return storage if hasattr(storage, "query_news") else None
+
+def _build_search(news):
+    return build_search_index(news), {article_key(a): a for a in news}
+
+def load_search_index():
+    """(BM25 index, article by key), caught up once per data version"""
+    _, (index, by_key) = get_news_cache().get_derived("search", _build_search)
+    return index, by_key
+
+def iter_page(news, positions, cursor, size=PAGE_SIZE):
+    """One page of the cached articles, without building the filtered list.
+
+    An unfiltered page (positions is a range) is a plain slice; a
+    filtered page slices the positions.
+    """
+    if isinstance(positions, range):
+        return news[cursor:cursor + size]
+    return (news[i] for i in positions[cursor:cursor + size])
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def _card_html(article_id, title, link, source, category, reading_time, description):
+    """Rendered card for one article version (article_id keys the cache)"""
+    return textwrap.dedent(f"""
+        <div class="news-card">
+            <a class="headline" href="{link}">{title}</a>
+            <div style="margin-top: 8px;">
+                <span class="source-tag">{source}</span>
+                <span class="time-tag">{category}</span>
+                <span class="time-tag">• {reading_time} min read</span>
+            </div>
+            <p style="color: #8b949e; font-size: 14px; margin-top: 8px;">
+                {description[:200]}...
+            </p>
+        </div>
+        """)
+
+def render_card(item):
+    return _card_html(
+        article_key(item),
+        item.get('title', 'No title'),
+        item.get('link', '#'),
+        item.get('source', 'Unknown'),
+        item.get('category', 'General'),
+        item.get('reading_time', 1),
+        item.get('description', '')
+    )
+
 def save_news(news):
-    """Save news to JSON"""
+    """Merge news into the article store (only new/changed items are written)"""
     try:
-        with open(DATA_FILE, 'w') as f:
-            json.dump(news, f, indent=2)
+        get_storage().merge_news(news)
     except:
         pass
 
@@ -205,7 +278,17 @@ with st.sidebar:
     if st.button("Fetch Now"):
         with st.spinner(f"Fetching with {fetcher}..."):
             if fetcher == "Rust":
-                news = fetch_news_rust()
+                # Stream so the count updates while feeds are still coming in
+                progress = st.empty()
+                stats = ParseStats()
+                news = []
+                for item in iter_news_rust(stats):
+                    news.append(item)
+                    if len(news) % PAGE_SIZE == 0:
+                        progress.caption(f"{len(news)} articles so far...")
+                progress.empty()
+                if stats.malformed:
+                    st.warning(f"Skipped {stats.malformed} malformed lines from the Rust fetcher")
             elif fetcher == "Node.js":
                 fetch_news_node()
                 news = load_news()
@@ -213,8 +296,7 @@ with st.sidebar:
                 # Python fallback
                 from collect.rss_scraper import RSSScraper
                 scraper = RSSScraper()
-                news = scraper.fetch_all()
-                save_news(news)
+                news = scraper.collect_all()  # merges into the store itself
         
         st.success(f"Fetched {len(news)} articles!")
     
@@ -222,8 +304,11 @@ with st.sidebar:
     
     # Stats
     st.subheader("📊 Stats")
-    news = load_news()
-    st.metric("Articles", len(news))
+    store = get_indexed_store()
+    st.metric("Articles", store.count_news() if store else len(load_news()))
+    cache_stats = get_news_cache().stats()
+    st.caption(f"Cache: {cache_stats['hits']} hits / {cache_stats['misses']} loads "
+               f"({cache_stats['load_ms']} ms last load)")
     
     # Dedup
     if st.button("🔄 Run Dedup (C++)"):
@@ -250,45 +335,79 @@ with st.sidebar:
 tab1, tab2, tab3 = st.tabs(["📰 News", "🔍 Search", "⭐ Favorites"])
 
 with tab1:
-    news = load_news()
+    # SQLite answers filters, counts and pages from its indexes; other
+    # backends go through the cached news and a facet index over it
+    store = get_indexed_store()
+    news = [] if store else load_news()
     
-    if not news:
+    if not (store.count_news() if store else news):
         st.info("No news yet. Click 'Fetch News' in the sidebar!")
     else:
+        if store:
+            counts = {facet: store.facet_counts(facet) for facet in ("category", "sentiment", "source")}
+            facet_values = lambda facet: list(counts[facet])
+            facet_count = lambda facet, value: counts[facet].get(value, 0)
+        else:
+            news, facets = load_facets()
+            facet_values = lambda facet: [v for v, _ in facets.values(facet)]
+            facet_count = facets.count
+        
+        def facet_label(facet):
+            return lambda v: v if v == "All" else f"{v} ({facet_count(facet, v)})"
+        
         # Filters
         col1, col2, col3 = st.columns(3)
         with col1:
-            category = st.selectbox("Category", ["All"] + list(set(n.get("category", "General") for n in news)))
+            category = st.selectbox("Category", ["All"] + facet_values("category"),
+                                    format_func=facet_label("category"))
         with col2:
-            sentiment = st.selectbox("Sentiment", ["All", "positive", "neutral", "negative"])
+            sentiment = st.selectbox("Sentiment", ["All", "positive", "neutral", "negative"],
+                                     format_func=facet_label("sentiment"))
         with col3:
-            source = st.selectbox("Source", ["All"] + list(set(n.get("source", "Unknown") for n in news)))
+            source = st.selectbox("Source", ["All"] + facet_values("source"),
+                                  format_func=facet_label("source"))
         
         # Filter
-        filtered = news
-        if category != "All":
-            filtered = [n for n in filtered if n.get("category") == category]
-        if sentiment != "All":
-            filtered = [n for n in filtered if n.get("sentiment") == sentiment]
-        if source != "All":
-            filtered = [n for n in filtered if n.get("source") == source]
+        filters = {
+            "category": None if category == "All" else category,
+            "sentiment": None if sentiment == "All" else sentiment,
+            "source": None if source == "All" else source
+        }
+        if store:
+            total = store.count_news(**filters)
+        else:
+            positions = facets.query(**filters)
+            total = len(positions)
+        
+        # Pagination - the cursor resets whenever the filters change
+        selected = (category, sentiment, source)
+        if st.session_state.get("news_filters") != selected:
+            st.session_state.news_filters = selected
+            st.session_state.news_cursor = 0
+        cursor = min(st.session_state.get("news_cursor", 0), max(total - 1, 0))
         
         # Display
-        for item in filtered[:50]:
-            with st.container():
-                st.markdown(f"""
-                <div class="news-card">
-                    <a class="headline" href="{item.get('link', '#')}">{item.get('title', 'No title')}</a>
-                    <div style="margin-top: 8px;">
-                        <span class="source-tag">{item.get('source', 'Unknown')}</span>
-                        <span class="time-tag">{item.get('category', 'General')}</span>
-                        <span class="time-tag">• {item.get('reading_time', 1)} min read</span>
-                    </div>
-                    <p style="color: #8b949e; font-size: 14px; margin-top: 8px;">
-                        {item.get('description', '')[:200]}...
-                    </p>
-                </div>
-                """, unsafe_allow_html=True)
+        if store:
+            items = store.query_news(limit=PAGE_SIZE, offset=cursor, **filters)
+        else:
+            items = iter_page(news, positions, cursor)
+        page = [render_card(item) for item in items]
+        st.markdown("".join(page), unsafe_allow_html=True)
+        
+        col_prev, col_info, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button("◀ Newer", disabled=cursor == 0):
+                st.session_state.news_cursor = max(0, cursor - PAGE_SIZE)
+                st.rerun()
+        with col_info:
+            if total:
+                st.caption(f"Showing {cursor + 1}–{cursor + len(page)} of {total}")
+            else:
+                st.caption("No articles match these filters")
+        with col_next:
+            if st.button("Older ▶", disabled=cursor + PAGE_SIZE >= total):
+                st.session_state.news_cursor = cursor + PAGE_SIZE
+                st.rerun()
 
 with tab2:
     query = st.text_input("🔍 Search", placeholder="Enter search term...")
@@ -301,12 +420,13 @@ with tab2:
             for r in results:
                 st.text(r)
         else:
-            # Fallback to simple filter
-            news = load_news()
-            results = [n for n in news if query.lower() in n.get("title", "").lower()]
-            st.write(f"Found {len(results)} results")
-            for r in results[:10]:
-                st.write(f"- {r.get('title')}")
+            # Fallback to the in-process index (title + summary, BM25)
+            index, by_key = load_search_index()
+            hits, total = index.search_with_total(query, k=10)
+            st.write(f"Found {total} results" + (f", showing the top {len(hits)}" if total > len(hits) else ""))
+            st.caption('Tip: use "quoted phrases" and prefix* terms')
+            for key, score in hits:
+                st.write(f"- {by_key[key].get('title')}")
 
 with tab3:
     st.info("Favorites coming soon!")
@@ -4,10 +4,18 @@ Tanya ML Module - Sentiment Analysis & Keyword Extraction
 Uses sklearn and NLTK for NLP tasks
 """
 
+import hashlib
 import json
+import os
 import re
-from typing import List, Dict, Tuple
-from collections import Counter
+import time
+import zlib
+from array import array
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+import numpy as np
 
 # Positive/negative word lists (expandable)
 POSITIVE_WORDS = {
@@ -22,18 +30,213 @@ NEGATIVE_WORDS = {
     'hate', 'poor', 'dangerous', 'threat', 'risk', 'concern'
 }
 
+STOPWORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
+    'for', 'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were',
+    'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
+    'will', 'would', 'could', 'should', 'may', 'might', 'must', 'shall',
+    'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it',
+    'we', 'they', 'what', 'which', 'who', 'when', 'where', 'why', 'how'
+}
+
+BATCH_CHUNK = 2000  # texts scored per vectorised pass
+
+TOKEN_RE = re.compile(r'\b[a-z]+\b')
+KEYWORD_MIN_LENGTH = 4
+FEATURE_CACHE_SIZE = 10000  # articles whose features AnalysisPipeline keeps
+
+TREND_STORE_FILE = 'data/trends.npz'
+# resolution -> (bucket width in seconds, buckets kept)
+TREND_RESOLUTIONS = {
+    'minute': (60, 6 * 60),     # 6 hours
+    'hour': (3600, 14 * 24),    # 2 weeks
+    'day': (86400, 365),        # 1 year
+}
+
+MINHASH_PERM = 128              # hash functions per signature
+MINHASH_PRIME = (1 << 31) - 1   # keeps a * x + b inside 64 bits
+
+# Polynomial token hash over code points, wrapping at 2**64
+HASH_BASE = 1000003
+HASH_MASK = (1 << 64) - 1
+_HASH_INVERSE = pow(HASH_BASE, -1, 1 << 64)
+
+# re's \w for ASCII; other code points are looked up once per chunk
+_ASCII_WORD = np.array([bool(re.match(r'\w', chr(c))) for c in range(128)])
+
+
+def _hash_word(word: str) -> int:
+    h, power = 0, 1
+    for ch in word:
+        h = (h + ord(ch) * power) & HASH_MASK
+        power = (power * HASH_BASE) & HASH_MASK
+    return h
+
+
+_powers_cache = [np.ones(0, dtype=np.uint64), np.ones(0, dtype=np.uint64)]
+
+
+def _hash_powers(n: int) -> List[np.ndarray]:
+    """BASE**k and BASE**-k for k < n (at least), computed once and grown"""
+    if len(_powers_cache[0]) < n:
+        size = max(n, 2 * len(_powers_cache[0]))
+        for i, base in enumerate((HASH_BASE, _HASH_INVERSE)):
+            powers = np.full(size, base, dtype=np.uint64)
+            powers[0] = 1
+            with np.errstate(over='ignore'):
+                np.cumprod(powers, out=powers)
+            _powers_cache[i] = powers
+    return _powers_cache
+
+
+def _word_runs(text: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Start, end and hash of every run of \\w characters in text.
+
+    _tokenize's tokens are exactly the runs made only of a-z, so a run
+    that equals a lexicon word is a lexicon token.
+    """
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    if not len(codes):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.uint64)
+    is_word = np.zeros(len(codes), dtype=bool)
+    ascii_mask = codes < 128
+    is_word[ascii_mask] = _ASCII_WORD[codes[ascii_mask]]
+    if not ascii_mask.all():
+        other = ~ascii_mask
+        unique = np.unique(codes[other])
+        word_codes = unique[[bool(re.match(r'\w', chr(c))) for c in unique.tolist()]]
+        is_word[other] = np.isin(codes[other], word_codes)
+    
+    edges = np.diff(np.concatenate(([0], is_word.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    
+    # prefix[i] = sum(codes[k] * BASE**k for k < i), so a run's hash is
+    # (prefix[end] - prefix[start]) / BASE**start
+    powers, inverse = _hash_powers(len(codes))
+    with np.errstate(over='ignore'):
+        prefix = np.zeros(len(codes) + 1, dtype=np.uint64)
+        np.cumsum(codes.astype(np.uint64) * powers[:len(codes)], out=prefix[1:])
+        hashes = (prefix[ends] - prefix[starts]) * inverse[starts]
+    return starts, ends, hashes
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase a-z words; the one tokenizer every analyzer here shares"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def keyword_counts(words: Iterable[str], stopwords: Iterable[str] = STOPWORDS) -> Counter:
+    """Counts of the words long enough and meaningful enough to be keywords"""
+    return Counter(w for w in words if len(w) >= KEYWORD_MIN_LENGTH and w not in stopwords)
+
+
+def article_key(article: Dict) -> str:
+    return article.get('id') or article.get('link') or article.get('title', '')
+
+
+def article_text(article: Dict) -> str:
+    return article.get('title', '') + ' ' + (article.get('content') or article.get('summary', ''))
+
+
+def text_digest(text: str) -> str:
+    """Short content hash, so an edited article can be told from the indexed one"""
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def lsh_params(threshold: float, num_perm: int = MINHASH_PERM) -> Tuple[int, int]:
+    """(bands, rows) for an LSH index at the given Jaccard threshold.
+
+    Picks the split whose collision curve best separates pairs above
+    and below the threshold, weighting misses nine times as heavily as
+    extra candidates since every candidate gets checked exactly.
+    """
+    below = np.linspace(0, threshold, 200)
+    above = np.linspace(threshold, 1, 200)
+    best, best_error = (num_perm, 1), None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        false_pos = np.mean(1 - (1 - below ** rows) ** bands) * threshold
+        false_neg = np.mean((1 - above ** rows) ** bands) * (1 - threshold)
+        error = 0.1 * false_pos + 0.9 * false_neg
+        if best_error is None or error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
 class SentimentAnalyzer:
     """Simple lexicon-based sentiment analyzer"""
     
     def __init__(self):
         self.positive = POSITIVE_WORDS
         self.negative = NEGATIVE_WORDS
+        self._lexicon = None
     
     def analyze(self, text: str) -> Dict:
-        words = self._tokenize(text)
+        return self.analyze_tokens(self._tokenize(text))
+    
+    def analyze_tokens(self, words: List[str]) -> Dict:
+        """analyze() for text that has already been tokenized"""
         pos_count = sum(1 for w in words if w in self.positive)
         neg_count = sum(1 for w in words if w in self.negative)
+        return self._result(pos_count, neg_count)
+    
+    def analyze_batch(self, texts: Iterable[str], chunk_size: int = BATCH_CHUNK) -> List[Dict]:
+        """Score many texts at once; same results as calling analyze on each"""
+        return list(self.iter_analyze(texts, chunk_size))
+    
+    def iter_analyze(self, texts: Iterable[str], chunk_size: int = BATCH_CHUNK) -> Iterator[Dict]:
+        """Streaming analyze_batch: scores chunk_size texts per pass"""
+        chunk = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= chunk_size:
+                yield from self._analyze_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._analyze_chunk(chunk)
+    
+    def _compile_lexicon(self):
+        """Lexicon word ids, their token hashes and per-word weight vectors"""
+        key = (frozenset(self.positive), frozenset(self.negative))
+        if self._lexicon is None or self._lexicon[0] != key:
+            words = sorted(self.positive | self.negative)
+            ids = {w: i for i, w in enumerate(words)}
+            hashes = np.array([_hash_word(w) for w in words], dtype=np.uint64)
+            pos_weights = np.array([w in self.positive for w in words], dtype=np.int64)
+            neg_weights = np.array([w in self.negative for w in words], dtype=np.int64)
+            self._lexicon = (key, ids, hashes, pos_weights, neg_weights)
+        return self._lexicon[1:]
+    
+    def _analyze_chunk(self, texts: List[str]) -> List[Dict]:
+        ids, lexicon_hashes, pos_weights, neg_weights = self._compile_lexicon()
+        n = len(texts)
+        lowered = [t.lower() for t in texts]
+        joined = '\n'.join(lowered)  # newlines keep texts apart
+        doc_starts = np.zeros(n, dtype=np.int64)
+        if n > 1:
+            np.cumsum([len(t) + 1 for t in lowered[:-1]], out=doc_starts[1:])
+        
+        # Tokenize the whole chunk at once and keep the tokens whose hash
+        # is a lexicon word's; a string check rules out hash collisions
+        starts, ends, hashes = _word_runs(joined)
+        candidates = np.flatnonzero(np.isin(hashes, lexicon_hashes))
+        positions, word_ids = [], []
+        for i in candidates.tolist():
+            word_id = ids.get(joined[starts[i]:ends[i]])
+            if word_id is not None:
+                positions.append(starts[i])
+                word_ids.append(word_id)
         
+        # (doc, word) pairs form a sparse count matrix; weight it by column
+        docs = np.searchsorted(doc_starts, np.asarray(positions, dtype=np.int64), side='right') - 1
+        word_ids = np.asarray(word_ids, dtype=np.int64)
+        pos_counts = np.bincount(docs, weights=pos_weights[word_ids], minlength=n).astype(np.int64)
+        neg_counts = np.bincount(docs, weights=neg_weights[word_ids], minlength=n).astype(np.int64)
+        return [self._result(p, q) for p, q in zip(pos_counts.tolist(), neg_counts.tolist())]
+    
+    def _result(self, pos_count: int, neg_count: int) -> Dict:
         score = pos_count - neg_count
         total = pos_count + neg_count
         
@@ -56,28 +259,24 @@ class SentimentAnalyzer:
         }
     
     def _tokenize(self, text: str) -> List[str]:
-        return re.findall(r'\b[a-z]+\b', text.lower())
+        return tokenize(text)
 
 
 class KeywordExtractor:
     """Extract keywords using TF-IDF-like approach"""
     
     def __init__(self):
-        self.stopwords = set([
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
-            'for', 'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were',
-            'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
-            'will', 'would', 'could', 'should', 'may', 'might', 'must', 'shall',
-            'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it',
-            'we', 'they', 'what', 'which', 'who', 'when', 'where', 'why', 'how'
-        ])
+        self.stopwords = set(STOPWORDS)
+        self.index = KeywordIndex(self.stopwords)
+    
+    def _tokenize(self, text: str) -> List[str]:
+        return [w for w in tokenize(text) if len(w) >= KEYWORD_MIN_LENGTH and w not in self.stopwords]
     
     def extract(self, text: str, top_n: int = 10) -> List[Dict]:
-        words = re.findall(r'\b[a-z]{4,}\b', text.lower())
-        words = [w for w in words if w not in self.stopwords]
-        
-        # Count frequencies
-        freq = Counter(words)
+        return self.extract_counts(Counter(self._tokenize(text)), top_n)
+    
+    def extract_counts(self, freq: Counter, top_n: int = 10) -> List[Dict]:
+        """extract() for keyword counts that have already been computed"""
         total = sum(freq.values())
         
         # Calculate TF-IDF-like scores
@@ -93,35 +292,407 @@ class KeywordExtractor:
         return keywords
     
     def extract_from_articles(self, articles: List[Dict], top_n: int = 20) -> List[Dict]:
-        """Extract keywords across multiple articles"""
-        all_text = ' '.join(a.get('title', '') + ' ' + a.get('content', '') for a in articles)
-        return self.extract(all_text, top_n)
+        """Top TF-IDF keywords across multiple articles.
+
+        Articles already seen by a previous call aren't tokenized again;
+        ones missing from this call are evicted.
+        """
+        self.index.sync(articles)
+        return self.index.top_keywords(top_n)
+
+
+class KeywordIndex:
+    """Incremental TF-IDF over a changing set of articles.
+
+    Each article is tokenized once, when added, into a sparse vector of
+    (term id, count) arrays. Document frequencies, corpus counts and
+    summed term frequencies are kept per term id in flat arrays and
+    adjusted as articles come and go, so scores never need a pass over
+    the old articles.
+    """
+    
+    def __init__(self, stopwords: Iterable[str] = STOPWORDS):
+        self.stopwords = set(stopwords)
+        self.vocab: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.df = array('I')          # articles containing each term
+        self.counts = array('I')      # occurrences of each term across articles
+        self.tf_sum = array('d')      # sum over articles of count / article length
+        self.docs: Dict[str, Tuple[array, array]] = {}   # key -> (term ids, counts)
+        self.digests: Dict[str, str] = {}                  # key -> text_digest of the indexed text
+    
+    def __len__(self):
+        return len(self.docs)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.docs
+    
+    article_key = staticmethod(article_key)
+    article_text = staticmethod(article_text)
+    
+    def _term_id(self, term: str) -> int:
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            term_id = self.vocab[term] = len(self.terms)
+            self.terms.append(term)
+            self.df.append(0)
+            self.counts.append(0)
+            self.tf_sum.append(0.0)
+        return term_id
+    
+    def add(self, key: str, text: str):
+        """Index one article, replacing an older version with the same key"""
+        self.add_counts(key, keyword_counts(tokenize(text), self.stopwords), text_digest(text))
+    
+    def add_counts(self, key: str, freq: Counter, digest: Optional[str] = None):
+        """add() for an article's precomputed keyword counts (and text digest, if known)"""
+        if key in self.docs:
+            self.remove(key)
+        if digest is not None:
+            self.digests[key] = digest
+        ids = array('I', (self._term_id(w) for w in freq))
+        counts = array('I', freq.values())
+        length = sum(counts)
+        for term_id, count in zip(ids, counts):
+            self.df[term_id] += 1
+            self.counts[term_id] += count
+            self.tf_sum[term_id] += count / length
+        self.docs[key] = (ids, counts)
+    
+    def remove(self, key: str):
+        """Evict an article and take its counts back out"""
+        doc = self.docs.pop(key, None)
+        self.digests.pop(key, None)
+        if doc is None:
+            return
+        ids, counts = doc
+        length = sum(counts)
+        for term_id, count in zip(ids, counts):
+            self.df[term_id] -= 1
+            self.counts[term_id] -= count
+            # Drift from repeated float adds/subtracts stops at zero
+            self.tf_sum[term_id] = 0.0 if self.df[term_id] == 0 else self.tf_sum[term_id] - count / length
+    
+    def sync(self, articles: Iterable[Dict]) -> bool:
+        """Add new or edited articles and evict ones no longer present.
+        
+        Returns True if the index changed.
+        """
+        seen = set()
+        changed = False
+        for article in articles:
+            key = self.article_key(article)
+            seen.add(key)
+            text = self.article_text(article)
+            if self.digests.get(key) != text_digest(text):
+                self.add(key, text)
+                changed = True
+        for key in [k for k in self.docs if k not in seen]:
+            self.remove(key)
+            changed = True
+        return changed
+    
+    def _idf(self) -> np.ndarray:
+        """Smoothed inverse document frequency per term id"""
+        df = np.frombuffer(self.df, dtype=np.uint32) if self.df else np.zeros(0)
+        return np.log((1 + len(self.docs)) / (1 + df)) + 1
+    
+    def _top(self, ids: np.ndarray, scores: np.ndarray, counts: np.ndarray, top_n: int) -> List[Dict]:
+        if top_n < len(scores):
+            best = np.argpartition(-scores, top_n)[:top_n]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.lexsort((ids[best], -scores[best]))]
+        return [
+            {'keyword': self.terms[ids[i]], 'count': int(counts[i]), 'score': round(float(scores[i]) * 100, 2)}
+            for i in best.tolist() if scores[i] > 0
+        ]
+    
+    def keywords(self, key: str, top_n: int = 10) -> List[Dict]:
+        """Top TF-IDF keywords of one indexed article"""
+        doc = self.docs.get(key)
+        if doc is None or not doc[0]:
+            return []
+        ids = np.frombuffer(doc[0], dtype=np.uint32)
+        counts = np.frombuffer(doc[1], dtype=np.uint32)
+        scores = counts / counts.sum() * self._idf()[ids]
+        return self._top(ids, scores, counts, top_n)
+    
+    def top_keywords(self, top_n: int = 20) -> List[Dict]:
+        """Top keywords across the corpus: summed term frequency times idf"""
+        if not self.docs or not self.terms:
+            return []
+        ids = np.arange(len(self.terms))
+        tf_sum = np.frombuffer(self.tf_sum, dtype=np.float64)
+        scores = tf_sum / len(self.docs) * self._idf()
+        counts = np.frombuffer(self.counts, dtype=np.uint32)
+        return self._top(ids, scores, counts, top_n)
+
+
+class TrendStore:
+    """Keyword counts in fixed time buckets at several resolutions.
+    
+    Every count lands in a minute, an hour and a day bucket at once, so
+    the coarser series are ready-made rollups. Each resolution is a ring
+    of buckets stored as one (keywords x buckets) counter matrix: old
+    buckets are overwritten as time moves on, which gives each
+    resolution its own retention and leaves only the coarser rollups for
+    older periods.
+    """
+    
+    def __init__(self, path: str = TREND_STORE_FILE):
+        self.path = path
+        self.keywords: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.counts = {name: np.zeros((0, slots), dtype=np.uint32) for name, (_, slots) in TREND_RESOLUTIONS.items()}
+        self.totals = {name: np.zeros(slots, dtype=np.uint64) for name, (_, slots) in TREND_RESOLUTIONS.items()}
+        self.heads = {name: None for name in TREND_RESOLUTIONS}   # newest bucket number seen
+    
+    def __len__(self):
+        return len(self.keywords)
+    
+    def _row(self, keyword: str) -> int:
+        row = self.rows.get(keyword)
+        if row is None:
+            row = self.rows[keyword] = len(self.keywords)
+            self.keywords.append(keyword)
+            for name, counts in self.counts.items():
+                if row >= len(counts):
+                    grown = np.zeros((max(64, 2 * len(counts)), counts.shape[1]), dtype=counts.dtype)
+                    grown[:len(counts)] = counts
+                    self.counts[name] = grown
+        return row
+    
+    def _advance(self, name: str, bucket: int) -> bool:
+        """Move the ring forward to bucket, clearing the slots it reuses.
+        
+        Returns False if bucket is already older than the retention.
+        """
+        _, slots = TREND_RESOLUTIONS[name]
+        head = self.heads[name]
+        if head is None or bucket - head >= slots:
+            self.counts[name][:] = 0
+            self.totals[name][:] = 0
+            self.heads[name] = bucket
+        elif bucket > head:
+            expired = np.arange(head + 1, bucket + 1) % slots
+            self.counts[name][:, expired] = 0
+            self.totals[name][expired] = 0
+            self.heads[name] = bucket
+        return bucket > self.heads[name] - slots
+    
+    def add(self, counts: Dict[str, int], timestamp: Optional[float] = None):
+        """Add keyword -> count at timestamp (epoch seconds, default now)"""
+        timestamp = time.time() if timestamp is None else timestamp
+        rows = np.array([self._row(k) for k in counts], dtype=np.int64)
+        values = np.array(list(counts.values()), dtype=np.uint32)
+        for name, (width, slots) in TREND_RESOLUTIONS.items():
+            bucket = int(timestamp // width)
+            if not self._advance(name, bucket):
+                continue
+            np.add.at(self.counts[name], (rows, bucket % slots), values)
+            self.totals[name][bucket % slots] += int(values.sum())
+    
+    def _window(self, name: str, buckets: int) -> np.ndarray:
+        """Slot indexes of the newest buckets, oldest first"""
+        _, slots = TREND_RESOLUTIONS[name]
+        buckets = min(buckets, slots)
+        return np.arange(self.heads[name] - buckets + 1, self.heads[name] + 1) % slots
+    
+    def series(self, keyword: str, resolution: str = 'hour', buckets: Optional[int] = None) -> List[Dict]:
+        """(timestamp, count, share of all counts) per bucket, oldest first"""
+        width, slots = TREND_RESOLUTIONS[resolution]
+        row = self.rows.get(keyword)
+        if row is None or self.heads[resolution] is None:
+            return []
+        window = self._window(resolution, buckets or slots)
+        first = self.heads[resolution] - len(window) + 1
+        counts = self.counts[resolution][row, window].tolist()
+        totals = self.totals[resolution][window].tolist()
+        return [
+            {
+                'timestamp': datetime.fromtimestamp((first + i) * width).isoformat(),
+                'count': count,
+                'score': round(count / total * 100, 2)
+            }
+            for i, (count, total) in enumerate(zip(counts, totals)) if count
+        ]
+    
+    def top_rising(self, resolution: str = 'hour', recent: int = 1, baseline: int = 24,
+                   top_n: int = 10, min_count: int = 3) -> List[Dict]:
+        """Keywords whose recent rate most exceeds their baseline rate.
+        
+        burst = (recent rate - baseline rate) / sqrt(baseline rate + 1),
+        a Poisson-style z-score that keeps rare words from dominating.
+        """
+        if self.heads[resolution] is None or not self.keywords:
+            return []
+        n = len(self.keywords)
+        window = self._window(resolution, recent + baseline)
+        matrix = self.counts[resolution][:n, window].astype(np.float64)
+        recent_counts = matrix[:, -recent:].sum(axis=1)
+        baseline_cols = matrix[:, :-recent]
+        baseline_rate = baseline_cols.mean(axis=1) if baseline_cols.shape[1] else np.zeros(n)
+        recent_rate = recent_counts / recent
+        burst = (recent_rate - baseline_rate) / np.sqrt(baseline_rate + 1)
+        burst[recent_counts < min_count] = -np.inf
+        
+        order = np.argsort(-burst, kind='stable')[:top_n]
+        return [
+            {
+                'keyword': self.keywords[i],
+                'count': int(recent_counts[i]),
+                'baseline': round(float(baseline_rate[i]), 2),
+                'burst': round(float(burst[i]), 2)
+            }
+            for i in order.tolist() if burst[i] > 0
+        ]
+    
+    def compact(self):
+        """Drop keywords with no counts left in any retained bucket"""
+        n = len(self.keywords)
+        alive = np.zeros(n, dtype=bool)
+        for counts in self.counts.values():
+            alive |= counts[:n].any(axis=1)
+        if alive.all():
+            return
+        keep = np.flatnonzero(alive)
+        self.keywords = [self.keywords[i] for i in keep.tolist()]
+        self.rows = {k: i for i, k in enumerate(self.keywords)}
+        for name in self.counts:
+            self.counts[name] = self.counts[name][keep]
+    
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        self.compact()
+        n = len(self.keywords)
+        arrays = {f'counts_{name}': counts[:n] for name, counts in self.counts.items()}
+        arrays.update({f'totals_{name}': totals for name, totals in self.totals.items()})
+        meta = {'keywords': self.keywords, 'heads': self.heads, 'resolutions': TREND_RESOLUTIONS}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+    
+    @classmethod
+    def load(cls, path: str = TREND_STORE_FILE) -> 'TrendStore':
+        """Load a saved store, or start an empty one"""
+        store = cls(path)
+        if not os.path.exists(path):
+            return store
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta['resolutions'] != {k: list(v) for k, v in TREND_RESOLUTIONS.items()}:
+                return store   # bucket layout changed; start over
+            store.keywords = meta['keywords']
+            store.rows = {k: i for i, k in enumerate(store.keywords)}
+            store.heads = meta['heads']
+            for name in TREND_RESOLUTIONS:
+                store.counts[name] = data[f'counts_{name}']
+                store.totals[name] = data[f'totals_{name}']
+        return store
 
 
 class TrendAnalyzer:
     """Analyze keyword trends over time"""
     
-    def __init__(self):
-        self.history = []
+    def __init__(self, store: Optional[TrendStore] = None):
+        self.store = store if store is not None else TrendStore.load()
     
     def add_snapshot(self, keywords: List[Dict], timestamp: str = None):
-        import datetime
-        self.history.append({
-            'timestamp': timestamp or datetime.datetime.now().isoformat(),
-            'keywords': keywords
-        })
-    
-    def get_trends(self, keyword: str) -> List[Dict]:
-        trends = []
-        for snapshot in self.history:
-            for kw in snapshot['keywords']:
-                if kw['keyword'] == keyword:
-                    trends.append({
-                        'timestamp': snapshot['timestamp'],
-                        'count': kw['count'],
-                        'score': kw['score']
-                    })
-        return trends
+        when = datetime.fromisoformat(timestamp).timestamp() if timestamp else None
+        self.store.add({kw['keyword']: kw['count'] for kw in keywords}, when)
+    
+    def get_trends(self, keyword: str, resolution: str = 'hour') -> List[Dict]:
+        return self.store.series(keyword, resolution)
+    
+    def top_rising(self, top_n: int = 10, resolution: str = 'hour') -> List[Dict]:
+        return self.store.top_rising(resolution, top_n=top_n)
+    
+    def save(self):
+        self.store.save()
+
+
+class MinHashIndex:
+    """MinHash signatures in an LSH band index for near-duplicate lookups.
+
+    Word sets whose Jaccard similarity is above the threshold share at
+    least one band bucket with high probability, so finding candidates
+    for an article costs a few dict lookups instead of a pass over every
+    other article. Candidates are then checked with the exact Jaccard.
+    """
+    
+    def __init__(self, threshold: float = 0.8, num_perm: int = MINHASH_PERM, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MINHASH_PRIME, num_perm).astype(np.uint64)
+        self._b = rng.randint(0, MINHASH_PRIME, num_perm).astype(np.uint64)
+        self.buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+        self.words: Dict[str, frozenset] = {}
+        self.signatures: Dict[str, np.ndarray] = {}
+    
+    def __len__(self):
+        return len(self.words)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.words
+    
+    def signature(self, words: Iterable[str]) -> np.ndarray:
+        """Minimum of num_perm universal hashes over the word set"""
+        hashes = np.fromiter((zlib.crc32(w.encode()) % MINHASH_PRIME for w in words), dtype=np.uint64)
+        if not len(hashes):
+            return np.full(self.num_perm, MINHASH_PRIME, dtype=np.uint32)
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MINHASH_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+    
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        r = self.rows
+        return [signature[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+    
+    def query(self, words: Iterable[str]) -> List[Tuple[str, float]]:
+        """Indexed keys at or above the threshold, with exact similarity"""
+        words = frozenset(words)
+        if not words:
+            return []
+        candidates = set()
+        for band, band_key in zip(self.buckets, self._band_keys(self.signature(words))):
+            candidates.update(band.get(band_key, ()))
+        matches = []
+        for key in candidates:
+            other = self.words[key]
+            sim = len(words & other) / len(words | other)
+            if sim >= self.threshold:
+                matches.append((key, sim))
+        return matches
+    
+    def add(self, key: str, words: Iterable[str]) -> List[Tuple[str, float]]:
+        """Index a word set; returns the already indexed near-duplicates"""
+        if key in self.words:
+            self.remove(key)
+        words = frozenset(words)
+        if not words:
+            return []
+        matches = self.query(words)
+        signature = self.signature(words)
+        for band, band_key in zip(self.buckets, self._band_keys(signature)):
+            band.setdefault(band_key, []).append(key)
+        self.words[key] = words
+        self.signatures[key] = signature
+        return matches
+    
+    def remove(self, key: str):
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        del self.words[key]
+        for band, band_key in zip(self.buckets, self._band_keys(signature)):
+            keys = band[band_key]
+            keys.remove(key)
+            if not keys:
+                del band[band_key]
 
 
 class DuplicateDetector:
@@ -129,10 +700,17 @@ class DuplicateDetector:
     
     def __init__(self, threshold: float = 0.8):
         self.threshold = threshold
+        self.index = MinHashIndex(threshold)
+    
+    def _words(self, text: str) -> set:
+        return set(tokenize(text))
+    
+    def _article_words(self, article: Dict) -> set:
+        return self._words(article.get('title', '') + ' ' + article.get('content', ''))
     
     def calculate_similarity(self, text1: str, text2: str) -> float:
-        words1 = set(re.findall(r'\b[a-z]+\b', text1.lower()))
-        words2 = set(re.findall(r'\b[a-z]+\b', text2.lower()))
+        words1 = self._words(text1)
+        words2 = self._words(text2)
         
         if not words1 or not words2:
             return 0.0
@@ -143,18 +721,156 @@ class DuplicateDetector:
         return intersection / union if union > 0 else 0.0
     
     def find_duplicates(self, articles: List[Dict]) -> List[Tuple[str, str, float]]:
+        """Pairs of articles at or above the threshold, via MinHash LSH"""
+        index = MinHashIndex(self.threshold)
+        duplicates = []
+        
+        for j, a2 in enumerate(articles):
+            for key, sim in index.add(str(j), self._article_words(a2)):
+                i = int(key)
+                duplicates.append((i, j, sim))
+        
+        duplicates.sort()
+        return [(articles[i].get('id', str(i)), articles[j].get('id', str(j)), round(sim, 2))
+                for i, j, sim in duplicates]
+    
+    def find_duplicates_exact(self, articles: List[Dict]) -> List[Tuple[str, str, float]]:
+        """Compare every pair; quadratic, kept as the reference for check_recall"""
         duplicates = []
+        words = [self._article_words(a) for a in articles]
         
-        for i, a1 in enumerate(articles):
-            for j, a2 in enumerate(articles[i+1:], i+1):
-                text1 = a1.get('title', '') + ' ' + a1.get('content', '')
-                text2 = a2.get('title', '') + ' ' + a2.get('content', '')
-                
-                sim = self.calculate_similarity(text1, text2)
+        for i, w1 in enumerate(words):
+            for j in range(i + 1, len(words)):
+                w2 = words[j]
+                if not w1 or not w2:
+                    continue
+                sim = len(w1 & w2) / len(w1 | w2)
                 if sim >= self.threshold:
-                    duplicates.append((a1.get('id', str(i)), a2.get('id', str(j)), round(sim, 2)))
+                    duplicates.append((articles[i].get('id', str(i)), articles[j].get('id', str(j)), round(sim, 2)))
         
         return duplicates
+    
+    def add_articles(self, articles: List[Dict]) -> List[Tuple[str, str, float]]:
+        """Index newly fetched articles against everything added before.
+        
+        Returns (earlier id, new id, similarity) for each near-duplicate.
+        """
+        duplicates = []
+        for article in articles:
+            key = article_key(article)
+            for other, sim in self.index.add(key, self._article_words(article)):
+                duplicates.append((other, key, round(sim, 2)))
+        return duplicates
+    
+    def check_recall(self, articles: List[Dict]) -> Dict:
+        """How many of the exact method's pairs the LSH index finds"""
+        exact = {(a, b) for a, b, _ in self.find_duplicates_exact(articles)}
+        found = {(a, b) for a, b, _ in self.find_duplicates(articles)}
+        return {
+            'exact_pairs': len(exact),
+            'found_pairs': len(found & exact),
+            'recall': round(len(found & exact) / len(exact), 4) if exact else 1.0
+        }
+
+
+class ArticleFeatures:
+    """Everything the analyzers need from one article's text, tokenized once"""
+    
+    __slots__ = ('key', 'digest', 'words', 'word_set', 'keyword_counts')
+    
+    def __init__(self, key: str, digest: str, words: List[str]):
+        self.key = key
+        self.digest = digest
+        self.words = words
+        self.word_set = frozenset(words)
+        self.keyword_counts = keyword_counts(words)
+
+
+class FeatureCache:
+    """LRU cache of ArticleFeatures keyed by article id and content hash.
+    
+    An edited article hashes differently, so it is re-tokenized rather
+    than served stale features.
+    """
+    
+    def __init__(self, capacity: int = FEATURE_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries: 'OrderedDict[Tuple[str, str], ArticleFeatures]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def get(self, article: Dict) -> ArticleFeatures:
+        text = article_text(article)
+        key = article_key(article)
+        digest = text_digest(text)
+        features = self.entries.get((key, digest))
+        if features is not None:
+            self.entries.move_to_end((key, digest))
+            self.hits += 1
+            return features
+        self.misses += 1
+        features = ArticleFeatures(key, digest, tokenize(text))
+        self.entries[(key, digest)] = features
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return features
+    
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'size': len(self.entries)
+        }
+
+
+class AnalysisPipeline:
+    """Sentiment, keywords and near-duplicates from one tokenization per article"""
+    
+    def __init__(self, threshold: float = 0.8, cache_size: int = FEATURE_CACHE_SIZE):
+        self.sentiment = SentimentAnalyzer()
+        self.keywords = KeywordIndex()
+        self.duplicates = MinHashIndex(threshold)
+        self.cache = FeatureCache(cache_size)
+        self._indexed: Dict[str, str] = {}   # article key -> digest in the indexes
+    
+    def _index(self, features: ArticleFeatures) -> List[Tuple[str, float]]:
+        """Bring the keyword and duplicate indexes up to date with an article"""
+        if self._indexed.get(features.key) == features.digest:
+            return []
+        self._indexed[features.key] = features.digest
+        self.keywords.add_counts(features.key, features.keyword_counts, features.digest)
+        return self.duplicates.add(features.key, features.word_set)
+    
+    def remove(self, key: str):
+        self._indexed.pop(key, None)
+        self.keywords.remove(key)
+        self.duplicates.remove(key)
+    
+    def analyze_articles(self, articles: List[Dict], top_n: int = 5) -> List[Dict]:
+        """Per-article sentiment, top keywords and earlier near-duplicates.
+        
+        All articles are indexed before keywords are ranked, so idf
+        reflects the whole batch.
+        """
+        features = [self.cache.get(a) for a in articles]
+        duplicates = [self._index(f) for f in features]
+        return [
+            {
+                'id': f.key,
+                'sentiment': self.sentiment.analyze_tokens(f.words),
+                'keywords': self.keywords.keywords(f.key, top_n),
+                'duplicates': [(key, round(sim, 2)) for key, sim in dups]
+            }
+            for f, dups in zip(features, duplicates)
+        ]
+    
+    def analyze_article(self, article: Dict, top_n: int = 5) -> Dict:
+        return self.analyze_articles([article], top_n)[0]
 
 
 def main():
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Tanya ML Batch Runner - Analyze the whole news store on every core
+
+Streams articles from the configured store, sends them to a process pool
+in chunks, and merges sentiment, keywords and SimHash fingerprints back
+into the store as results come in. Keys of written articles are appended
+to a checkpoint file, so an interrupted run picks up where it stopped.
+
+Run from the repository root:
+    python -m backend.ml.batch [--workers N] [--chunk-size N] [--restart]
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional
+
+from backend.ml.analyzer import KeywordExtractor, SentimentAnalyzer, article_text
+from collect.simhash import article_fingerprint
+from collect.storage import DATA_DIR, article_key, get_storage
+
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "analysis_checkpoint.jsonl")
+CHUNK_SIZE = 500     # articles per work unit
+FLUSH_SIZE = 5000    # analyzed articles buffered per write to the store
+TOP_KEYWORDS = 5
+
+_sentiment = None
+_keywords = None
+
+
+def _init_worker():
+    global _sentiment, _keywords
+    _sentiment = SentimentAnalyzer()
+    _keywords = KeywordExtractor()
+
+
+def analyze_chunk(articles: List[Dict]) -> List[Dict]:
+    """Analysis fields for one work unit, as partial article dicts to merge"""
+    if _sentiment is None:
+        _init_worker()
+    texts = [article_text(a) for a in articles]
+    results = []
+    for article, text, sentiment in zip(articles, texts, _sentiment.analyze_batch(texts)):
+        keywords = _keywords.extract(text, TOP_KEYWORDS)
+        fingerprint = article_fingerprint(dict(article, simhash=None))
+        update = {k: article[k] for k in ("guid", "link", "title") if article.get(k)}
+        update.update({
+            "sentiment": sentiment["sentiment"],
+            "sentiment_score": sentiment["score"],
+            "sentiment_confidence": sentiment["confidence"],
+            "keywords": [kw["keyword"] for kw in keywords],
+            "simhash": f"{fingerprint:016x}" if fingerprint is not None else None,
+        })
+        results.append(update)
+    return results
+
+
+def iter_articles(storage, page_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """Articles from the store, streamed or paged when the backend supports it"""
+    iter_news = getattr(storage, "iter_news", None)
+    if iter_news is not None:
+        yield from iter_news()
+        return
+    query_news = getattr(storage, "query_news", None)
+    if query_news is None:
+        yield from storage.load_news()
+        return
+    offset = 0
+    while True:
+        page = query_news(limit=page_size, offset=offset)
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += len(page)
+
+
+def iter_chunks(articles: Iterator[Dict], done: set, chunk_size: int,
+                stats: Optional[Dict] = None) -> Iterator[List[Dict]]:
+    """Chunks of articles not in done; stats["skipped"] counts the rest"""
+    chunk = []
+    for article in articles:
+        if article_key(article) in done:
+            if stats is not None:
+                stats["skipped"] = stats.get("skipped", 0) + 1
+            continue
+        chunk.append(article)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_checkpoint(path: str = CHECKPOINT_FILE) -> set:
+    """Keys of articles already written back by an earlier run"""
+    done = set()
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    done.update(json.loads(line))
+                except ValueError:
+                    continue  # torn write at the tail
+    return done
+
+
+def run_batch(storage=None, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE,
+              checkpoint: str = CHECKPOINT_FILE, restart: bool = False) -> Dict:
+    """Analyze every article not yet in the checkpoint and merge the results.
+
+    Returns counts of analyzed and skipped articles and the elapsed time.
+    """
+    storage = storage or get_storage()
+    if restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    done = load_checkpoint(checkpoint)
+    workers = workers or os.cpu_count() or 1
+    started = time.time()
+    analyzed = 0
+    stream_stats = {"skipped": 0}
+    pending_writes: List[Dict] = []
+
+    def flush():
+        nonlocal pending_writes, analyzed
+        if not pending_writes:
+            return
+        # Articles deleted or expired since they were read must stay gone:
+        # the partial records would otherwise come back as stub articles
+        storage.merge_news(pending_writes, update_only=True)
+        # Only checkpoint what the store has accepted
+        with open(checkpoint, "a") as f:
+            f.write(json.dumps([article_key(a) for a in pending_writes]) + "\n")
+        analyzed += len(pending_writes)
+        pending_writes = []
+
+    # iter_news holds every segment open, so compactions started by our
+    # own merges can't delete records that haven't been read yet
+    chunks = iter_chunks(iter_articles(storage, chunk_size), done, chunk_size, stream_stats)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # Keep a bounded number of chunks in flight so the stream stays lazy
+        in_flight = set()
+        for chunk in chunks:
+            in_flight.add(pool.submit(analyze_chunk, chunk))
+            if len(in_flight) < workers * 2:
+                continue
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                pending_writes.extend(future.result())
+            if len(pending_writes) >= FLUSH_SIZE:
+                flush()
+        for future in in_flight:
+            pending_writes.extend(future.result())
+    flush()
+
+    return {
+        "analyzed": analyzed,
+        "skipped": stream_stats["skipped"],
+        "workers": workers,
+        "seconds": round(time.time() - started, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze every article in the news store")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="articles per work unit")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="progress file for resuming")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = parser.parse_args()
+
+    stats = run_batch(workers=args.workers, chunk_size=args.chunk_size,
+                      checkpoint=args.checkpoint, restart=args.restart)
+    print(f"Analyzed {stats['analyzed']} articles ({stats['skipped']} already done) "
+          f"on {stats['workers']} workers in {stats['seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,9 +2,226 @@
 AI News Summarizer - Story-style Explanations for Teens
 Explains news like a fascinating story with history and opinions
 """
+import hashlib
+import json
+import os
 import re
-import random
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+
+STORY_CACHE_FILE = 'data/story_cache.jsonl'
+STORY_CACHE_SIZE = 500      # rendered stories kept in memory
+STORY_FILE_MAX = 2000       # stories in the cache file before it is compacted
+STORY_VERSION = 1           # bump when the templates change, so cached stories go stale
+
+NUMBER_RE = re.compile(r'\d+%|\$\d+\s*(?:billion|million)|[\d,]+(?=\s*(?:people|users|customers))')
+COUNTRY_RE = re.compile(r'United States|China|Russia|India|UK|Japan|Germany|France|Brazil|Israel|Ukraine|Saudi Arabia')
+
+# Any of these settles the topic as iran_nuclear, whatever else matches
+IRAN_KEYWORDS = ("iran", "iranian", "tehran", "persia", "ayatollah")
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation shaped like a trie of words.
+
+    Shared prefixes are matched once, so the regex engine walks the text
+    like a multi-pattern automaton instead of retrying every keyword.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict) -> str:
+        # Longer continuations first, so the longest keyword wins
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            branches.append("")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+class TopicMatcher:
+    """Scores every topic in one pass over the text.
+
+    Keywords match whole words only (an optional plural "s" is allowed),
+    so "ai" no longer fires inside "said". A topic's score is the number
+    of its distinct keywords found, as before.
+    """
+
+    def __init__(self, topics: Dict[str, List[str]]):
+        self.topics = list(topics)
+        self.keyword_topics: Dict[str, List[str]] = {}
+        for topic, keywords in topics.items():
+            for keyword in keywords:
+                keyword = " ".join(keyword.lower().split())
+                if topic not in self.keyword_topics.setdefault(keyword, []):
+                    self.keyword_topics[keyword].append(topic)
+
+        # Keywords inside longer ones ("electric" in "electric vehicle")
+        # also count when only the longer one is reported
+        self.contained: Dict[str, List[str]] = {}
+        for keyword in self.keyword_topics:
+            self.contained[keyword] = [
+                other for other in self.keyword_topics
+                if other != keyword and re.search(r"\b" + re.escape(other) + r"\b", keyword)
+            ]
+
+        # Zero-width lookahead reports the longest keyword at every word start
+        self.pattern = re.compile(r"\b(?=(" + _trie_pattern(self.keyword_topics) + r")s?\b)")
+
+    def keywords(self, text: str) -> Set[str]:
+        """Distinct keywords present in text"""
+        found = set()
+        for keyword in self.pattern.findall(" ".join(text.lower().split())):
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self.contained[keyword])
+        return found
+
+    def scores(self, text: str) -> Dict[str, int]:
+        """Matched keyword count per topic (topics without matches left out)"""
+        scores: Dict[str, int] = {}
+        for keyword in self.keywords(text):
+            for topic in self.keyword_topics[keyword]:
+                scores[topic] = scores.get(topic, 0) + 1
+        return scores
+
+    def best(self, text: str, default: str = "general") -> str:
+        """Highest scoring topic; ties go to the topic listed first"""
+        scores = self.scores(text)
+        if not scores:
+            return default
+        return max(self.topics, key=lambda topic: scores.get(topic, 0))
+
+def story_key(title: str, summary: str) -> str:
+    """Cache key for the story rendered from title and summary"""
+    text = f"{STORY_VERSION}\0{title}\0{summary}"
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+class StoryCache:
+    """Rendered stories: an in-memory LRU in front of an append-only file.
+    
+    The file holds one {"key", "story"} object per line. Only offsets are
+    kept in memory; a story is read back from disk on an LRU miss. Stories
+    rendered since the last flush are appended together, and once the file
+    holds more than file_limit stories it is rewritten with just the LRU
+    contents, so it (and the scan at startup) stays bounded.
+    """
+    
+    def __init__(self, capacity: int = STORY_CACHE_SIZE, path: Optional[str] = STORY_CACHE_FILE,
+                 file_limit: int = STORY_FILE_MAX):
+        self.capacity = capacity
+        self.path = path
+        self.file_limit = max(file_limit, capacity)
+        self.entries: 'OrderedDict[str, str]' = OrderedDict()
+        self.offsets: Optional[Dict[str, int]] = None
+        self.unsaved: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def _load_offsets(self) -> Dict[str, int]:
+        if self.offsets is None:
+            self.offsets = {}
+            if self.path and os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    offset = 0
+                    for line in f:
+                        try:
+                            self.offsets[json.loads(line)["key"]] = offset
+                        except (ValueError, KeyError):
+                            pass  # torn write at the tail
+                        offset += len(line)
+        return self.offsets
+    
+    def _read(self, key: str) -> Optional[str]:
+        offset = self._load_offsets().get(key)
+        if offset is None:
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                return json.loads(f.readline())["story"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error reading story cache: {e}")
+            return None
+    
+    def get(self, key: str) -> Optional[str]:
+        story = self.entries.get(key)
+        if story is not None:
+            self.entries.move_to_end(key)
+        else:
+            story = self.unsaved.get(key) or self._read(key)
+            if story is not None:
+                self._remember(key, story)
+        if story is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return story
+    
+    def put(self, key: str, story: str):
+        self._remember(key, story)
+        if key not in self._load_offsets():
+            self.unsaved[key] = story
+    
+    def _remember(self, key: str, story: str):
+        self.entries[key] = story
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+    
+    def flush(self):
+        """Append stories rendered since the last flush to the cache file"""
+        if not self.unsaved or not self.path:
+            self.unsaved = {}
+            return
+        offsets = self._load_offsets()
+        if len(offsets) + len(self.unsaved) > self.file_limit:
+            self.compact()
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                for key, story in self.unsaved.items():
+                    line = (json.dumps({"key": key, "story": story}) + "\n").encode()
+                    f.write(line)
+                    offsets[key] = offset
+                    offset += len(line)
+            self.unsaved = {}
+        except OSError as e:
+            print(f"Error saving story cache: {e}")
+    
+    def compact(self):
+        """Rewrite the cache file with only the stories in the LRU, oldest first"""
+        if not self.path:
+            return
+        offsets = {}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                for key, story in self.entries.items():
+                    offsets[key] = f.tell()
+                    f.write((json.dumps({"key": key, "story": story}) + "\n").encode())
+            os.replace(tmp, self.path)
+            self.offsets = offsets
+            self.unsaved = {}
+        except OSError as e:
+            print(f"Error compacting story cache: {e}")
+    
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'size': len(self.entries)
+        }
 
 class StorySummarizer:
     """Explain news in story form - like telling a friend the full scoop"""
@@ -65,27 +282,132 @@ But in 2018, President Trump withdrew the US from the deal and reimposed harsh s
         }
     }
     
+    TOPIC_SITUATIONS = {
+        "iran_nuclear": """US and Iranian diplomats are meeting in Geneva, Switzerland for new nuclear talks. This is significant because direct US-Iran negotiations are rare - they usually happen through intermediaries.
+
+What's on the table? The US wants Iran to stop enriching uranium to levels that could be used for weapons. Iran wants all economic sanctions lifted so their economy can recover. Iran currently has about 60% enrichment, which is far beyond what civilian nuclear power needs but below the 90% threshold for a bomb.
+
+China, Russia, France, Germany, and the UK are also involved in these talks. Everyone wants to prevent Iran from acquiring nuclear weapons - but they disagree on how to get there.
+
+Israel, Iran's arch-enemy, is watching very nervously. Israel has warned it won't allow Iran to get nuclear weapons and has carried out sabotage attacks on Iranian nuclear facilities in the past.
+
+The stakes are huge. If they reach a deal, it could bring stability to the Middle East. If talks fail, Iran might enrich to weapons-grade, Israel might strike militarily.""",
+        
+        "ai": """The AI world is exploding with developments. Companies are racing to build more powerful AI systems, and everyone wants to be the leader. There's excitement about what AI can do - from writing code to creating art - but also serious concerns about job displacement, misinformation, and whether AI might become too powerful. Governments are scrambling to create regulations.""",
+        
+        "stock_market": """The market has been going through interesting times. There are debates about whether we're heading into a recession, if tech stocks are overvalued, and what the Federal Reserve will do with interest rates. Some investors are optimistic, others are cautious. The ongoing AI boom has been driving a lot of the growth.""",
+        
+        "tech_industry": """Big Tech is facing more scrutiny than ever. Regulators are worried about monopolies and data privacy. Apple, Google, Meta, and Amazon are constantly in the news - whether it's new product launches, antitrust lawsuits, or layoffs. The AI push has made tech stocks volatile but also incredibly valuable.""",
+        
+        "politics": """Politics is as polarized as ever. There are intense debates about the economy, immigration, healthcare, and foreign policy. Upcoming elections are on everyone's mind. Politicians are campaigning, making promises, and attacking each other.""",
+        
+        "war": """Conflict continues to devastate civilians while world leaders argue about what to do. Military aid, sanctions, and diplomatic negotiations are ongoing. There's debate about whether to support one side or stay neutral. The human cost is enormous.""",
+        
+        "climate": """Climate change is accelerating faster than expected. Extreme weather events are becoming more frequent - floods, wildfires, heatwaves. There's pressure on governments and companies to act faster. Some countries are leading the charge with clean energy.""",
+        
+        "economy": """The economic outlook is mixed. Inflation has cooled but remains a concern. Central banks are walking a tightrope - raising rates too much could cause a recession, not raising enough might let inflation spiral. Job markets are showing signs of weakening.""",
+        
+        "energy": """The energy world is undergoing a massive transformation. Solar and wind are now the cheapest sources of new electricity in most places. Electric cars are going mainstream. But there's still resistance from fossil fuel companies.""",
+        
+        "health": """Post-pandemic, healthcare is still recovering. There's debate about vaccine policies, healthcare costs, and the healthcare worker shortage. Mental health is getting more attention. AI is being integrated into diagnostics.""",
+        
+        "space": """Space is getting more crowded and competitive. NASA is planning to return to the Moon. SpaceX is launching satellites and planning Mars missions. Private companies are building space stations. Space tourism might become reality."""
+    }
+    
+    DEFAULT_SITUATION = "this is an evolving situation that people are closely watching."
+    
+    TOPIC_OPINIONS = {
+        "iran_nuclear": """Alright, here's my take on these talks. Iran is a complicated situation. On one hand, Iran has every right to nuclear energy - plenty of countries have nuclear power plants. But here's the thing: enriching uranium to 60-90% is a different ballgame. That's weapons-grade territory. Iran's nuclear sites are hidden underground, they've blocked inspectors, and they've enriched faster than anyone expected after the US left the deal.
+
+The sanctions really suck for ordinary Iranians - they can't buy medicine, cars, or pretty much anything from the West. But does the Iranian government care? They still fund Hezbollah in Lebanon, Houthis in Yemen, and Hamas in Palestine. So it's complicated.
+
+My honest opinion? A deal is absolutely better than war. A US-Iran war would be an absolute catastrophe - Iran isn't Iraq or Afghanistan, it's a big country with proxies across the Middle East, and China and Russia would likely back them. Oil prices would skyrocket and the global economy would tank.
+
+But any deal needs real verification. Iran has a history of cheating - they hid nuclear sites from inspectors for years. So trust but verify. Also, Israel is a wild card here - they've sabotaged Iran's program before and they might not wait for diplomacy.
+
+Bottom line: these talks matter. A lot. Let's hope they find middle ground.""",
+        
+        "ai": """So what should we think about all this? AI is genuinely transformative - it's not just hype. The technology behind ChatGPT and image generators is remarkable, and it'll likely change how we work and live. But there are real concerns: job displacement, misinformation, algorithmic bias, and the question of whether AI systems can be trusted. The key is to be excited about the possibilities while staying skeptical of the hype. Not everything AI companies claim is true, and not every use case makes sense. The best approach: learn about it, form your own opinions, and remember that technology amplifies both human capability and human folly.""",
+        
+        "stock_market": """What does this mean for regular people? The stock market can feel abstract - it's all numbers and algorithms. But it affects your 401(k), your job, and the prices you pay. The truth is, trying to time the market is nearly impossible. History shows that staying invested for the long term beats trying to guess the next big move. That said, be skeptical of anyone claiming to have figured out what the market will do next. Diversification, patience, and not investing money you can't afford to lose are the boring but wise strategies.""",
+        
+        "tech_industry": """Big Tech companies have given us incredible products - smartphones, search engines, streaming, online shopping. But their size and power raise valid concerns about competition, privacy, and democracy. The next decade will determine whether tech remains a force for good or becomes more problematic. As users, we have power - our choices, our data, and our attention shape what companies do. Stay informed, read the fine print, and don't assume anything is truly "free." """,
+        
+        "politics": """Here's the uncomfortable truth: politics affects everything, but it's also incredibly frustrating. Politicians promise a lot and often deliver less. Partisanship makes compromise difficult. But ignoring politics doesn't make it go away - it just means other people make decisions for you. The best approach: learn about the issues, understand different perspectives (even if you disagree), vote, and stay engaged. Change is slow, but it happens. The world today is vastly different from 50 years ago - in both good and bad ways.""",
+        
+        "war": """War is hell, and it's important to remember that behind every statistic are real people - families displaced, children traumatized, communities destroyed. It's easy to get caught up in geopolitics and forget the human cost. That said, complex situations sometimes don't have good options - only less bad ones. The best any of us can do is stay informed, advocate for peace, and remember that our taxes fund militaries. Peace isn't just the absence of war - it requires constant effort.""",
+        
+        "climate": """Climate change is the defining issue of our time. It's not a future problem - it's happening now. The good news: clean energy is becoming cheaper, technology is improving, and younger generations care deeply. The bad news: we're not acting fast enough, and the fossil fuel industry has enormous political power. What can you do? Stay informed, make sustainable choices when possible, and support leaders who take this seriously. Individual actions matter, but systemic change matters more.""",
+        
+        "economy": """The economy affects everyone, but it's notoriously difficult to predict. Economists constantly disagree, and the economy often confects expectations. The best financial advice is timeless: live within your means, save for emergencies, invest for the long term, and don't make decisions based on fear or greed. Economic crises will happen - they always have. What matters is being prepared and staying calm.""",
+        
+        "energy": """The energy transition is happening, whether certain politicians and companies like it or not. Solar and wind are now cheaper than fossil fuels in most cases. Electric cars are becoming mainstream. The jobs of the future are in clean energy. But the transition won't be smooth - there will be winners and losers, and certain industries and regions will struggle. The key is to support workers through the transition and not let perfect be the enemy of good. Every percentage of clean energy we add makes a difference.""",
+        
+        "health": """Health is personal - what works for one person might not work for another. The pandemic taught us that public health requires collective action. We learned that viruses don't respect borders and that science is messy - it evolves as we learn more. The best approach: stay informed but don't panic, trust credible experts (but verify), and take care of your physical and mental health. The healthcare system has problems, but also remarkable innovations are happening.""",
+        
+        "space": """Space is the ultimate frontier, and there's something uniquely inspiring about exploring it. But space isn't just for scientists and billionaires - it's becoming an industry. Satellite internet, Earth observation, and one day, space tourism and mining could affect all of us. The question is: should we prioritize space exploration when we have problems on Earth? Many argue that solving Earth's problems first is more important. Others say innovation in space can help solve Earth problems. Either way, space is becoming more accessible, and this is just the beginning."""
+    }
+    
+    DEFAULT_OPINION = """Every news story has multiple perspectives, and the truth is often more nuanced than headlines suggest. The best approach is to stay informed from multiple sources, question assumptions (including your own), and remember that complex issues rarely have simple answers. What matters is forming your own opinion based on evidence, not just emotion or ideology."""
+    
+    STORY_TEMPLATE = """# {title}
+
+## 📜 The Backstory - How We Got Here
+
+{history}
+
+---
+
+## 🔥 What's Happening Right Now
+
+{current}
+
+---
+
+## 💭 My Take - A Balanced Perspective
+
+{opinion}
+
+---
+
+*The goal here isn't to tell you what to think, but to give you enough context to form your own opinions. News literacy matters - question everything, seek multiple perspectives, and remember that every story has more to it than meets the eye.*
+
+---
+*Topic: {topic}*
+"""
+    
+    _matcher: Optional[TopicMatcher] = None
+    
+    def __init__(self, cache: Optional["StoryCache"] = None):
+        self.cache = cache if cache is not None else StoryCache()
+    
+    @classmethod
+    def topic_matcher(cls) -> TopicMatcher:
+        """Matcher compiled once from TOPIC_CONTEXTS and shared by every instance"""
+        if cls._matcher is None:
+            topics = {topic: data["topics"] for topic, data in cls.TOPIC_CONTEXTS.items()}
+            # Checked first (more specific), under a pseudo-topic of its own
+            cls._matcher = TopicMatcher({"_iran": list(IRAN_KEYWORDS), **topics})
+        return cls._matcher
+    
     def detect_topic(self, title: str, summary: str) -> str:
         """Detect which topic this news is about"""
-        text = (title + " " + summary).lower()
+        matcher = self.topic_matcher()
+        scores = matcher.scores(title + " " + summary)
         
         # Check for Iran first (more specific)
-        if any(kw in text for kw in ["iran", "iranian", "tehran", "persia", "ayatollah"]):
+        if scores.pop("_iran", 0):
             return "iran_nuclear"
         
-        scores = {}
-        for topic, data in self.TOPIC_CONTEXTS.items():
-            score = 0
-            for keyword in data["topics"]:
-                if keyword.lower() in text:
-                    score += 1
-            if score > 0:
-                scores[topic] = score
-        
         if scores:
-            return max(scores, key=scores.get)
+            return max(matcher.topics, key=lambda topic: scores.get(topic, 0))
         return "general"
     
+    def detect_topics(self, articles: Iterable[Dict]) -> List[str]:
+        """detect_topic for a whole feed of article dicts"""
+        return [self.detect_topic(a.get("title", ""), a.get("summary") or a.get("description", ""))
+                for a in articles]
+    
     def generate_summary(self, title: str, summary: str = "") -> Dict:
         """Generate a story-style summary with history and opinion"""
         
@@ -94,7 +416,7 @@ But in 2018, President Trump withdrew the US from the deal and reimposed harsh s
         
         # Get context
         topic_data = self.TOPIC_CONTEXTS.get(topic, {})
-        history = topic_data.get("history", self._generate_general_history(title, summary))
+        history = topic_data.get("history") or self._generate_general_history(title, summary)
         
         # Generate current situation
         current = self._generate_current_situation(title, summary, topic)
@@ -119,8 +441,8 @@ This particular issue has been in the making for years, sometimes decades. It in
     def _generate_current_situation(self, title: str, summary: str, topic: str) -> str:
         """Explain what's happening now"""
         # Extract entities
-        numbers = re.findall(r'\d+%|\$\d+\s*(billion|million)|[\d,]+(?=\s*(people|users|customers))', summary)
-        countries = re.findall(r'(United States|China|Russia|India|UK|Japan|Germany|France|Brazil|Israel|Ukraine|Saudi Arabia)', summary)
+        numbers = NUMBER_RE.findall(summary)
+        countries = COUNTRY_RE.findall(summary)
         
         current = f"""Now let's talk about what's happening right now. {title.replace('.', '')} is making headlines because """
         
@@ -132,109 +454,46 @@ This particular issue has been in the making for years, sometimes decades. It in
             current += f"with {numbers[0]} "
         
         # Add topic-specific current situation
-        topic_situations = {
-            "iran_nuclear": f"""US and Iranian diplomats are meeting in Geneva, Switzerland for new nuclear talks. This is significant because direct US-Iran negotiations are rare - they usually happen through intermediaries.
-
-What's on the table? The US wants Iran to stop enriching uranium to levels that could be used for weapons. Iran wants all economic sanctions lifted so their economy can recover. Iran currently has about 60% enrichment, which is far beyond what civilian nuclear power needs but below the 90% threshold for a bomb.
-
-China, Russia, France, Germany, and the UK are also involved in these talks. Everyone wants to prevent Iran from acquiring nuclear weapons - but they disagree on how to get there.
-
-Israel, Iran's arch-enemy, is watching very nervously. Israel has warned it won't allow Iran to get nuclear weapons and has carried out sabotage attacks on Iranian nuclear facilities in the past.
-
-The stakes are huge. If they reach a deal, it could bring stability to the Middle East. If talks fail, Iran might enrich to weapons-grade, Israel might strike militarily.""",
-            
-            "ai": f"""The AI world is exploding with developments. Companies are racing to build more powerful AI systems, and everyone wants to be the leader. There's excitement about what AI can do - from writing code to creating art - but also serious concerns about job displacement, misinformation, and whether AI might become too powerful. Governments are scrambling to create regulations.""",
-            
-            "stock_market": f"""The market has been going through interesting times. There are debates about whether we're heading into a recession, if tech stocks are overvalued, and what the Federal Reserve will do with interest rates. Some investors are optimistic, others are cautious. The ongoing AI boom has been driving a lot of the growth.""",
-            
-            "tech_industry": f"""Big Tech is facing more scrutiny than ever. Regulators are worried about monopolies and data privacy. Apple, Google, Meta, and Amazon are constantly in the news - whether it's new product launches, antitrust lawsuits, or layoffs. The AI push has made tech stocks volatile but also incredibly valuable.""",
-            
-            "politics": f"""Politics is as polarized as ever. There are intense debates about the economy, immigration, healthcare, and foreign policy. Upcoming elections are on everyone's mind. Politicians are campaigning, making promises, and attacking each other.""",
-            
-            "war": f"""Conflict continues to devastate civilians while world leaders argue about what to do. Military aid, sanctions, and diplomatic negotiations are ongoing. There's debate about whether to support one side or stay neutral. The human cost is enormous.""",
-            
-            "climate": f"""Climate change is accelerating faster than expected. Extreme weather events are becoming more frequent - floods, wildfires, heatwaves. There's pressure on governments and companies to act faster. Some countries are leading the charge with clean energy.""",
-            
-            "economy": f"""The economic outlook is mixed. Inflation has cooled but remains a concern. Central banks are walking a tightrope - raising rates too much could cause a recession, not raising enough might let inflation spiral. Job markets are showing signs of weakening.""",
-            
-            "energy": f"""The energy world is undergoing a massive transformation. Solar and wind are now the cheapest sources of new electricity in most places. Electric cars are going mainstream. But there's still resistance from fossil fuel companies.""",
-            
-            "health": f"""Post-pandemic, healthcare is still recovering. There's debate about vaccine policies, healthcare costs, and the healthcare worker shortage. Mental health is getting more attention. AI is being integrated into diagnostics.""",
-            
-            "space": f"""Space is getting more crowded and competitive. NASA is planning to return to the Moon. SpaceX is launching satellites and planning Mars missions. Private companies are building space stations. Space tourism might become reality."""
-        }
-        
-        current += topic_situations.get(topic, "this is an evolving situation that people are closely watching.")
+        current += self.TOPIC_SITUATIONS.get(topic, self.DEFAULT_SITUATION)
         
         return current
     
     def _generate_opinion(self, title: str, summary: str, topic: str) -> str:
         """Generate balanced opinion/conclusion"""
-        
-        opinions = {
-            "iran_nuclear": """Alright, here's my take on these talks. Iran is a complicated situation. On one hand, Iran has every right to nuclear energy - plenty of countries have nuclear power plants. But here's the thing: enriching uranium to 60-90% is a different ballgame. That's weapons-grade territory. Iran's nuclear sites are hidden underground, they've blocked inspectors, and they've enriched faster than anyone expected after the US left the deal.
-
-The sanctions really suck for ordinary Iranians - they can't buy medicine, cars, or pretty much anything from the West. But does the Iranian government care? They still fund Hezbollah in Lebanon, Houthis in Yemen, and Hamas in Palestine. So it's complicated.
-
-My honest opinion? A deal is absolutely better than war. A US-Iran war would be an absolute catastrophe - Iran isn't Iraq or Afghanistan, it's a big country with proxies across the Middle East, and China and Russia would likely back them. Oil prices would skyrocket and the global economy would tank.
-
-But any deal needs real verification. Iran has a history of cheating - they hid nuclear sites from inspectors for years. So trust but verify. Also, Israel is a wild card here - they've sabotaged Iran's program before and they might not wait for diplomacy.
-
-Bottom line: these talks matter. A lot. Let's hope they find middle ground.""",
-            
-            "ai": """So what should we think about all this? AI is genuinely transformative - it's not just hype. The technology behind ChatGPT and image generators is remarkable, and it'll likely change how we work and live. But there are real concerns: job displacement, misinformation, algorithmic bias, and the question of whether AI systems can be trusted. The key is to be excited about the possibilities while staying skeptical of the hype. Not everything AI companies claim is true, and not every use case makes sense. The best approach: learn about it, form your own opinions, and remember that technology amplifies both human capability and human folly.""",
-            
-            "stock_market": """What does this mean for regular people? The stock market can feel abstract - it's all numbers and algorithms. But it affects your 401(k), your job, and the prices you pay. The truth is, trying to time the market is nearly impossible. History shows that staying invested for the long term beats trying to guess the next big move. That said, be skeptical of anyone claiming to have figured out what the market will do next. Diversification, patience, and not investing money you can't afford to lose are the boring but wise strategies.""",
-            
-            "tech_industry": """Big Tech companies have given us incredible products - smartphones, search engines, streaming, online shopping. But their size and power raise valid concerns about competition, privacy, and democracy. The next decade will determine whether tech remains a force for good or becomes more problematic. As users, we have power - our choices, our data, and our attention shape what companies do. Stay informed, read the fine print, and don't assume anything is truly "free." """,
-            
-            "politics": """Here's the uncomfortable truth: politics affects everything, but it's also incredibly frustrating. Politicians promise a lot and often deliver less. Partisanship makes compromise difficult. But ignoring politics doesn't make it go away - it just means other people make decisions for you. The best approach: learn about the issues, understand different perspectives (even if you disagree), vote, and stay engaged. Change is slow, but it happens. The world today is vastly different from 50 years ago - in both good and bad ways.""",
-            
-            "war": """War is hell, and it's important to remember that behind every statistic are real people - families displaced, children traumatized, communities destroyed. It's easy to get caught up in geopolitics and forget the human cost. That said, complex situations sometimes don't have good options - only less bad ones. The best any of us can do is stay informed, advocate for peace, and remember that our taxes fund militaries. Peace isn't just the absence of war - it requires constant effort.""",
-            
-            "climate": """Climate change is the defining issue of our time. It's not a future problem - it's happening now. The good news: clean energy is becoming cheaper, technology is improving, and younger generations care deeply. The bad news: we're not acting fast enough, and the fossil fuel industry has enormous political power. What can you do? Stay informed, make sustainable choices when possible, and support leaders who take this seriously. Individual actions matter, but systemic change matters more.""",
-            
-            "economy": """The economy affects everyone, but it's notoriously difficult to predict. Economists constantly disagree, and the economy often confects expectations. The best financial advice is timeless: live within your means, save for emergencies, invest for the long term, and don't make decisions based on fear or greed. Economic crises will happen - they always have. What matters is being prepared and staying calm.""",
-            
-            "energy": """The energy transition is happening, whether certain politicians and companies like it or not. Solar and wind are now cheaper than fossil fuels in most cases. Electric cars are becoming mainstream. The jobs of the future are in clean energy. But the transition won't be smooth - there will be winners and losers, and certain industries and regions will struggle. The key is to support workers through the transition and not let perfect be the enemy of good. Every percentage of clean energy we add makes a difference.""",
-            
-            "health": """Health is personal - what works for one person might not work for another. The pandemic taught us that public health requires collective action. We learned that viruses don't respect borders and that science is messy - it evolves as we learn more. The best approach: stay informed but don't panic, trust credible experts (but verify), and take care of your physical and mental health. The healthcare system has problems, but also remarkable innovations are happening.""",
-            
-            "space": """Space is the ultimate frontier, and there's something uniquely inspiring about exploring it. But space isn't just for scientists and billionaires - it's becoming an industry. Satellite internet, Earth observation, and one day, space tourism and mining could affect all of us. The question is: should we prioritize space exploration when we have problems on Earth? Many argue that solving Earth's problems first is more important. Others say innovation in space can help solve Earth problems. Either way, space is becoming more accessible, and this is just the beginning."""
-        }
-        
-        return opinions.get(topic, """Every news story has multiple perspectives, and the truth is often more nuanced than headlines suggest. The best approach is to stay informed from multiple sources, question assumptions (including your own), and remember that complex issues rarely have simple answers. What matters is forming your own opinion based on evidence, not just emotion or ideology.""")
+        return self.TOPIC_OPINIONS.get(topic, self.DEFAULT_OPINION)
     
     def generate_full_story(self, title: str, summary: str = "") -> str:
         """Generate complete story for display"""
-        result = self.generate_summary(title, summary)
-        
-        story = f"""# {title}
-
-## 📜 The Backstory - How We Got Here
-
-{result['history']}
-
----
-
-## 🔥 What's Happening Right Now
-
-{result['current']}
-
----
-
-## 💭 My Take - A Balanced Perspective
-
-{result['opinion']}
-
----
-
-*The goal here isn't to tell you what to think, but to give you enough context to form your own opinions. News literacy matters - question everything, seek multiple perspectives, and remember that every story has more to it than meets the eye.*
-
----
-*Topic: {result['topic'].replace('_', ' ').title()}*
-"""
+        story = self._cached_story(title, summary)
+        self.cache.flush()
         return story
+    
+    def generate_many(self, articles: Iterable[Dict]) -> List[str]:
+        """Full stories for a feed of article dicts, rendering only uncached ones"""
+        stories = []
+        for article in articles:
+            summary = article.get("summary") or article.get("description", "")
+            stories.append(self._cached_story(article.get("title", ""), summary))
+        self.cache.flush()
+        return stories
+    
+    def _cached_story(self, title: str, summary: str) -> str:
+        key = story_key(title, summary)
+        story = self.cache.get(key)
+        if story is None:
+            story = self._render_story(title, summary)
+            self.cache.put(key, story)
+        return story
+    
+    def _render_story(self, title: str, summary: str) -> str:
+        result = self.generate_summary(title, summary)
+        return self.STORY_TEMPLATE.format(
+            title=title,
+            history=result['history'],
+            current=result['current'],
+            opinion=result['opinion'],
+            topic=result['topic'].replace('_', ' ').title()
+        )
 
 
 # Example usage
@@ -0,0 +1,158 @@
+"""
+Async Collection Engine - Shared asyncio fetcher for the RSS and HTML scrapers
+"""
+import asyncio
+import random
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+
+from collect.http_cache import ValidatorCache
+
+REQUEST_TIMEOUT = 10     # seconds per attempt
+MAX_RETRIES = 2          # extra attempts after the first one
+BACKOFF_BASE = 0.5       # seconds, doubled on every retry
+BACKOFF_MAX = 8          # seconds
+MAX_CONNECTIONS = 100    # open sockets across all hosts
+PER_HOST_LIMIT = 2       # kept-alive connections per host
+KEEPALIVE_TIMEOUT = 30   # seconds an idle connection stays pooled
+COLLECT_DEADLINE = 60    # seconds for a whole collect_all pass
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+class CollectionEngine:
+    """Fetch many sources from one event loop over pooled connections.
+
+    Scrapers plug in a parse(url, body) callable; the engine handles
+    conditional requests, retries, timeouts and the overall deadline.
+    """
+
+    def __init__(self, cache: Optional[ValidatorCache] = None,
+                 timeout: float = REQUEST_TIMEOUT, retries: int = MAX_RETRIES,
+                 per_host: int = PER_HOST_LIMIT, max_connections: int = MAX_CONNECTIONS,
+                 deadline: float = COLLECT_DEADLINE):
+        self.cache = cache
+        self.timeout = timeout
+        self.retries = retries
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.deadline = deadline
+        self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        """Create the shared session and its keep-alive connection pool"""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.per_host,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers=HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+
+    async def close(self):
+        """Close the session and every pooled connection"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Delay before the next attempt, with full jitter"""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+        cap = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    async def fetch(self, url: str, headers: Optional[Dict] = None) -> Dict:
+        """GET a URL, retrying transient failures.
+
+        Returns a dict with status, headers (case-insensitive) and body
+        (bytes). Raises the last error once retries are exhausted.
+        """
+        await self.open()
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    body = await response.read()
+                    if response.status in RETRY_STATUSES and attempt < self.retries:
+                        await asyncio.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                        continue
+                    if response.status >= 400:
+                        response.raise_for_status()
+                    return {
+                        "status": response.status,
+                        "headers": response.headers.copy(),
+                        "body": body
+                    }
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+        raise RuntimeError(f"Retries exhausted for {url}")
+
+    async def fetch_source(self, url: str, parse: Callable[[str, bytes], Optional[Dict]]) -> Optional[Dict]:
+        """Fetch and parse one source, reusing the cached result on a 304"""
+        try:
+            conditional = self.cache.request_headers(url) if self.cache else {}
+            response = await self.fetch(url, conditional)
+            if response["status"] == 304:
+                cached = self.cache.not_modified(url) if self.cache else None
+                if cached is not None:
+                    return cached
+                response = await self.fetch(url)
+            result = parse(url, response["body"])
+            if self.cache:
+                self.cache.store(url, response["headers"], result)
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+    async def collect_all(self, urls: List[str], parse: Callable[[str, bytes], Optional[Dict]]) -> List[Optional[Dict]]:
+        """Fetch every URL concurrently, returning results in the order of urls.
+
+        Sources still running at the deadline are cancelled and reported
+        as None.
+        """
+        results = [None] * len(urls)
+        if not urls:
+            return results
+
+        await self.open()
+        tasks = [asyncio.ensure_future(self.fetch_source(url, parse)) for url in urls]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        for task in pending:
+            print(f"Timed out fetching {urls[tasks.index(task)]}")
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for i, task in enumerate(tasks):
+            if task in done:
+                results[i] = task.result()
+        if self.cache:
+            self.cache.save()
+        return results
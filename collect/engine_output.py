@@ -0,0 +1,120 @@
+"""
+Engine Output - Streaming readers for the native engines' stdout
+
+The Rust/C++/Node tools print one record per line (or a few lines per
+search result). These helpers read a subprocess line by line and yield
+records as soon as they're complete, counting the lines they couldn't
+parse instead of dropping them silently.
+"""
+import json
+import re
+import subprocess
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+PROCESS_TIMEOUT = 30   # seconds before a streaming run is killed
+
+RESULT_RE = re.compile(r"^(\d+)\. \[([^\]]*)\] (.*)$")
+SCORE_RE = re.compile(r"^Score: ([\d.]+) \| Source: (.*)$")
+NO_RESULTS_PREFIX = "No results found"
+
+class ParseStats:
+    """Counts for one pass over engine output"""
+
+    def __init__(self):
+        self.records = 0
+        self.malformed = 0
+        self.samples: List[str] = []   # first few malformed lines, for logging
+
+    def bad_line(self, line: str):
+        self.malformed += 1
+        if len(self.samples) < 5:
+            self.samples.append(line[:200])
+
+    def __repr__(self):
+        return f"ParseStats(records={self.records}, malformed={self.malformed})"
+
+def stream_lines(cmd: List[str], cwd: Optional[str] = None,
+                 timeout: float = PROCESS_TIMEOUT) -> Iterator[str]:
+    """Yield a command's stdout lines as they're written.
+
+    The process is killed if it outlives timeout or the caller stops
+    iterating early. Raises FileNotFoundError if the command is missing.
+    """
+    proc = subprocess.Popen(
+        cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        text=True, bufsize=1
+    )
+    timer = threading.Timer(timeout, proc.kill)
+    timer.start()
+    try:
+        for line in proc.stdout:
+            yield line.rstrip("\n")
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+def iter_json_records(lines: Iterable[str], stats: Optional[ParseStats] = None) -> Iterator[Dict]:
+    """One JSON object per line; anything else non-blank counts as malformed"""
+    stats = stats if stats is not None else ParseStats()
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            stats.bad_line(line)
+            continue
+        if not isinstance(record, dict):
+            stats.bad_line(line)
+            continue
+        stats.records += 1
+        yield record
+
+def iter_search_results(lines: Iterable[str], stats: Optional[ParseStats] = None) -> Iterator[Dict]:
+    """Results from `search <query>` text output.
+
+    Each result is a "N. [category] title" line followed by indented
+    Score/Source, Link and description lines; it is yielded once the
+    next result (or the end of output) shows it is complete.
+    """
+    stats = stats if stats is not None else ParseStats()
+    current = None
+    for line in lines:
+        match = RESULT_RE.match(line)
+        if match:
+            if current is not None:
+                stats.records += 1
+                yield current
+            current = {
+                "rank": int(match.group(1)),
+                "category": match.group(2),
+                "title": match.group(3),
+                "score": 0.0,
+                "source": "",
+                "link": "",
+                "description": "",
+            }
+            continue
+
+        text = line.strip()
+        if not text or text.startswith(NO_RESULTS_PREFIX):
+            continue
+        if current is None or not line.startswith(" "):
+            stats.bad_line(line)
+            continue
+        score = SCORE_RE.match(text)
+        if score:
+            current["score"] = float(score.group(1))
+            current["source"] = score.group(2)
+        elif text.startswith("Link: "):
+            current["link"] = text[len("Link: "):]
+        else:
+            current["description"] = text
+
+    if current is not None:
+        stats.records += 1
+        yield current
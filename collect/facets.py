@@ -0,0 +1,55 @@
+"""
+Facet Index - Precomputed category/source/sentiment lookups for the UI
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Facet field -> value used when an article doesn't have it
+FACETS = {
+    "category": "General",
+    "source": "Unknown",
+    "sentiment": None,
+}
+
+class FacetIndex:
+    """Maps each facet value to the positions of its articles.
+
+    Built once per data version; combined filters become set
+    intersections instead of passes over every article.
+    """
+
+    def __init__(self, articles: Sequence[Dict]):
+        self.size = len(articles)
+        self.postings: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        for pos, article in enumerate(articles):
+            for facet, default in FACETS.items():
+                value = article.get(facet) or default
+                if value is not None:
+                    self.postings[facet].setdefault(value, []).append(pos)
+
+    def values(self, facet: str) -> List[Tuple[str, int]]:
+        """(value, article count) pairs, most common first"""
+        counts = [(value, len(positions)) for value, positions in self.postings[facet].items()]
+        return sorted(counts, key=lambda vc: (-vc[1], str(vc[0])))
+
+    def count(self, facet: str, value: str) -> int:
+        return len(self.postings[facet].get(value, ()))
+
+    def query(self, **filters: Optional[str]) -> Sequence[int]:
+        """Positions (in article order) matching every given facet value.
+
+        Filters set to None are ignored, e.g. query(category="Tech",
+        source=None). With no filter at all the result is a range, so
+        nothing is built per article.
+        """
+        active = [self.postings[facet].get(value, []) for facet, value in filters.items() if value is not None]
+        if not active:
+            return range(self.size)
+        active.sort(key=len)
+        if len(active) == 1:
+            return active[0]
+        matched = set(active[0])
+        for positions in active[1:]:
+            matched.intersection_update(positions)
+            if not matched:
+                return []
+        return sorted(matched)
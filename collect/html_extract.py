@@ -0,0 +1,217 @@
+"""
+HTML Extract - Single-pass headline extraction for the HTML scraper
+
+Selector rules are compiled once into small matchers and evaluated
+together in one walk over the document, instead of one soup.select()
+per rule. Pages are parsed with lxml when it is installed and with
+BeautifulSoup's html.parser otherwise.
+
+The supported selector subset covers what news front pages need: tag,
+.class and [attr], [attr=v], [attr*=v], [attr^=v], [attr$=v], [attr~=v]
+compounds joined by descendant (space) or child (>) combinators.
+"""
+import re
+from typing import Callable, Dict, Iterator, List, Optional
+from urllib.parse import urljoin, urlparse
+
+try:
+    import lxml.html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+DEFAULT_SELECTORS = [
+    "article h2", "article h3",
+    ".headline", ".news-title",
+    "a[href*='/news/']", "a[href*='/article/']"
+]
+MAX_PER_SELECTOR = 10   # matches kept per selector, in document order
+MAX_ITEMS = 20          # articles kept per page
+MIN_TITLE_LENGTH = 10   # shorter link texts are navigation, not headlines
+SKIP_TEXT_TAGS = {"script", "style", "template"}   # never part of a headline's text
+
+COMPOUND_RE = re.compile(r"([a-zA-Z][\w-]*|\*)?((?:\.[\w-]+|\[[^\]]+\])*)$")
+PART_RE = re.compile(r"\.([\w-]+)|\[\s*([\w-]+)\s*(?:([*^$~]?=)\s*(['\"]?)(.*?)\4)?\s*\]")
+TOKEN_RE = re.compile(r"\s*>\s*|\s+")
+
+ATTR_TESTS = {
+    None: lambda value, expected: True,
+    "=": lambda value, expected: value == expected,
+    "*=": lambda value, expected: expected in value,
+    "^=": lambda value, expected: value.startswith(expected),
+    "$=": lambda value, expected: value.endswith(expected),
+    "~=": lambda value, expected: expected in value.split(),
+}
+
+class Node:
+    """The few element operations the matchers need, for either parser"""
+
+    __slots__ = ("el", "lxml")
+
+    def __init__(self, el, is_lxml: bool):
+        self.el = el
+        self.lxml = is_lxml
+
+    @property
+    def tag(self) -> str:
+        return self.el.tag if self.lxml else self.el.name
+
+    def get(self, attr: str) -> Optional[str]:
+        value = self.el.get(attr)
+        # BeautifulSoup hands back multi-valued attributes (class) as lists
+        return " ".join(value) if isinstance(value, list) else value
+
+    def parent(self) -> Optional["Node"]:
+        parent = self.el.getparent() if self.lxml else self.el.parent
+        if parent is None or (not self.lxml and parent.name == "[document]"):
+            return None
+        return Node(parent, self.lxml)
+
+    def text(self) -> str:
+        # BeautifulSoup's .strings already leaves out script and style text
+        strings = _lxml_strings(self.el) if self.lxml else self.el.strings
+        return "".join(s.strip() for s in strings)
+
+def _lxml_strings(el) -> Iterator[str]:
+    """Text under an lxml element, minus SKIP_TEXT_TAGS contents and comments"""
+    if el.text and el.tag not in SKIP_TEXT_TAGS:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in SKIP_TEXT_TAGS:
+            yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+def _compile_compound(compound: str) -> Callable[[Node], bool]:
+    match = COMPOUND_RE.match(compound)
+    if not compound or not match:
+        raise ValueError(f"unsupported selector part: {compound!r}")
+    tag = match.group(1)
+    tag = None if tag in (None, "*") else tag.lower()
+    classes = []
+    attrs = []
+    for part in PART_RE.finditer(match.group(2)):
+        if part.group(1):
+            classes.append(part.group(1))
+        else:
+            attrs.append((part.group(2).lower(), ATTR_TESTS[part.group(3)], part.group(5) or ""))
+
+    def matches(node: Node) -> bool:
+        if tag is not None and node.tag != tag:
+            return False
+        if classes:
+            have = (node.get("class") or "").split()
+            if any(c not in have for c in classes):
+                return False
+        for name, test, expected in attrs:
+            value = node.get(name)
+            if value is None or not test(value, expected):
+                return False
+        return True
+
+    return matches
+
+def compile_selector(selector: str) -> Callable[[Node], bool]:
+    """Matcher for one selector; raises ValueError outside the supported subset"""
+    tokens = TOKEN_RE.split(selector.strip())
+    combinators = [c.strip() or " " for c in TOKEN_RE.findall(selector.strip())]
+    parts = [_compile_compound(t) for t in tokens]
+
+    def matches(node: Node, i: int = len(parts) - 1) -> bool:
+        if not parts[i](node):
+            return False
+        if i == 0:
+            return True
+        ancestor = node.parent()
+        if combinators[i - 1] == ">":
+            return ancestor is not None and matches(ancestor, i - 1)
+        while ancestor is not None:
+            if matches(ancestor, i - 1):
+                return True
+            ancestor = ancestor.parent()
+        return False
+
+    return lambda node: matches(node)
+
+class ExtractionRules:
+    """A source's compiled selectors and limits (see data/html_sources.json)"""
+
+    def __init__(self, selectors: Optional[List[str]] = None, max_per_selector: int = MAX_PER_SELECTOR,
+                 max_items: int = MAX_ITEMS, min_title_length: int = MIN_TITLE_LENGTH):
+        self.max_per_selector = max_per_selector
+        self.max_items = max_items
+        self.min_title_length = min_title_length
+        self.matchers: List[Callable[[Node], bool]] = []
+        for selector in selectors or DEFAULT_SELECTORS:
+            try:
+                self.matchers.append(compile_selector(selector))
+            except ValueError as e:
+                print(f"Skipping selector {selector!r}: {e}")
+
+    @classmethod
+    def for_source(cls, source: Dict) -> "ExtractionRules":
+        return cls(source.get("selectors"),
+                   source.get("max_per_selector", MAX_PER_SELECTOR),
+                   source.get("max_items", MAX_ITEMS),
+                   source.get("min_title_length", MIN_TITLE_LENGTH))
+
+def iter_elements(content: bytes) -> Iterator[Node]:
+    """Every element of the page in document order"""
+    if HAS_LXML:
+        try:
+            root = lxml.html.fromstring(content)
+        except (ValueError, lxml.etree.ParserError):
+            return
+        for el in root.iter():
+            if isinstance(el.tag, str):   # skip comments and processing instructions
+                yield Node(el, True)
+        return
+    from bs4 import BeautifulSoup
+    for el in BeautifulSoup(content, "html.parser").find_all(True):
+        yield Node(el, False)
+
+def _link(node: Node) -> str:
+    """The element's own href, else that of the nearest enclosing <a>"""
+    while node is not None:
+        if node.tag == "a":
+            return node.get("href") or ""
+        node = node.parent()
+    return ""
+
+def extract_articles(url: str, content: bytes, rules: Optional[ExtractionRules] = None) -> List[Dict]:
+    """Headline links from one pass over the page.
+
+    Each selector keeps its first max_per_selector matches; results are
+    ordered by selector, then document position, and deduplicated by
+    link (or title, for headlines without a link).
+    """
+    rules = rules or ExtractionRules()
+    buckets: List[List[Node]] = [[] for _ in rules.matchers]
+    open_buckets = len(buckets)
+    for node in iter_elements(content):
+        for bucket, matches in zip(buckets, rules.matchers):
+            if len(bucket) < rules.max_per_selector and matches(node):
+                bucket.append(node)
+                if len(bucket) == rules.max_per_selector:
+                    open_buckets -= 1
+        if not open_buckets:
+            break
+
+    source = urlparse(url).netloc or url
+    articles = []
+    seen = set()
+    for bucket in buckets:
+        for node in bucket:
+            title = node.text()
+            if len(title) <= rules.min_title_length:
+                continue
+            href = _link(node)
+            link = urljoin(url, href) if href else url
+            key = link if href else title
+            if key in seen:
+                continue
+            seen.add(key)
+            articles.append({"title": title, "link": link, "source": source})
+            if len(articles) >= rules.max_items:
+                return articles
+    return articles
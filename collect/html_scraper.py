@@ -1,18 +1,25 @@
 """
 HTML Page Scraper - Scrapes news from regular web pages
 """
+import asyncio
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import json
 import os
 
+from collect.html_extract import ExtractionRules, extract_articles
+from collect.http_cache import ValidatorCache
+from collect.simhash import reject_near_duplicates
+
 HTML_SOURCES_FILE = "data/html_sources.json"
 
 class HTMLScraper:
     def __init__(self):
         self.sources = self.load_sources()
+        self.cache = ValidatorCache()
+        self._rules: Dict[str, Tuple[Dict, ExtractionRules]] = {}   # url -> (source, rules)
+        self.fetch_status: Dict[str, Dict] = {}   # url -> status/Retry-After of the last fetch
     
     def load_sources(self) -> List[Dict]:
         """Load configured HTML sources"""
@@ -37,62 +44,89 @@ class HTMLScraper:
     
     def fetch_page(self, url: str) -> Optional[Dict]:
         """Fetch and parse an HTML page for news"""
+        self.fetch_status.pop(url, None)
         try:
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
             }
-            response = requests.get(url, headers=headers, timeout=10)
+            response = requests.get(url, headers={**headers, **self.cache.request_headers(url)},
+                                    timeout=10)
+            if response.status_code == 304:
+                cached = self.cache.not_modified(url)
+                if cached is not None:
+                    self._record_status(url, response)
+                    return cached
+                response = requests.get(url, headers=headers, timeout=10)
+            self._record_status(url, response)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Try to find article titles (generic approach)
-            articles = []
-            
-            # Look for common news article selectors
-            selectors = [
-                "article h2", "article h3", 
-                ".headline", ".news-title",
-                "a[href*='/news/']", "a[href*='/article/']"
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                for el in elements[:10]:
-                    title = el.get_text(strip=True)
-                    link = ""
-                    if el.name == "a":
-                        link = el.get("href", "")
-                    else:
-                        parent = el.find_parent("a")
-                        if parent:
-                            link = parent.get("href", "")
-                    
-                    if title and len(title) > 10:
-                        articles.append({
-                            "title": title,
-                            "link": link if link.startswith("http") else url + link,
-                            "source": url.split("//")[1].split("/")[0] if "//" in url else url
-                        })
-            
-            return {
-                "url": url,
-                "articles": articles[:20]
-            }
+            result = self.parse_page(url, response.content)
+            self.cache.store(url, response.headers, result)
+            return result
         except Exception as e:
             print(f"Error fetching {url}: {e}")
+            self.fetch_status.setdefault(url, {"status": None, "retry_after": None})
             return None
     
+    def _record_status(self, url: str, response):
+        self.fetch_status[url] = {
+            "status": response.status_code,
+            "retry_after": response.headers.get("Retry-After")
+        }
+    
+    def rules_for(self, url: str) -> ExtractionRules:
+        """Compiled extraction rules of the source at url.
+        
+        A source entry may set "selectors", "max_per_selector",
+        "max_items" and "min_title_length"; missing keys use the defaults.
+        """
+        source = next((s for s in self.sources if s["url"] == url), {})
+        cached = self._rules.get(url)
+        # Recompile when the source entry has been edited
+        if cached is None or cached[0] != source:
+            cached = self._rules[url] = (dict(source), ExtractionRules.for_source(source))
+        return cached[1]
+    
+    def parse_page(self, url: str, content: bytes) -> Dict:
+        """Extract article links from downloaded page content"""
+        return {
+            "url": url,
+            "articles": extract_articles(url, content, self.rules_for(url))
+        }
+    
     def collect_all(self) -> List[Dict]:
         """Collect news from all enabled HTML sources"""
+        enabled = [s for s in self.sources if s.get("enabled", True)]
+        results = [self.fetch_page(source["url"]) for source in enabled]
+        self.cache.save()
+        return self._merge_results(enabled, results)
+    
+    async def collect_all_async(self, engine=None) -> List[Dict]:
+        """Collect news from all enabled HTML sources on the asyncio engine"""
+        from collect.engine import CollectionEngine
+        
+        enabled = [s for s in self.sources if s.get("enabled", True)]
+        urls = [s["url"] for s in enabled]
+        if engine is None:
+            async with CollectionEngine(cache=self.cache) as engine:
+                results = await engine.collect_all(urls, self.parse_page)
+        else:
+            results = await engine.collect_all(urls, self.parse_page)
+        return self._merge_results(enabled, results)
+    
+    def _merge_results(self, sources: List[Dict], results: List[Optional[Dict]]) -> List[Dict]:
+        """Tag articles with their source name, flatten the results and drop near-duplicates"""
         all_news = []
-        for source in self.sources:
-            if source.get("enabled", True):
-                result = self.fetch_page(source["url"])
-                if result and result.get("articles"):
-                    for article in result["articles"]:
-                        article["source"] = source["name"]
-                        all_news.append(article)
+        for source, result in zip(sources, results):
+            if result and result.get("articles"):
+                for article in result["articles"]:
+                    article["source"] = source["name"]
+                    all_news.append(article)
+        
+        # Not stored here, so check against the store without adding to its index
+        all_news, rejected = reject_near_duplicates(all_news, commit=False)
+        if rejected:
+            print(f"Skipped {len(rejected)} near-duplicate articles")
         return all_news
     
     def add_source(self, name: str, url: str):
@@ -108,5 +142,5 @@ class HTMLScraper:
 
 if __name__ == "__main__":
     scraper = HTMLScraper()
-    news = scraper.collect_all()
+    news = asyncio.run(scraper.collect_all_async())
     print(f"Collected {len(news)} articles from HTML sources")
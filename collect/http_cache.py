@@ -0,0 +1,97 @@
+"""
+HTTP Validator Cache - Conditional GET support for the collectors
+"""
+import copy
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+HTTP_CACHE_FILE = "data/http_cache.json"
+
+class ValidatorCache:
+    """Per-URL ETag/Last-Modified store with the last parsed result.
+
+    A 304 response reuses the cached result, so unchanged sources are
+    neither downloaded nor re-parsed.
+    """
+
+    def __init__(self, path: str = HTTP_CACHE_FILE):
+        self.path = path
+        self.entries = self.load()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict]:
+        """Load cached validators from disk"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def save(self):
+        """Write changed entries, keeping entries saved by other collectors"""
+        with self._lock:
+            if not self._dirty:
+                return
+            on_disk = self.load()
+            for url in self._dirty:
+                if url in self.entries:
+                    on_disk[url] = self.entries[url]
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(on_disk, f)
+            os.replace(tmp, self.path)
+            self._dirty.clear()
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """Conditional headers for a cached URL"""
+        entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def not_modified(self, url: str) -> Optional[Dict]:
+        """Record a 304 and return the cached result for url"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None or entry.get("result") is None:
+                return None
+            self.hits += 1
+            return copy.deepcopy(entry["result"])
+
+    def store(self, url: str, response_headers, result: Optional[Dict]):
+        """Remember validators and parsed result of a full response"""
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        with self._lock:
+            self.misses += 1
+            if result is None or not (etag or last_modified):
+                if self.entries.pop(url, None) is not None:
+                    self._dirty.add(url)
+                return
+            self.entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "result": copy.deepcopy(result)
+            }
+            self._dirty.add(url)
+
+    def stats(self) -> Dict:
+        """Hit/miss counts for this session"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 2) if total else 0.0
+        }
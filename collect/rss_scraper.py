@@ -1,19 +1,44 @@
 """
 RSS Feed Scraper - Collects news from RSS sources
 """
+import asyncio
 import feedparser
 import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Set
+from urllib.parse import urlparse
 import json
 import os
 
+from collect.feed_stream import (FEED_CHUNK_SIZE, FEED_ITEM_LIMIT, FeedStreamError,
+                                 iter_chunks, parse_feed_stream, summary_text)
+from collect.http_cache import ValidatorCache
+from collect.simhash import merge_and_index, reject_near_duplicates
+from collect.storage import NewsCache, article_key
+
 RSS_SOURCES_FILE = "data/sources.json"
 NEWS_DATA_FILE = "data/news.json"
 
+# Concurrent collection defaults
+FETCH_TIMEOUT = 10       # seconds per request
+MAX_WORKERS = 8          # feeds fetched in parallel
+PER_HOST_LIMIT = 2       # parallel requests against one host
+COLLECT_DEADLINE = 60    # seconds for a whole collect_all pass
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
 class RSSScraper:
     def __init__(self):
         self.sources = self.load_sources()
+        self.cache = ValidatorCache()
+        self._host_locks = {}
+        self._host_locks_guard = threading.Lock()
+        self.news_cache = NewsCache()
+        self.fetch_status: Dict[str, Dict] = {}   # url -> status/Retry-After of the last fetch
     
     def load_sources(self) -> List[Dict]:
         """Load configured RSS sources"""
@@ -68,43 +93,176 @@ class RSSScraper:
             json.dump(sources, f, indent=2)
         self.sources = sources
     
-    def fetch_feed(self, url: str) -> Optional[Dict]:
+    def fetch_feed(self, url: str, timeout: float = FETCH_TIMEOUT) -> Optional[Dict]:
         """Fetch and parse an RSS feed"""
+        self.fetch_status.pop(url, None)
         try:
-            feed = feedparser.parse(url)
-            return {
-                "title": feed.feed.get("title", "Unknown"),
-                "entries": [
-                    {
-                        "title": entry.get("title", "No Title"),
-                        "link": entry.get("link", ""),
-                        "published": entry.get("published", ""),
-                        "summary": entry.get("summary", "")[:200],
-                        "source": feed.feed.get("title", "Unknown")
-                    }
-                    for entry in feed.entries[:20]
-                ]
-            }
+            # Download ourselves so a hung server is bounded by the timeout
+            response = requests.get(url, headers={**HEADERS, **self.cache.request_headers(url)},
+                                    timeout=timeout, stream=True)
+            if response.status_code == 304:
+                response.close()
+                cached = self.cache.not_modified(url)
+                if cached is not None:
+                    self._record_status(url, response)
+                    return cached
+                response = requests.get(url, headers=HEADERS, timeout=timeout, stream=True)
+            self._record_status(url, response)
+            # Parse while downloading; closing early skips the rest of the body
+            with response:
+                response.raise_for_status()
+                result = self._parse_chunks(url, response.iter_content(FEED_CHUNK_SIZE))
+            self.cache.store(url, response.headers, result)
+            return result
         except Exception as e:
             print(f"Error fetching {url}: {e}")
+            self.fetch_status.setdefault(url, {"status": None, "retry_after": None})
             return None
     
-    def collect_all(self) -> List[Dict]:
+    def _record_status(self, url: str, response):
+        self.fetch_status[url] = {
+            "status": response.status_code,
+            "retry_after": response.headers.get("Retry-After")
+        }
+    
+    def source_for(self, url: str) -> Dict:
+        """Configured source entry for a feed URL (empty if unknown)"""
+        return next((s for s in self.sources if s["url"] == url), {})
+    
+    def seen_keys(self) -> Set[str]:
+        """Article keys already in the store, rebuilt when it changes"""
+        _, keys = self.news_cache.get_derived("keys", lambda news: {article_key(a) for a in news})
+        return keys
+    
+    def parse_feed(self, url: str, content: bytes) -> Dict:
+        """Parse downloaded feed content into our entry format"""
+        return self._parse_chunks(url, iter_chunks(content))
+    
+    def _parse_chunks(self, url: str, chunks: Iterator[bytes]) -> Dict:
+        """Stream entries out of the feed, falling back to feedparser.
+        
+        Sources may set "max_items" (default FEED_ITEM_LIMIT) and
+        "stop_at_seen": false for feeds that aren't listed newest first.
+        """
+        source = self.source_for(url)
+        limit = source.get("max_items", FEED_ITEM_LIMIT)
+        seen = self.seen_keys() if source.get("stop_at_seen", True) else None
+        
+        consumed = []
+        def tee():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+        try:
+            return parse_feed_stream(tee(), limit, seen)
+        except FeedStreamError:
+            # Not plain RSS/Atom: feedparser copes with broken markup and encodings
+            content = b"".join(consumed) + b"".join(chunks)
+            return self._parse_with_feedparser(url, content, limit)
+    
+    def _parse_with_feedparser(self, url: str, content: bytes, limit: int = FEED_ITEM_LIMIT) -> Dict:
+        feed = feedparser.parse(content, response_headers={"content-location": url})
+        return {
+            "title": feed.feed.get("title", "Unknown"),
+            "entries": [
+                {
+                    "title": entry.get("title", "No Title"),
+                    "link": entry.get("link", ""),
+                    "guid": entry.get("id", ""),
+                    "published": entry.get("published", ""),
+                    "summary": summary_text(entry.get("summary", ""))[:200],
+                    "source": feed.feed.get("title", "Unknown")
+                }
+                for entry in feed.entries[:limit]
+            ],
+            "ttl": int(feed.feed["ttl"]) if str(feed.feed.get("ttl", "")).isdigit() else None
+        }
+    
+    def _host_limit(self, url: str, per_host: int) -> threading.Semaphore:
+        """Get the semaphore capping parallel requests to the url's host.
+
+        Semaphores are kept per (host, per_host), so a call with a
+        different limit gets one of its own size.
+        """
+        key = (urlparse(url).netloc.lower(), per_host)
+        with self._host_locks_guard:
+            if key not in self._host_locks:
+                self._host_locks[key] = threading.Semaphore(per_host)
+            return self._host_locks[key]
+    
+    def _fetch_limited(self, url: str, per_host: int) -> Optional[Dict]:
+        """Fetch a feed while holding its host's slot"""
+        with self._host_limit(url, per_host):
+            return self.fetch_feed(url)
+    
+    def fetch_concurrent(self, urls: List[str], max_workers: int = MAX_WORKERS,
+                         per_host: int = PER_HOST_LIMIT,
+                         deadline: float = COLLECT_DEADLINE) -> List[Optional[Dict]]:
+        """Fetch feeds in parallel, returning results in the order of urls.
+        
+        Feeds still running when the deadline expires are reported as None
+        and left to finish in the background.
+        """
+        results = [None] * len(urls)
+        if not urls:
+            return results
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls))))
+        futures = {executor.submit(self._fetch_limited, url, per_host): i for i, url in enumerate(urls)}
+        done, pending = wait(futures, timeout=deadline)
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                print(f"Error fetching {urls[futures[future]]}: {e}")
+        for future in pending:
+            print(f"Timed out fetching {urls[futures[future]]}")
+        # Don't block on hung feeds; queued ones are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+        return results
+    
+    def collect_all(self, concurrent: bool = True, max_workers: int = MAX_WORKERS,
+                    per_host: int = PER_HOST_LIMIT,
+                    deadline: float = COLLECT_DEADLINE) -> List[Dict]:
         """Collect news from all enabled sources"""
+        urls = [s["url"] for s in self.sources if s.get("enabled", True)]
+        if concurrent and max_workers > 1:
+            results = self.fetch_concurrent(urls, max_workers, per_host, deadline)
+        else:
+            results = [self.fetch_feed(url) for url in urls]
+        
+        self.cache.save()
+        return self._merge_results(results)
+    
+    async def collect_all_async(self, engine=None) -> List[Dict]:
+        """Collect news from all enabled sources on the asyncio engine"""
+        from collect.engine import CollectionEngine
+        
+        urls = [s["url"] for s in self.sources if s.get("enabled", True)]
+        if engine is None:
+            async with CollectionEngine(cache=self.cache) as engine:
+                results = await engine.collect_all(urls, self.parse_feed)
+        else:
+            results = await engine.collect_all(urls, self.parse_feed)
+        return self._merge_results(results)
+    
+    def _merge_results(self, results: List[Optional[Dict]]) -> List[Dict]:
+        """Merge per-feed results, sort them and add them to the store"""
         all_news = []
-        for source in self.sources:
-            if source.get("enabled", True):
-                result = self.fetch_feed(source["url"])
-                if result and result.get("entries"):
-                    all_news.extend(result["entries"])
+        for result in results:
+            if result and result.get("entries"):
+                all_news.extend(result["entries"])
         
         # Sort by published date (newest first)
         all_news.sort(key=lambda x: x.get("published", ""), reverse=True)
         
-        # Save to file
-        os.makedirs("data", exist_ok=True)
-        with open(NEWS_DATA_FILE, "w") as f:
-            json.dump(all_news, f, indent=2)
+        # Keep the newest copy of syndicated stories out of the store
+        all_news, rejected = reject_near_duplicates(all_news, commit=False)
+        if rejected:
+            print(f"Skipped {len(rejected)} near-duplicate articles")
+        
+        # Only new or changed articles are written
+        merge_and_index(all_news)
         
         return all_news
     
@@ -150,5 +308,5 @@ class RSSScraper:
 
 if __name__ == "__main__":
     scraper = RSSScraper()
-    news = scraper.collect_all()
+    news = asyncio.run(scraper.collect_all_async())
     print(f"Collected {len(news)} articles")
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Poll Scheduler - Adaptive per-source polling for the collectors
+
+Rather than fetching every source on every pass, each enabled RSS and
+HTML source gets its own next-poll time. The interval follows the rate
+at which the source has actually been publishing (an exponentially
+weighted average of new articles per second), so busy feeds are polled
+every few minutes and quiet ones every few hours. A feed's <ttl>, a
+Retry-After header and repeated failures all push the next poll back.
+
+Sources wait in a heap ordered by due time; the learned state is kept in
+data/schedule.json so a restart doesn't start learning from scratch.
+
+Run from the repository root:
+    python -m collect.scheduler [--once]
+"""
+import argparse
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+from collect.html_scraper import HTML_SOURCES_FILE, HTMLScraper
+from collect.rss_scraper import MAX_WORKERS, PER_HOST_LIMIT, RSS_SOURCES_FILE, RSSScraper
+from collect.storage import DATA_DIR, article_key, article_time, get_storage
+
+SCHEDULE_FILE = os.path.join(DATA_DIR, "schedule.json")
+
+MIN_INTERVAL = 5 * 60          # seconds; never poll a source more often
+MAX_INTERVAL = 6 * 3600        # seconds; never leave a source longer
+DEFAULT_INTERVAL = 30 * 60     # until a source's cadence is known
+TARGET_NEW_ITEMS = 2           # aim for about this many new articles per poll
+RATE_SMOOTHING = 0.3           # weight of the latest poll in the rate average
+IDLE_BACKOFF = 1.5             # interval growth while nothing has ever been new
+FAILURE_BACKOFF = 2            # delay multiplier per consecutive failure
+SOURCE_CHECK_INTERVAL = 60     # seconds between checks for edited source lists
+
+def retry_after_seconds(value: Optional[str], now: float) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, when.timestamp() - now)
+
+def publish_rate(articles: List[Dict]) -> Optional[float]:
+    """Articles per second implied by the spread of their publish times"""
+    times = sorted(t.timestamp() for t in map(article_time, articles) if t is not None)
+    if len(times) < 2 or times[-1] <= times[0]:
+        return None
+    return (len(times) - 1) / (times[-1] - times[0])
+
+def next_interval(state: Dict, new_items: int, elapsed: Optional[float],
+                  articles: List[Dict]) -> float:
+    """Update state's publish rate from one successful poll and return the next interval.
+
+    The first poll has no previous one to measure against, so the rate
+    is seeded from the publish times of the articles it returned.
+    """
+    if elapsed is None:
+        observed = publish_rate(articles)
+    else:
+        observed = new_items / max(elapsed, 1.0)
+    rate = state.get("rate")
+    if observed is not None:
+        rate = observed if rate is None else RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * rate
+    state["rate"] = rate
+
+    if rate:
+        interval = TARGET_NEW_ITEMS / rate
+    else:
+        interval = state.get("interval", DEFAULT_INTERVAL) * (IDLE_BACKOFF if elapsed is not None else 1)
+    interval = min(MAX_INTERVAL, max(MIN_INTERVAL, interval))
+    # The publisher's own caching hint wins over anything shorter
+    if state.get("ttl"):
+        interval = max(interval, state["ttl"] * 60)
+    return interval
+
+class PollScheduler:
+    """Enabled sources in a heap keyed by when they are next due"""
+
+    def __init__(self, rss: Optional[RSSScraper] = None, html: Optional[HTMLScraper] = None,
+                 path: str = SCHEDULE_FILE, max_workers: int = MAX_WORKERS):
+        self.rss = rss or RSSScraper()
+        self.html = html or HTMLScraper()
+        self.storage = get_storage()
+        self.path = path
+        self.max_workers = max_workers
+        self.state: Dict[str, Dict] = self.load()   # "kind:url" -> learned schedule
+        self.active: Dict[str, Tuple[str, Dict]] = {}
+        self.queue: List[Tuple[float, str]] = []
+        self._sources_version = None
+        self.sync_sources()
+
+    def load(self) -> Dict[str, Dict]:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading schedule: {e}")
+        return {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+    def _file_version(self) -> Tuple:
+        return tuple(os.path.getmtime(p) if os.path.exists(p) else None
+                     for p in (RSS_SOURCES_FILE, HTML_SOURCES_FILE))
+
+    def sync_sources(self, force: bool = False):
+        """Rebuild the queue when a source list has been edited.
+
+        New sources are due at once; learned state of disabled or removed
+        sources is kept in case they come back.
+        """
+        version = self._file_version()
+        if version == self._sources_version and not force:
+            return
+        self._sources_version = version
+        self.rss.sources = self.rss.load_sources()
+        self.html.sources = self.html.load_sources()
+
+        now = time.time()
+        self.active = {}
+        for kind, scraper in (("rss", self.rss), ("html", self.html)):
+            for source in scraper.sources:
+                if source.get("enabled", True):
+                    self.active[f"{kind}:{source['url']}"] = (kind, source)
+        self.queue = []
+        for key in self.active:
+            state = self.state.setdefault(key, {"interval": DEFAULT_INTERVAL, "next_poll": now})
+            self.queue.append((state["next_poll"], key))
+        heapq.heapify(self.queue)
+
+    def next_due(self) -> Optional[float]:
+        return self.queue[0][0] if self.queue else None
+
+    def pop_due(self, now: float) -> List[str]:
+        """Keys of every source due by now, earliest first"""
+        keys = []
+        while self.queue and self.queue[0][0] <= now:
+            due, key = heapq.heappop(self.queue)
+            # Skip entries left behind by a reschedule or a removed source
+            if key in self.active and self.state[key]["next_poll"] == due:
+                keys.append(key)
+        return keys
+
+    def poll(self, keys: List[str], now: Optional[float] = None) -> Dict:
+        """Fetch the given sources, store their articles and reschedule them"""
+        now = now if now is not None else time.time()
+        seen = self.rss.seen_keys()
+        rss_keys = [k for k in keys if self.active[k][0] == "rss"]
+        html_keys = [k for k in keys if self.active[k][0] == "html"]
+        outcomes: Dict[str, Tuple[Optional[Dict], List[Dict], Dict]] = {}
+
+        if rss_keys:
+            urls = [self.active[k][1]["url"] for k in rss_keys]
+            results = self.rss.fetch_concurrent(urls, self.max_workers, PER_HOST_LIMIT)
+            for key, url, result in zip(rss_keys, urls, results):
+                outcomes[key] = (result, (result or {}).get("entries", []), self.rss.fetch_status.get(url, {}))
+            self.rss._merge_results(results)
+            self.rss.cache.save()
+
+        if html_keys:
+            sources = [self.active[k][1] for k in html_keys]
+            results = [self.html.fetch_page(s["url"]) for s in sources]
+            for key, source, result in zip(html_keys, sources, results):
+                outcomes[key] = (result, (result or {}).get("articles", []), self.html.fetch_status.get(source["url"], {}))
+            articles = self.html._merge_results(sources, results)
+            if articles:
+                self.storage.merge_news(articles)
+            self.html.cache.save()
+
+        new_total = 0
+        for key, (result, articles, status) in outcomes.items():
+            new_items = sum(1 for a in articles if article_key(a) not in seen)
+            new_total += new_items
+            self.reschedule(key, result, articles, new_items, status, now)
+        self.save()
+        return {"polled": len(keys), "new": new_total}
+
+    def reschedule(self, key: str, result: Optional[Dict], articles: List[Dict],
+                   new_items: int, status: Dict, now: float):
+        state = self.state[key]
+        if result is None:
+            state["failures"] = state.get("failures", 0) + 1
+            delay = min(MAX_INTERVAL, state["interval"] * FAILURE_BACKOFF ** state["failures"])
+        else:
+            state["failures"] = 0
+            state["ttl"] = result.get("ttl")
+            last_poll = state.get("last_poll")
+            elapsed = now - last_poll if last_poll else None
+            state["interval"] = next_interval(state, new_items, elapsed, articles)
+            state["last_poll"] = now
+            state["last_new"] = new_items
+            delay = state["interval"]
+
+        retry_after = retry_after_seconds(status.get("retry_after"), now)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        state["next_poll"] = now + delay
+        if key in self.active:
+            heapq.heappush(self.queue, (state["next_poll"], key))
+
+    def run(self, stop: Optional[threading.Event] = None, once: bool = False):
+        """Poll sources as they fall due until stop is set (or, with once, one round)"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.sync_sources()
+            now = time.time()
+            keys = self.pop_due(now)
+            if keys:
+                stats = self.poll(keys, now)
+                print(f"Polled {stats['polled']} sources, {stats['new']} new articles")
+            if once:
+                return
+            due = self.next_due()
+            wait = SOURCE_CHECK_INTERVAL if due is None else due - time.time()
+            stop.wait(max(0.0, min(wait, SOURCE_CHECK_INTERVAL)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll news sources on learned schedules")
+    parser.add_argument("--once", action="store_true", help="poll the sources due now and exit")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="feeds fetched in parallel")
+    args = parser.parse_args()
+
+    scheduler = PollScheduler(max_workers=args.workers)
+    try:
+        scheduler.run(once=args.once)
+    except KeyboardInterrupt:
+        scheduler.save()
+
+if __name__ == '__main__':
+    main()
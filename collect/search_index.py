@@ -0,0 +1,317 @@
+"""
+Search Index - In-process inverted index with BM25 ranking
+
+Used by the Search tab when the Rust engine isn't built. Postings are
+kept in compact arrays and the index is updated incrementally: only
+articles it hasn't seen yet, or whose title or summary has changed,
+get tokenized.
+"""
+import bisect
+import hashlib
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from collect.storage import DATA_DIR, article_key
+
+SEARCH_INDEX_FILE = os.path.join(DATA_DIR, "search_index.pkl")
+INDEX_VERSION = 2
+
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2       # a title occurrence counts this many times
+FIELD_GAP = 2          # position gap so phrases can't span title/summary
+MAX_PREFIX_TERMS = 50  # expansions per prefix term
+REBUILD_RATIO = 0.25   # compact once this share of documents is deleted
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+QUERY_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+def content_digest(title: str, summary: str) -> bytes:
+    """Fingerprint of the indexed text, to spot updated articles"""
+    return hashlib.blake2b(f"{title}\0{summary}".encode("utf-8"), digest_size=8).digest()
+
+class Postings:
+    """Documents containing one term, with the positions in each"""
+
+    __slots__ = ("docs", "tfs", "offsets", "positions")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.tfs = array("H")        # title-weighted term frequency
+        self.offsets = array("I")    # start of each doc's run in positions
+        self.positions = array("H")
+
+    def add(self, doc: int, positions, tf: int):
+        self.docs.append(doc)
+        self.tfs.append(min(tf, 65535))
+        self.offsets.append(len(self.positions))
+        self.positions.extend(positions)
+
+    def positions_at(self, i: int) -> array:
+        end = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(self.positions)
+        return self.positions[self.offsets[i]:end]
+
+class SearchIndex:
+    """Positional inverted index over article title + summary"""
+
+    def __init__(self):
+        self.keys: List[Optional[str]] = []    # doc id -> article key (None once deleted)
+        self.doc_ids: Dict[str, int] = {}
+        self.digests: Dict[str, bytes] = {}    # article key -> content_digest of its indexed text
+        self.lengths = array("I")               # weighted token count per doc
+        self.total_length = 0
+        self.live = 0
+        self.postings: Dict[str, Postings] = {}
+        self._vocab: Optional[List[str]] = None   # sorted terms, for prefix lookups
+        self._lock = threading.Lock()
+
+    # === Building ===
+    def add(self, key: str, title: str, summary: str = ""):
+        """Index one article, replacing an older version with the same key"""
+        if key in self.doc_ids:
+            self.remove(key)
+        title_tokens = tokenize(title)[:1000]
+        summary_tokens = tokenize(summary)[:5000]
+        doc = len(self.keys)
+        self.keys.append(key)
+        self.doc_ids[key] = doc
+        self.digests[key] = content_digest(title, summary)
+
+        positions: Dict[str, List[int]] = {}
+        for pos, token in enumerate(title_tokens):
+            positions.setdefault(token, []).append(pos)
+        start = len(title_tokens) + FIELD_GAP
+        for pos, token in enumerate(summary_tokens, start):
+            positions.setdefault(token, []).append(pos)
+        title_length = len(title_tokens)
+        for token, token_positions in positions.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = Postings()
+                self._vocab = None
+            tf = sum(TITLE_WEIGHT if pos < title_length else 1 for pos in token_positions)
+            postings.add(doc, token_positions, tf)
+
+        length = TITLE_WEIGHT * len(title_tokens) + len(summary_tokens)
+        self.lengths.append(length)
+        self.total_length += length
+        self.live += 1
+
+    def remove(self, key: str):
+        """Drop an article from results (postings are purged on rebuild)"""
+        doc = self.doc_ids.pop(key, None)
+        self.digests.pop(key, None)
+        if doc is None:
+            return
+        self.keys[doc] = None
+        self.total_length -= self.lengths[doc]
+        self.live -= 1
+
+    def sync(self, articles: Iterable[Dict]) -> bool:
+        """Index new or edited articles and drop ones no longer in the store.
+
+        Returns True if the index changed.
+        """
+        with self._lock:
+            seen = set()
+            changed = False
+            for article in articles:
+                key = article_key(article)
+                seen.add(key)
+                title = article.get("title", "")
+                summary = article.get("summary") or article.get("description", "")
+                if self.digests.get(key) != content_digest(title, summary):
+                    self.add(key, title, summary)
+                    changed = True
+            for key in [k for k in self.doc_ids if k not in seen]:
+                self.remove(key)
+                changed = True
+            if self.keys and (len(self.keys) - self.live) / len(self.keys) > REBUILD_RATIO:
+                self._compact()
+            return changed
+
+    def _compact(self):
+        """Renumber live documents and purge deleted ones from the postings"""
+        remap = {}
+        for doc, key in enumerate(self.keys):
+            if key is not None:
+                remap[doc] = len(remap)
+        new_postings = {}
+        for term, postings in self.postings.items():
+            fresh = Postings()
+            for i, doc in enumerate(postings.docs):
+                if doc in remap:
+                    fresh.add(remap[doc], postings.positions_at(i), postings.tfs[i])
+            if fresh.docs:
+                new_postings[term] = fresh
+        self.postings = new_postings
+        self.keys = [k for k in self.keys if k is not None]
+        self.doc_ids = {key: doc for doc, key in enumerate(self.keys)}
+        self.lengths = array("I", (self.lengths[d] for d in sorted(remap)))
+        self._vocab = None
+
+    # === Querying ===
+    def _expand(self, prefix: str) -> List[str]:
+        """Indexed terms starting with prefix"""
+        if self._vocab is None:
+            self._vocab = sorted(self.postings)
+        start = bisect.bisect_left(self._vocab, prefix)
+        terms = []
+        for term in self._vocab[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _term_scores(self, terms: List[str], scores: Dict[int, float]):
+        """Add the BM25 contribution of terms to scores"""
+        n = max(self.live, 1)
+        avg_length = self.total_length / n if self.total_length else 1.0
+        keys, lengths = self.keys, self.lengths
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            # Deleted documents stay in the postings until _compact
+            if self.live == len(keys):
+                df = len(postings.docs)
+            else:
+                df = sum(1 for doc in postings.docs if keys[doc] is not None)
+                if not df:
+                    continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc, tf in zip(postings.docs, postings.tfs):
+                if keys[doc] is None:
+                    continue
+                norm = K1 * (1 - B + B * lengths[doc] / avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+    def _has_phrase(self, doc: int, phrase: List[str]) -> bool:
+        """Whether doc contains the tokens of phrase consecutively"""
+        starts = None
+        for offset, term in enumerate(phrase):
+            postings = self.postings.get(term)
+            if postings is None:
+                return False
+            i = bisect.bisect_left(postings.docs, doc)
+            if i == len(postings.docs) or postings.docs[i] != doc:
+                return False
+            at = {p - offset for p in postings.positions_at(i)}
+            starts = at if starts is None else starts & at
+            if not starts:
+                return False
+        return True
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k (article key, score) pairs.
+
+        Bare words are OR-ed and ranked with BM25; `word*` matches any
+        term with that prefix; "quoted phrases" must appear verbatim.
+        """
+        return self._search(query, k, count=False)[0]
+
+    def search_with_total(self, query: str, k: int = 10) -> Tuple[List[Tuple[str, float]], int]:
+        """(top-k pairs as search() returns them, number of matching articles)"""
+        return self._search(query, k, count=True)
+
+    def _search(self, query: str, k: int, count: bool) -> Tuple[List[Tuple[str, float]], int]:
+        with self._lock:
+            terms, phrases = [], []
+            for phrase, word in QUERY_RE.findall(query):
+                if phrase:
+                    tokens = tokenize(phrase)
+                    if tokens:
+                        phrases.append(tokens)
+                        terms.extend(tokens)
+                    continue
+                for token in tokenize(word):
+                    if word.endswith("*"):
+                        terms.extend(self._expand(token))
+                    else:
+                        terms.append(token)
+
+            scores: Dict[int, float] = {}
+            self._term_scores(terms, scores)
+            if not phrases:
+                top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+                total = len(scores)
+            else:
+                # Check phrases best-first and stop once k documents pass,
+                # unless every match has to be counted
+                top = []
+                total = 0
+                for doc, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+                    if all(self._has_phrase(doc, phrase) for phrase in phrases):
+                        total += 1
+                        if len(top) < k:
+                            top.append((doc, score))
+                        elif not count:
+                            break
+            return [(self.keys[doc], round(score, 3)) for doc, score in top], total
+
+    # === Persistence ===
+    def save(self, path: str = SEARCH_INDEX_FILE):
+        with self._lock:
+            state = {
+                "version": INDEX_VERSION,
+                "keys": self.keys,
+                "digests": self.digests,
+                "lengths": self.lengths,
+                "total_length": self.total_length,
+                "live": self.live,
+                "postings": {t: (p.docs, p.tfs, p.offsets, p.positions) for t, p in self.postings.items()},
+            }
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = SEARCH_INDEX_FILE) -> "SearchIndex":
+        """Load a saved index, or start an empty one"""
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return index
+        if state.get("version") != INDEX_VERSION:
+            return index
+        try:
+            return cls._from_state(state)
+        except (KeyError, TypeError, ValueError):
+            return index  # right version, damaged contents
+
+    @classmethod
+    def _from_state(cls, state: Dict) -> "SearchIndex":
+        index = cls()
+        index.keys = state["keys"]
+        index.doc_ids = {key: doc for doc, key in enumerate(index.keys) if key is not None}
+        index.digests = state["digests"]
+        index.lengths = state["lengths"]
+        index.total_length = state["total_length"]
+        index.live = state["live"]
+        for term, (docs, tfs, offsets, positions) in state["postings"].items():
+            postings = Postings()
+            postings.docs, postings.tfs = docs, tfs
+            postings.offsets, postings.positions = offsets, positions
+            index.postings[term] = postings
+        return index
+
+def build_search_index(news: List[Dict], path: str = SEARCH_INDEX_FILE) -> SearchIndex:
+    """Load the saved index, catch it up with news and save it if it changed"""
+    index = SearchIndex.load(path)
+    if index.sync(news):
+        index.save(path)
+    return index
@@ -0,0 +1,402 @@
+"""
+Segmented Storage - Append-only JSON-Lines article log
+
+Articles live in numbered segment files under data/segments/, listed in
+order by a small manifest. New records only ever get appended to the
+newest (active) segment; older segments are sealed and compacted in the
+background once enough of their records are superseded or expired.
+
+Writers in other processes are kept out by a lock file (where fcntl is
+available), and the manifest is re-read under it before every change.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+from collect.storage import DATA_DIR, RETENTION_DAYS, NewsStorage, article_key, article_time
+
+SEGMENTS_DIR = os.path.join(DATA_DIR, "segments")
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "lock"
+
+SEGMENT_MAX_RECORDS = 5000   # rotate the active segment after this many records
+COMPACT_SEGMENTS = 4         # sealed segments before compaction is considered
+COMPACT_MIN_GARBAGE = 0.25   # superseded share of sealed records worth a rewrite
+EXPIRY_SLACK = 24 * 3600     # seconds an expired record may linger before forcing one
+
+class SegmentedNewsStorage(NewsStorage):
+    """NewsStorage backend made of append-only JSON-Lines segments"""
+
+    def __init__(self, directory: str = SEGMENTS_DIR):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._compactor = None
+        self._index = None  # key -> latest article, loaded by writers only
+        self._write_depth = 0
+        self.manifest = self._load_manifest()
+
+    # === Manifest ===
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load_manifest(self) -> Dict:
+        if os.path.exists(self._manifest_path()):
+            with open(self._manifest_path(), "r") as f:
+                return json.load(f)
+        return {"segments": [], "next_id": 1, "collected_at": None, "superseded": 0, "writes": 0}
+
+    def _save_manifest(self):
+        self.manifest["writes"] = self.manifest.get("writes", 0) + 1
+        tmp = self._manifest_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self._manifest_path())
+
+    @contextmanager
+    def _writing(self):
+        """Hold the store for a change, with an up-to-date manifest.
+
+        If another process wrote since our last change, the key index
+        is dropped and rebuilt on next use.
+        """
+        with self._lock:
+            if self._write_depth:
+                self._write_depth += 1
+                try:
+                    yield
+                finally:
+                    self._write_depth -= 1
+                return
+            with open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+                if HAS_FCNTL:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                manifest = self._load_manifest()
+                if manifest.get("writes") != self.manifest.get("writes"):
+                    self._index = None
+                self.manifest = manifest
+                self._write_depth = 1
+                try:
+                    yield
+                finally:
+                    self._write_depth = 0
+                    # Closing the file releases the flock
+
+    def _new_segment(self) -> Dict:
+        segment = {"name": f"{self.manifest['next_id']:06d}.jsonl", "records": 0}
+        self.manifest["next_id"] += 1
+        return segment
+
+    # === Reading ===
+    @staticmethod
+    def _read_records(f) -> List[Dict]:
+        records = []
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # torn write at the tail
+        return records
+
+    def _read_segment(self, name: str) -> List[Dict]:
+        """All intact records of one segment, oldest first"""
+        path = self._segment_path(name)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r") as f:
+            return self._read_records(f)
+
+    def _open_segments(self) -> List:
+        """Open every segment of one consistent manifest, oldest first.
+
+        Another process may have appended or compacted since we loaded
+        (self.manifest is only refreshed by writers, see _writing). A
+        segment compacted away between reading the manifest and opening
+        it means a newer manifest to retry with.
+        """
+        manifest = self._load_manifest()
+        while True:
+            files, missing = [], False
+            for segment in manifest["segments"]:
+                try:
+                    files.append(open(self._segment_path(segment["name"]), "r"))
+                except FileNotFoundError:
+                    missing = True
+            if not missing:
+                return files
+            latest = self._load_manifest()
+            if latest == manifest:
+                return files  # listed but never written to: empty
+            for f in files:
+                f.close()
+            manifest = latest
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Yield the latest version of every record, most recently written first.
+
+        Only one segment is held in memory at a time. All segments are
+        opened up front, so a compaction that deletes some of them while
+        the caller is still iterating doesn't lose their records.
+        """
+        files = self._open_segments()
+        try:
+            seen = set()
+            for f in reversed(files):
+                for record in reversed(self._read_records(f)):
+                    if record["key"] in seen:
+                        continue
+                    seen.add(record["key"])
+                    yield record
+        finally:
+            for f in files:
+                f.close()
+
+    def iter_news(self, retention_days: Optional[int] = None) -> Iterator[Dict]:
+        """Stream articles without loading the whole store.
+
+        Articles come most recently written first, which is only roughly
+        newest published first; use load_news for the published order.
+        """
+        if retention_days is None:
+            for record in self.iter_records():
+                yield record["article"]
+            return
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        for record in self.iter_records():
+            if not self._is_expired(record["article"], cutoff):
+                yield record["article"]
+
+    def load_news(self, retention_days: Optional[int] = None) -> List[Dict]:
+        """Load saved news, newest published first (as the JSON store does)"""
+        return self._sort_newest(list(self.iter_news(retention_days)))
+
+    def get_last_collection_time(self) -> Optional[str]:
+        """Get timestamp of last collection"""
+        return self._load_manifest().get("collected_at")
+
+    def data_version(self):
+        """Changes whenever the manifest (rewritten on every write) does"""
+        return self._file_version(self._manifest_path())
+
+    # === Writing ===
+    def _key_index(self) -> Dict[str, Dict]:
+        """Latest version of each article by key, built on first write"""
+        if self._index is None:
+            self._index = {r["key"]: r["article"] for r in self.iter_records()}
+        return self._index
+
+    def _append(self, records: List[Dict]):
+        """Append records to the active segment, rotating when it fills up"""
+        segments = self.manifest["segments"]
+        if not segments:
+            segments.append(self._new_segment())
+        pos = 0
+        while pos < len(records):
+            active = segments[-1]
+            if active["records"] >= SEGMENT_MAX_RECORDS:
+                active = self._new_segment()
+                segments.append(active)
+            room = SEGMENT_MAX_RECORDS - active["records"]
+            chunk = records[pos:pos + room]
+            with open(self._segment_path(active["name"]), "a") as f:
+                f.write("".join(json.dumps(r) + "\n" for r in chunk))
+            active["records"] += len(chunk)
+            active["oldest"] = self._oldest(chunk, active.get("oldest"))
+            pos += len(chunk)
+
+    @staticmethod
+    def _oldest(records: List[Dict], oldest: Optional[float] = None) -> Optional[float]:
+        """Earliest article timestamp among records (and oldest), for expiry checks"""
+        for record in records:
+            when = article_time(record["article"])
+            if when is not None and (oldest is None or when.timestamp() < oldest):
+                oldest = when.timestamp()
+        return oldest
+
+    def merge_news(self, news: List[Dict], retention_days: int = RETENTION_DAYS,
+                   update_only: bool = False) -> Dict:
+        """Append new or changed articles to the log (only changed ones with update_only)"""
+        now = datetime.now(timezone.utc)
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        epoch = datetime.min.replace(tzinfo=timezone.utc)
+        inserted = updated = 0
+        records = []
+        with self._writing():
+            index = self._key_index()
+            # Oldest first, so reading the log backwards yields newest first
+            for article in sorted(news, key=lambda a: article_time(a) or epoch):
+                key = article_key(article)
+                current = index.get(key)
+                if current is None:
+                    if update_only or self._is_expired(article, cutoff):
+                        continue
+                    article = {**article, "first_seen": now.isoformat()}
+                    inserted += 1
+                else:
+                    article = {**current, **article}
+                    if article == current:
+                        continue
+                    updated += 1
+                index[key] = article
+                records.append({"key": key, "article": article})
+
+            self._append(records)
+            # Each update leaves an older copy of the article for compaction to drop
+            self.manifest["superseded"] = self.manifest.get("superseded", 0) + updated
+            self.manifest["collected_at"] = now.isoformat()
+            self._save_manifest()
+            total = len(index)
+
+        self.maybe_compact(retention_days)
+        return {"inserted": inserted, "updated": updated, "expired": 0, "total": total}
+
+    def save_news(self, news: List[Dict], collected_at: Optional[str] = None):
+        """Replace the whole store with news"""
+        self.wait_for_compaction()
+        with self._writing():
+            old = [s["name"] for s in self.manifest["segments"]]
+            self.manifest["segments"] = []
+            self.manifest["superseded"] = 0
+            self._index = {}
+            records = []
+            for article in reversed(news):
+                key = article_key(article)
+                self._index[key] = article
+                records.append({"key": key, "article": article})
+            self._append(records)
+            self.manifest["collected_at"] = collected_at or datetime.now().isoformat()
+            self._save_manifest()
+            for name in old:
+                self._remove_segment(name)
+
+    def clear_news(self):
+        """Clear current news"""
+        self.save_news([])
+
+    def _remove_segment(self, name: str):
+        try:
+            os.remove(self._segment_path(name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Windows won't delete a file a reader still has open
+            print(f"Could not remove segment {name}: {e}")
+
+    # === Compaction ===
+    def needs_compaction(self, retention_days: int = RETENTION_DAYS) -> bool:
+        """Whether a rewrite of the sealed segments would drop enough.
+
+        That is when superseded records make up COMPACT_MIN_GARBAGE of
+        them, or one holds an article more than EXPIRY_SLACK past the
+        retention window. Live records alone never trigger a rewrite.
+        """
+        sealed = self.manifest["segments"][:-1]
+        if len(sealed) < COMPACT_SEGMENTS:
+            return False
+        sealed_records = sum(s["records"] for s in sealed)
+        if self.manifest.get("superseded", 0) >= COMPACT_MIN_GARBAGE * sealed_records:
+            return True
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        horizon = cutoff.timestamp() - EXPIRY_SLACK
+        for segment in sealed:
+            oldest = segment.get("oldest", 0)   # 0: written before ages were tracked
+            if oldest is not None and oldest < horizon:
+                return True
+        return False
+
+    def maybe_compact(self, retention_days: int = RETENTION_DAYS):
+        """Start a background compaction when it would be worthwhile"""
+        with self._lock:
+            running = self._compactor is not None and self._compactor.is_alive()
+            if running or not self.needs_compaction(retention_days):
+                return
+            self._compactor = threading.Thread(
+                target=self.compact, args=(retention_days,), daemon=True
+            )
+            self._compactor.start()
+
+    def wait_for_compaction(self):
+        """Block until a running background compaction finishes"""
+        compactor = self._compactor
+        if compactor is not None and compactor is not threading.current_thread():
+            compactor.join()
+
+    def compact(self, retention_days: int = RETENTION_DAYS) -> Dict:
+        """Rewrite sealed segments without superseded or expired records.
+
+        The active segment keeps taking appends meanwhile; only the
+        manifest swap at the end holds the lock. If another process
+        compacted the same segments first, the rewrite is discarded.
+        """
+        with self._writing():
+            sealed = [dict(s) for s in self.manifest["segments"][:-1]]
+            if not sealed:
+                return {"segments": 0, "dropped": 0}
+            active = self.manifest["segments"][-1]["name"]
+            superseded_before = self.manifest.get("superseded", 0)
+
+        # Keys rewritten later (in the active segment) supersede sealed copies
+        active_records = self._read_segment(active)
+        newer = {r["key"] for r in active_records}
+        # Copies superseded within the active segment stay until it is sealed
+        active_superseded = len(active_records) - len(newer)
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        kept, superseded, expired = [], 0, []
+        for segment in reversed(sealed):
+            for record in reversed(self._read_segment(segment["name"])):
+                if record["key"] in newer:
+                    superseded += 1
+                    continue
+                newer.add(record["key"])
+                if self._is_expired(record["article"], cutoff):
+                    expired.append(record)
+                    continue
+                kept.append(record)
+        kept.reverse()
+
+        with self._writing():
+            old = {s["name"] for s in sealed}
+            current = {s["name"] for s in self.manifest["segments"]}
+            if not old <= current:
+                return {"segments": 0, "dropped": 0}
+
+            compacted = []
+            for start in range(0, len(kept), SEGMENT_MAX_RECORDS):
+                segment = self._new_segment()
+                chunk = kept[start:start + SEGMENT_MAX_RECORDS]
+                tmp = self._segment_path(segment["name"]) + ".tmp"
+                with open(tmp, "w") as f:
+                    f.write("".join(json.dumps(r) + "\n" for r in chunk))
+                os.replace(tmp, self._segment_path(segment["name"]))
+                segment["records"] = len(chunk)
+                segment["oldest"] = self._oldest(chunk)
+                compacted.append(segment)
+
+            remaining = [s for s in self.manifest["segments"] if s["name"] not in old]
+            self.manifest["segments"] = compacted + remaining
+            updated_since = self.manifest.get("superseded", 0) - superseded_before
+            self.manifest["superseded"] = active_superseded + max(0, updated_since)
+            self._save_manifest()
+            # Live keys keep their latest version; only expired ones leave
+            # the index, unless they were written again since
+            if self._index is not None:
+                for record in expired:
+                    if self._index.get(record["key"]) == record["article"]:
+                        del self._index[record["key"]]
+            for name in old:
+                self._remove_segment(name)
+
+        return {"segments": len(compacted), "dropped": superseded + len(expired)}
@@ -0,0 +1,196 @@
+"""
+SimHash - 64-bit fingerprints for catching near-duplicate stories at ingest
+
+Each article gets a SimHash of its title and summary, stored on the
+article as a hex string ("simhash") so the store carries it from then
+on. A SimHashIndex over the stored fingerprints answers "is there an
+article within MAX_DISTANCE bits of this one?" by splitting fingerprints
+into MAX_DISTANCE + 1 blocks: two fingerprints that close must agree
+exactly on at least one block, so each table only has to look at the
+fingerprints sharing that block.
+
+Text with fewer than MIN_FEATURES distinct words (an empty summary, a
+placeholder title) gets no fingerprint and is never matched: all such
+articles would otherwise look like copies of each other.
+"""
+import hashlib
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from collect.storage import article_key, get_storage
+
+SIMHASH_BITS = 64
+MAX_DISTANCE = 6   # bits; headline-length texts move a few bits per edited word
+MIN_FEATURES = 3   # distinct words needed for a meaningful fingerprint
+
+TAG_RE = re.compile(r"<[^>]+>")
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash of text's words, weighted by how often they occur.
+
+    None when the text has fewer than MIN_FEATURES distinct words.
+    """
+    features = Counter(WORD_RE.findall(TAG_RE.sub(" ", text).lower()))
+    if len(features) < MIN_FEATURES:
+        return None
+    digests = b"".join(hashlib.blake2b(w.encode(), digest_size=8).digest() for w in features)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    weights = np.fromiter(features.values(), dtype=np.int64, count=len(features))
+    totals = weights @ (2 * bits.astype(np.int64) - 1)
+    return int.from_bytes(np.packbits(totals > 0).tobytes(), "big")
+
+def article_fingerprint(article: Dict) -> Optional[int]:
+    """The article's stored fingerprint, computing and storing it if missing.
+
+    None for articles without enough text to fingerprint.
+    """
+    stored = article.get("simhash")
+    if stored:
+        return int(stored, 16) or None  # 0 was stored for featureless text
+    fingerprint = simhash(article.get("title", "") + " " + (article.get("summary") or article.get("description", "")))
+    if fingerprint is not None:
+        article["simhash"] = f"{fingerprint:016x}"
+    return fingerprint
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+class SimHashIndex:
+    """Fingerprints in one table per block for Hamming-distance lookups"""
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        # Spread the bits as evenly as possible: (shift, mask) per block
+        blocks = max_distance + 1
+        self.blocks = []
+        shift = 0
+        for i in range(blocks):
+            width = SIMHASH_BITS // blocks + (1 if i < SIMHASH_BITS % blocks else 0)
+            self.blocks.append((shift, (1 << width) - 1))
+            shift += width
+        self.tables: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(blocks)]
+        self.fingerprints: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def _block_values(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> shift) & mask for shift, mask in self.blocks]
+
+    def add(self, key: str, fingerprint: int):
+        if key in self.fingerprints:
+            self.remove(key)
+        self.fingerprints[key] = fingerprint
+        for table, value in zip(self.tables, self._block_values(fingerprint)):
+            table.setdefault(value, []).append((fingerprint, key))
+
+    def remove(self, key: str):
+        fingerprint = self.fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for table, value in zip(self.tables, self._block_values(fingerprint)):
+            entries = [e for e in table[value] if e[1] != key]
+            if entries:
+                table[value] = entries
+            else:
+                del table[value]
+
+    def find(self, fingerprint: int, exclude: Optional[str] = None) -> Optional[Tuple[str, int]]:
+        """Closest (key, distance) within max_distance, ignoring key exclude"""
+        best = None
+        for table, value in zip(self.tables, self._block_values(fingerprint)):
+            for other, key in table.get(value, ()):
+                if key == exclude:
+                    continue
+                distance = hamming(fingerprint, other)
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (key, distance)
+                    if distance == 0:
+                        return best
+        return best
+
+    @classmethod
+    def from_articles(cls, articles: List[Dict], max_distance: int = MAX_DISTANCE) -> "SimHashIndex":
+        index = cls(max_distance)
+        for article in articles:
+            fingerprint = article_fingerprint(article)
+            if fingerprint is not None:
+                index.add(article_key(article), fingerprint)
+        return index
+
+_index: Optional[SimHashIndex] = None
+_index_version = None
+_index_lock = threading.RLock()
+
+def get_simhash_index(storage=None) -> SimHashIndex:
+    """Index over the stored articles, rebuilt when someone else changes the store.
+
+    Stored articles already carry their fingerprint, so a rebuild is a
+    pass over the hex strings rather than over the text. Batches written
+    through merge_and_index don't cause one.
+    """
+    global _index, _index_version
+    storage = storage or get_storage()
+    with _index_lock:
+        version = storage.data_version()
+        if _index is None or version != _index_version:
+            _index = SimHashIndex.from_articles(storage.load_news())
+            _index_version = version
+        return _index
+
+def merge_and_index(articles: List[Dict], storage=None) -> Dict:
+    """Merge articles into the store and add them to the shared index.
+
+    If the index was current before the merge it stays current after
+    it, instead of being rebuilt from the whole store on next use.
+    Returns merge_news's counts.
+    """
+    global _index_version
+    storage = storage or get_storage()
+    with _index_lock:
+        before = storage.data_version()
+        stats = storage.merge_news(articles)
+        if _index is not None and _index_version == before:
+            for article in articles:
+                fingerprint = article_fingerprint(article)
+                if fingerprint is not None:
+                    _index.add(article_key(article), fingerprint)
+            _index_version = storage.data_version()
+    return stats
+
+def reject_near_duplicates(articles: List[Dict], index: Optional[SimHashIndex] = None,
+                           commit: bool = True) -> Tuple[List[Dict], List[Dict]]:
+    """Split articles into (kept, rejected) near-duplicates.
+
+    An article is rejected when it is within the index's distance of a
+    stored article or of one kept earlier in the same batch; a stored
+    article with the same key is an update, not a duplicate. Kept
+    articles get their "simhash" field set and, with commit, are added
+    to the index. Articles too short to fingerprint are always kept.
+    """
+    index = index if index is not None else get_simhash_index()
+    batch = SimHashIndex(index.max_distance)
+    kept, rejected = [], []
+    for article in articles:
+        key = article_key(article)
+        fingerprint = article_fingerprint(article)
+        if fingerprint is None:
+            kept.append(article)
+            continue
+        match = index.find(fingerprint, exclude=key) or batch.find(fingerprint, exclude=key)
+        if match is not None:
+            article["duplicate_of"] = match[0]
+            rejected.append(article)
+            continue
+        batch.add(key, fingerprint)
+        kept.append(article)
+    if commit:
+        with _index_lock:
+            for key, fingerprint in batch.fingerprints.items():
+                index.add(key, fingerprint)
+    return kept, rejected
@@ -0,0 +1,277 @@
+"""
+SQLite Storage - Indexed local article store
+
+Serverless counterpart of backend/database/schema.sql: the same articles,
+keywords and search_history tables, adapted to SQLite types, with the
+filter columns indexed so category/source/sentiment queries never scan
+the whole table.
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from collect.storage import (
+    DATA_DIR, RETENTION_DAYS, NewsStorage, article_key, article_time, normalize_link
+)
+
+SQLITE_FILE = os.path.join(DATA_DIR, "tanya.db")
+BATCH_SIZE = 500   # rows per executemany / IN (...) lookup
+
+# Mirrors backend/database/schema.sql. `data` keeps the full article dict
+# so fields without a column of their own survive a round trip.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    link TEXT UNIQUE NOT NULL,
+    content TEXT,
+    published TIMESTAMP,
+    collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sentiment TEXT DEFAULT 'neutral',
+    reading_time INTEGER DEFAULT 5,
+    keywords TEXT,
+    is_favorite INTEGER DEFAULT 0,
+    category TEXT,
+    source TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_published ON articles(published);
+CREATE INDEX IF NOT EXISTS idx_sentiment ON articles(sentiment, published);
+CREATE INDEX IF NOT EXISTS idx_favorite ON articles(is_favorite, published);
+CREATE INDEX IF NOT EXISTS idx_category ON articles(category, published);
+CREATE INDEX IF NOT EXISTS idx_source ON articles(source, published);
+
+CREATE TABLE IF NOT EXISTS keywords (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    article_id TEXT REFERENCES articles(id) ON DELETE CASCADE,
+    keyword TEXT NOT NULL,
+    frequency INTEGER DEFAULT 1,
+    UNIQUE(article_id, keyword)
+);
+
+CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON keywords(keyword);
+
+CREATE TABLE IF NOT EXISTS search_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    results_count INTEGER,
+    searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    user_id TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPSERT = """
+INSERT INTO articles (id, title, link, content, published, collected_at, sentiment,
+                      reading_time, keywords, is_favorite, category, source, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(link) DO UPDATE SET
+    title = excluded.title,
+    content = excluded.content,
+    published = excluded.published,
+    sentiment = excluded.sentiment,
+    reading_time = excluded.reading_time,
+    keywords = excluded.keywords,
+    is_favorite = excluded.is_favorite,
+    category = excluded.category,
+    source = excluded.source,
+    data = excluded.data
+"""
+
+FILTER_COLUMNS = ("category", "source", "sentiment")
+
+def _row_link(article: Dict) -> str:
+    """Value of the UNIQUE link column for an article"""
+    link = article.get("link")
+    return normalize_link(link) if link else article_key(article)
+
+class SQLiteNewsStorage(NewsStorage):
+    """NewsStorage backend on a local SQLite database in WAL mode"""
+
+    def __init__(self, path: str = SQLITE_FILE):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _row(self, article: Dict, link: str) -> tuple:
+        when = article_time(article)
+        keywords = article.get("keywords")
+        return (
+            str(uuid.uuid5(uuid.NAMESPACE_URL, link)),
+            article.get("title", ""),
+            link,
+            article.get("content") or article.get("summary") or article.get("description", ""),
+            when.astimezone(timezone.utc).isoformat() if when else None,
+            article.get("first_seen") or datetime.now(timezone.utc).isoformat(),
+            article.get("sentiment", "neutral"),
+            article.get("reading_time", 5),
+            json.dumps(keywords) if keywords is not None else None,
+            1 if article.get("is_favorite") else 0,
+            article.get("category"),
+            article.get("source"),
+            json.dumps(article)
+        )
+
+    def _existing(self, links: List[str]) -> Dict[str, Dict]:
+        """Stored articles for the given link column values"""
+        found = {}
+        for start in range(0, len(links), BATCH_SIZE):
+            chunk = links[start:start + BATCH_SIZE]
+            marks = ",".join("?" * len(chunk))
+            for link, data in self.conn.execute(
+                f"SELECT link, data FROM articles WHERE link IN ({marks})", chunk
+            ):
+                found[link] = json.loads(data)
+        return found
+
+    def _set_meta(self, name: str, value: str):
+        self.conn.execute(
+            "INSERT INTO meta (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (name, value)
+        )
+
+    def merge_news(self, news: List[Dict], retention_days: int = RETENTION_DAYS,
+                   update_only: bool = False) -> Dict:
+        """Upsert a collection pass in one transaction (only updates with update_only)"""
+        now = datetime.now(timezone.utc)
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        with self._lock, self.conn:
+            batch = {}
+            for article in news:
+                batch[_row_link(article)] = article
+            existing = self._existing(list(batch))
+
+            rows = []
+            inserted = updated = 0
+            for link, article in batch.items():
+                current = existing.get(link)
+                if current is None:
+                    if update_only or self._is_expired(article, cutoff):
+                        continue
+                    article = {**article, "first_seen": now.isoformat()}
+                    inserted += 1
+                else:
+                    article = {**current, **article}
+                    if article == current:
+                        continue
+                    updated += 1
+                rows.append(self._row(article, link))
+
+            for start in range(0, len(rows), BATCH_SIZE):
+                self.conn.executemany(UPSERT, rows[start:start + BATCH_SIZE])
+            expired = self.conn.execute(
+                "DELETE FROM articles WHERE published < ?", (cutoff.isoformat(),)
+            ).rowcount
+            self._set_meta("collected_at", now.isoformat())
+            total = self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+        return {"inserted": inserted, "updated": updated, "expired": expired, "total": total}
+
+    def save_news(self, news: List[Dict], collected_at: Optional[str] = None):
+        """Replace the whole store with news"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM articles")
+            rows = [self._row(a, _row_link(a)) for a in news]
+            for start in range(0, len(rows), BATCH_SIZE):
+                self.conn.executemany(UPSERT, rows[start:start + BATCH_SIZE])
+            self._set_meta("collected_at", collected_at or datetime.now().isoformat())
+
+    def _where(self, category: Optional[str] = None, source: Optional[str] = None,
+               sentiment: Optional[str] = None, favorites_only: bool = False,
+               retention_days: Optional[int] = None):
+        """WHERE clause and parameters for the indexed filters"""
+        clauses = ["1 = 1"]
+        params = []
+        if retention_days is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+            clauses.append("(published IS NULL OR published >= ?)")
+            params.append(cutoff.isoformat())
+        for column, value in zip(FILTER_COLUMNS, (category, source, sentiment)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if favorites_only:
+            clauses.append("is_favorite = 1")
+        return " AND ".join(clauses), params
+
+    def query_news(self, category: Optional[str] = None, source: Optional[str] = None,
+                   sentiment: Optional[str] = None, favorites_only: bool = False,
+                   limit: int = 50, offset: int = 0,
+                   retention_days: Optional[int] = None) -> List[Dict]:
+        """Filtered page of articles, newest first"""
+        where, params = self._where(category, source, sentiment, favorites_only, retention_days)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT data FROM articles WHERE {where} "
+                "ORDER BY published DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def count_news(self, category: Optional[str] = None, source: Optional[str] = None,
+                   sentiment: Optional[str] = None, favorites_only: bool = False,
+                   retention_days: Optional[int] = None) -> int:
+        """Number of articles matching the filters"""
+        where, params = self._where(category, source, sentiment, favorites_only, retention_days)
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM articles WHERE {where}", params).fetchone()[0]
+
+    def facet_counts(self, column: str) -> Dict[str, int]:
+        """Article count per value of category, source or sentiment"""
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Not a filter column: {column}")
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {column}, COUNT(*) FROM articles GROUP BY {column} ORDER BY COUNT(*) DESC"
+            ).fetchall()
+        return {value: count for value, count in rows if value is not None}
+
+    def load_news(self, retention_days: Optional[int] = None) -> List[Dict]:
+        """Load saved news, newest first"""
+        where, params = self._where(retention_days=retention_days)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT data FROM articles WHERE {where} ORDER BY published DESC", params
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def get_last_collection_time(self) -> Optional[str]:
+        """Get timestamp of last collection"""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE name = 'collected_at'").fetchone()
+        return row[0] if row else None
+
+    def data_version(self):
+        """Changes whenever the database or its write-ahead log does"""
+        return self._file_version(self.path, self.path + "-wal")
+
+    def log_search(self, query: str, results_count: int, user_id: Optional[str] = None):
+        """Record a search in search_history"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO search_history (query, results_count, user_id) VALUES (?, ?, ?)",
+                (query, results_count, user_id)
+            )
+
+    def clear_news(self):
+        """Clear current news"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM articles")
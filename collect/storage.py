@@ -1,77 +1,470 @@
 """
 Storage Module - Handles data persistence for collected news
 """
+import hashlib
 import json
 import os
-from datetime import datetime
-from typing import List, Dict, Optional
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 DATA_DIR = "data"
 NEWS_FILE = os.path.join(DATA_DIR, "news.json")
+NEWS_LOG_FILE = os.path.join(DATA_DIR, "news.log.jsonl")
+NEWS_META_FILE = os.path.join(DATA_DIR, "news.meta.json")
 HISTORY_FILE = os.path.join(DATA_DIR, "history.json")
+HISTORY_LOG_FILE = os.path.join(DATA_DIR, "history.jsonl")
+HISTORY_CAPACITY = 1000     # saved articles kept
+
+# Article store backend: "json" (news.json + journal), "segments" or "sqlite"
+STORAGE_BACKEND = os.environ.get("TANYA_STORAGE", "json")
+
+RETENTION_DAYS = 30         # articles older than this are dropped
+COMPACT_MIN_LINES = 500     # journal lines before folding into news.json
+
+# Query parameters that only track the click, not the article
+TRACKING_PARAMS = {"at_medium", "at_campaign", "fbclid", "gclid", "cmpid", "ref", "ref_src"}
+
+def normalize_link(link: str) -> str:
+    """Canonical form of an article URL for deduplication"""
+    parts = urlsplit(link.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
+
+def article_key(article: Dict) -> str:
+    """Stable identity of an article: its GUID, else its normalized link"""
+    guid = article.get("guid")
+    if guid:
+        return "guid:" + guid
+    link = article.get("link")
+    if link:
+        return "link:" + normalize_link(link)
+    return "title:" + hashlib.sha1(article.get("title", "").encode("utf-8")).hexdigest()
+
+def article_time(article: Dict) -> Optional[datetime]:
+    """Best-effort timestamp of an article (published, else first seen)"""
+    for field in ("published", "first_seen"):
+        value = article.get(field)
+        if not value:
+            continue
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            try:
+                parsed = datetime.fromisoformat(value)
+            except ValueError:
+                continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed
+    return None
+
+class HistoryStore:
+    """Saved-article history with a link index and a bounded ring buffer.
+    
+    Entries are appended to a JSON-Lines log; the in-memory deque keeps
+    the newest `capacity` of them and the index maps each link to its
+    entry, so a duplicate check is a dict lookup. The log is rewritten
+    only when it grows past twice the capacity.
+    """
+    
+    def __init__(self, path: str = HISTORY_LOG_FILE, capacity: int = HISTORY_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._size = None
+        self._migrate_legacy()
+        self._reload()
+    
+    def _migrate_legacy(self):
+        """Convert an old history.json (newest first) into the log"""
+        if os.path.exists(HISTORY_FILE) and not os.path.exists(self.path):
+            with open(HISTORY_FILE, "r") as f:
+                legacy = json.load(f)
+            with open(self.path, "w") as f:
+                for entry in reversed(legacy[:self.capacity]):
+                    f.write(json.dumps(entry) + "\n")
+            os.remove(HISTORY_FILE)
+    
+    def _push(self, entry: Dict):
+        if len(self.entries) == self.capacity:
+            evicted = self.entries[0]
+            if self.index.get(evicted.get("link")) is evicted:
+                del self.index[evicted.get("link")]
+        self.entries.append(entry)
+        self.index[entry.get("link")] = entry
+    
+    def _reload(self):
+        """Rebuild the ring buffer and index from the log"""
+        self.entries = deque(maxlen=self.capacity)
+        self.index = {}
+        self._lines = 0
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        self._push(json.loads(line))
+                        self._lines += 1
+                    except ValueError:
+                        continue  # torn write at the tail
+        self._size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+    
+    def _refresh(self):
+        """Pick up writes made by another process"""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size != self._size:
+            self._reload()
+    
+    def __contains__(self, link: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return link in self.index
+    
+    def add_many(self, articles: List[Dict]) -> int:
+        """Append articles not already saved; returns how many were added"""
+        saved_at = datetime.now().isoformat()
+        lines = []
+        with self._lock:
+            self._refresh()
+            for article in articles:
+                if article.get("link") in self.index:
+                    continue
+                entry = {**article, "saved_at": saved_at}
+                self._push(entry)
+                lines.append(json.dumps(entry) + "\n")
+            if not lines:
+                return 0
+            
+            self._lines += len(lines)
+            if self._lines > 2 * self.capacity:
+                # Drop evicted entries from the log
+                tmp = self.path + ".tmp"
+                with open(tmp, "w") as f:
+                    f.write("".join(json.dumps(e) + "\n" for e in self.entries))
+                os.replace(tmp, self.path)
+                self._lines = len(self.entries)
+            else:
+                with open(self.path, "a") as f:
+                    f.write("".join(lines))
+            self._size = os.path.getsize(self.path)
+        return len(lines)
+    
+    def load(self) -> List[Dict]:
+        """Saved articles, newest first"""
+        with self._lock:
+            self._refresh()
+            return list(reversed(self.entries))
+    
+    def clear(self):
+        with self._lock:
+            for path in (self.path, HISTORY_FILE):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._reload()
+
+# One history store per log file, shared by every NewsStorage in the process
+_history_stores = {}
+_history_stores_lock = threading.Lock()
+
+def get_history_store(path: str = HISTORY_LOG_FILE) -> HistoryStore:
+    with _history_stores_lock:
+        if path not in _history_stores:
+            _history_stores[path] = HistoryStore(path)
+        return _history_stores[path]
 
 class NewsStorage:
+    """news.json snapshot plus an append-only journal of changes.
+    
+    news.json stays a plain list of articles, the format the Rust, C++
+    and Node tools read; the collection time lives in news.meta.json.
+    The merged view is kept in memory and brought up to date by reading
+    only journal lines appended since the last look.
+    """
+    
     def __init__(self):
         os.makedirs(DATA_DIR, exist_ok=True)
+        self._lock = threading.RLock()
+        self._merged: Dict[str, Dict] = {}
+        self._collected_at = None
+        self._log_lines = 0
+        self._log_offset = 0
+        self._snapshot_version = None
     
-    def save_news(self, news: List[Dict]):
+    def save_news(self, news: List[Dict], collected_at: Optional[str] = None):
         """Save news to file with timestamp"""
-        data = {
-            "collected_at": datetime.now().isoformat(),
-            "articles": news
-        }
-        with open(NEWS_FILE, "w") as f:
-            json.dump(data, f, indent=2)
+        with self._lock:
+            collected_at = collected_at or datetime.now().isoformat()
+            tmp = NEWS_FILE + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(news, f, indent=2)
+            os.replace(tmp, NEWS_FILE)
+            tmp = NEWS_META_FILE + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"collected_at": collected_at}, f)
+            os.replace(tmp, NEWS_META_FILE)
+            # The snapshot now holds everything the journal did
+            if os.path.exists(NEWS_LOG_FILE):
+                os.remove(NEWS_LOG_FILE)
+            self._merged = {article_key(a): a for a in news}
+            self._collected_at = collected_at
+            self._log_lines = 0
+            self._log_offset = 0
+            self._snapshot_version = self._file_version(NEWS_FILE, NEWS_META_FILE)
     
-    def load_news(self) -> List[Dict]:
-        """Load saved news"""
+    def _load_snapshot(self) -> Tuple[List[Dict], Optional[str]]:
+        """Read news.json and news.meta.json as (articles, collected_at)"""
+        articles, collected_at = [], None
         if os.path.exists(NEWS_FILE):
             with open(NEWS_FILE, "r") as f:
                 data = json.load(f)
-                # Handle both dict and list formats
-                if isinstance(data, list):
-                    return data
-                return data.get("articles", [])
-        return []
+            # Older snapshots were {"collected_at", "articles"}
+            if isinstance(data, list):
+                articles = data
+            else:
+                articles, collected_at = data.get("articles", []), data.get("collected_at")
+        if os.path.exists(NEWS_META_FILE):
+            try:
+                with open(NEWS_META_FILE, "r") as f:
+                    collected_at = json.load(f).get("collected_at") or collected_at
+            except (OSError, ValueError):
+                pass
+        return articles, collected_at
+    
+    def _replay(self, f):
+        """Apply complete journal lines from f's position onwards"""
+        for line in f:
+            if not line.endswith("\n"):
+                break  # torn write at the tail; read it again next time
+            self._log_offset += len(line.encode("utf-8"))
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            self._log_lines += 1
+            if "article" in record:
+                self._merged[record["key"]] = record["article"]
+            elif "collected_at" in record:
+                self._collected_at = record["collected_at"]
+    
+    def _load_merged(self) -> Tuple[Dict[str, Dict], Optional[str], int]:
+        """Replay the journal over the snapshot.
+        
+        Returns (articles by key, last collection time, journal line count).
+        The snapshot is re-read only when news.json has been replaced;
+        otherwise only journal lines appended since the last call are read.
+        """
+        with self._lock:
+            snapshot = self._file_version(NEWS_FILE, NEWS_META_FILE)
+            log_size = os.path.getsize(NEWS_LOG_FILE) if os.path.exists(NEWS_LOG_FILE) else 0
+            if snapshot != self._snapshot_version or log_size < self._log_offset:
+                articles, self._collected_at = self._load_snapshot()
+                self._merged = {article_key(a): a for a in articles}
+                self._log_lines = 0
+                self._log_offset = 0
+                self._snapshot_version = snapshot
+            if log_size > self._log_offset:
+                with open(NEWS_LOG_FILE, "r", encoding="utf-8", newline="") as f:
+                    f.seek(self._log_offset)
+                    self._replay(f)
+            return self._merged, self._collected_at, self._log_lines
+    
+    def _is_expired(self, article: Dict, cutoff: datetime) -> bool:
+        when = article_time(article)
+        return when is not None and when < cutoff
+    
+    def merge_news(self, news: List[Dict], retention_days: int = RETENTION_DAYS,
+                   update_only: bool = False) -> Dict:
+        """Merge a collection pass into the store.
+        
+        Only new or changed articles are written, as lines appended to the
+        journal; the journal is folded into news.json (dropping articles
+        past the retention window) once it outgrows the snapshot. With
+        update_only, articles not already stored are ignored.
+        """
+        with self._lock:
+            return self._merge_locked(news, retention_days, update_only)
+    
+    def _merge_locked(self, news: List[Dict], retention_days: int, update_only: bool = False) -> Dict:
+        existing, _, log_lines = self._load_merged()
+        now = datetime.now(timezone.utc)
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        changes = []
+        inserted = updated = 0
+        for article in news:
+            key = article_key(article)
+            current = existing.get(key)
+            if current is None:
+                if update_only or self._is_expired(article, cutoff):
+                    continue
+                article = {**article, "first_seen": now.isoformat()}
+                inserted += 1
+            else:
+                article = {**current, **article}
+                if article == current:
+                    continue
+                updated += 1
+            existing[key] = article
+            changes.append({"key": key, "article": article})
+        
+        with open(NEWS_LOG_FILE, "a", encoding="utf-8") as f:
+            for change in changes:
+                f.write(json.dumps(change) + "\n")
+            f.write(json.dumps({"collected_at": now.isoformat()}) + "\n")
+        # Our own lines are already applied to existing; just move past them
+        self._collected_at = now.isoformat()
+        self._log_lines += len(changes) + 1
+        self._log_offset = os.path.getsize(NEWS_LOG_FILE)
+        
+        expired = 0
+        if log_lines + len(changes) + 1 > max(COMPACT_MIN_LINES, len(existing)):
+            kept = [a for a in existing.values() if not self._is_expired(a, cutoff)]
+            expired = len(existing) - len(kept)
+            self.save_news(self._sort_newest(kept), now.isoformat())
+        
+        return {
+            "inserted": inserted,
+            "updated": updated,
+            "expired": expired,
+            "total": len(existing) - expired
+        }
+    
+    def _sort_newest(self, articles: List[Dict]) -> List[Dict]:
+        epoch = datetime.min.replace(tzinfo=timezone.utc)
+        return sorted(articles, key=lambda a: article_time(a) or epoch, reverse=True)
+    
+    def load_news(self, retention_days: Optional[int] = None) -> List[Dict]:
+        """Load saved news, newest first.
+        
+        Retention is enforced when the journal is compacted; pass
+        retention_days to also hide expired articles still on disk.
+        """
+        # Copies, so callers can't change the merged view behind our back
+        articles = [dict(a) for a in self._load_merged()[0].values()]
+        if retention_days is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+            articles = [a for a in articles if not self._is_expired(a, cutoff)]
+        return self._sort_newest(articles)
     
     def get_last_collection_time(self) -> Optional[str]:
         """Get timestamp of last collection"""
-        if os.path.exists(NEWS_FILE):
-            with open(NEWS_FILE, "r") as f:
-                data = json.load(f)
-                # Handle both dict and list formats
-                if isinstance(data, list):
-                    return None
-                return data.get("collected_at")
-        return None
+        return self._load_merged()[1]
+    
+    def _file_version(self, *paths: str) -> Tuple:
+        """(mtime, size) of each file; changes whenever one is rewritten"""
+        version = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                version.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+    
+    def data_version(self) -> Tuple:
+        """Cheap token that changes whenever the stored news changes"""
+        return self._file_version(NEWS_FILE, NEWS_LOG_FILE, NEWS_META_FILE)
     
     def add_to_history(self, article: Dict):
         """Add article to history"""
-        history = self.load_history()
-        # Check for duplicates
-        if not any(a.get("link") == article.get("link") for a in history):
-            history.insert(0, {
-                **article,
-                "saved_at": datetime.now().isoformat()
-            })
-            # Keep last 1000 articles
-            history = history[:1000]
-            with open(HISTORY_FILE, "w") as f:
-                json.dump(history, f, indent=2)
+        get_history_store().add_many([article])
+    
+    def add_many_to_history(self, articles: List[Dict]) -> int:
+        """Add several articles to history with a single write"""
+        return get_history_store().add_many(articles)
     
     def load_history(self) -> List[Dict]:
-        """Load article history"""
-        if os.path.exists(HISTORY_FILE):
-            with open(HISTORY_FILE, "r") as f:
-                return json.load(f)
-        return []
+        """Load article history, newest first"""
+        return get_history_store().load()
     
     def clear_news(self):
         """Clear current news"""
-        if os.path.exists(NEWS_FILE):
-            os.remove(NEWS_FILE)
+        with self._lock:
+            for path in (NEWS_FILE, NEWS_LOG_FILE, NEWS_META_FILE):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._snapshot_version = None
     
     def clear_history(self):
         """Clear history"""
-        if os.path.exists(HISTORY_FILE):
-            os.remove(HISTORY_FILE)
+        get_history_store().clear()
+
+class NewsCache:
+    """Loads news once per data version and shares it between callers.
+    
+    The returned list is shared; callers must not modify it.
+    """
+    
+    def __init__(self, storage: Optional[NewsStorage] = None):
+        self.storage = storage or get_storage()
+        self._lock = threading.Lock()
+        self.version = None
+        self.news = []
+        self.derived = {}
+        self.hits = 0
+        self.misses = 0
+        self.load_ms = 0.0
+    
+    def get(self) -> List[Dict]:
+        """Cached news, reloaded only when the store has changed"""
+        version = self.storage.data_version()
+        with self._lock:
+            if version == self.version:
+                self.hits += 1
+                return self.news
+            start = time.perf_counter()
+            self.news = self.storage.load_news()
+            self.load_ms = (time.perf_counter() - start) * 1000
+            self.version = version
+            self.derived = {}
+            self.misses += 1
+            return self.news
+    
+    def get_derived(self, name: str, build) -> Tuple[List[Dict], object]:
+        """(news, structure built from it), e.g. an index over positions.
+        
+        build(news) runs once per data version and its result is shared
+        like the news list itself. Both come from the same version.
+        """
+        self.get()
+        with self._lock:
+            if name not in self.derived:
+                self.derived[name] = build(self.news)
+            return self.news, self.derived[name]
+    
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 2) if total else 0.0,
+            "load_ms": round(self.load_ms, 1),
+            "articles": len(self.news)
+        }
+
+# One article store per backend, shared by every caller in the process so
+# writers see each other's in-memory state (and run a single compactor)
+_storages = {}
+_storages_lock = threading.Lock()
+
+def get_storage(backend: Optional[str] = None) -> NewsStorage:
+    """The configured article store"""
+    backend = backend or STORAGE_BACKEND
+    with _storages_lock:
+        if backend not in _storages:
+            if backend == "segments":
+                from collect.segment_storage import SegmentedNewsStorage
+                _storages[backend] = SegmentedNewsStorage()
+            elif backend == "sqlite":
+                from collect.sqlite_storage import SQLiteNewsStorage
+                _storages[backend] = SQLiteNewsStorage()
+            else:
+                _storages[backend] = NewsStorage()
+        return _storages[backend]
@@ -0,0 +1,170 @@
+"""
+Worker Client - Pool of long-lived engine processes
+
+Talks to a binary started in serve mode (e.g. `search --serve`) over
+newline-delimited JSON on stdin/stdout. Each request carries an id and
+the worker echoes it back, so several requests can be in flight on one
+process and answered in any order.
+"""
+import itertools
+import json
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional
+
+WORKER_TIMEOUT = 10    # seconds to wait for one response
+POOL_SIZE = 2          # worker processes per pool
+HEALTH_INTERVAL = 30   # ping a worker idle for longer than this (seconds)
+
+class WorkerError(Exception):
+    """A worker failed, exited or answered with ok=false"""
+
+class Worker:
+    """One engine process with requests multiplexed over its pipes"""
+
+    def __init__(self, cmd: List[str], cwd: Optional[str] = None):
+        self.cmd = cmd
+        self.proc = subprocess.Popen(
+            cmd, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True, bufsize=1
+        )
+        self.last_used = time.monotonic()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    @property
+    def load(self) -> int:
+        """Requests waiting for a response"""
+        return len(self._pending)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def _read_loop(self):
+        """Hand each response line to the request with the same id"""
+        for line in self.proc.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(response, dict):
+                continue  # not a response (stray output)
+            with self._lock:
+                future = self._pending.pop(response.get("id"), None)
+            if future is not None:
+                future.set_result(response)
+        # stdout closed: the process is gone, fail whatever is still waiting
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(WorkerError(f"{self.cmd[0]} exited"))
+
+    def request(self, op: str, timeout: float = WORKER_TIMEOUT, **params) -> Dict:
+        """Send one request and wait for its response"""
+        future = Future()
+        with self._lock:
+            if not self.alive():
+                raise WorkerError(f"{self.cmd[0]} is not running")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                self.proc.stdin.write(json.dumps({"id": request_id, "op": op, **params}) + "\n")
+                self.proc.stdin.flush()
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                raise WorkerError(f"{self.cmd[0]}: {e}")
+        self.last_used = time.monotonic()
+
+        try:
+            response = future.result(timeout)
+        except FutureTimeout:
+            # A stuck worker would stall every later request: drop it
+            self.proc.kill()
+            self.proc.wait()
+            raise WorkerError(f"{self.cmd[0]} timed out on {op}")
+        if not response.get("ok"):
+            raise WorkerError(response.get("error", "request failed"))
+        return response
+
+    def ping(self, timeout: float = WORKER_TIMEOUT) -> bool:
+        try:
+            self.request("ping", timeout=timeout)
+            return True
+        except WorkerError:
+            return False
+
+    def close(self):
+        """Close stdin so the worker exits, killing it if it doesn't"""
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+
+class WorkerPool:
+    """A few workers for one command, restarted when they die.
+
+    Requests go to the least busy worker; a worker idle for longer than
+    HEALTH_INTERVAL is pinged before being trusted again.
+    """
+
+    def __init__(self, cmd: List[str], size: int = POOL_SIZE, cwd: Optional[str] = None):
+        self.cmd = cmd
+        self.size = size
+        self.cwd = cwd
+        self.workers: List[Worker] = []
+        self._lock = threading.Lock()
+
+    def _spawn(self) -> Worker:
+        try:
+            return Worker(self.cmd, self.cwd)
+        except OSError as e:
+            raise WorkerError(f"Cannot start {self.cmd[0]}: {e}")
+
+    def _healthy(self, worker: Worker) -> bool:
+        if not worker.alive():
+            return False
+        if time.monotonic() - worker.last_used > HEALTH_INTERVAL:
+            return worker.ping(timeout=2)
+        return True
+
+    def _acquire(self) -> Worker:
+        with self._lock:
+            workers = list(self.workers)
+        # Pings can take seconds: don't hold up other callers meanwhile
+        unhealthy = [w for w in workers if not self._healthy(w)]
+        with self._lock:
+            for worker in unhealthy:
+                if worker in self.workers:
+                    self.workers.remove(worker)
+            idle = [w for w in self.workers if w.load == 0]
+            if not idle and len(self.workers) < self.size:
+                self.workers.append(self._spawn())
+            chosen = min(self.workers, key=lambda w: w.load)
+        for worker in unhealthy:
+            worker.close()
+        return chosen
+
+    def request(self, op: str, timeout: float = WORKER_TIMEOUT, **params) -> Dict:
+        """Send a request, retrying once on a fresh worker if the first one fails"""
+        worker = self._acquire()
+        try:
+            return worker.request(op, timeout=timeout, **params)
+        except WorkerError:
+            if worker.alive():
+                raise  # the worker answered; retrying won't change the answer
+        with self._lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+        return self._acquire().request(op, timeout=timeout, **params)
+
+    def close(self):
+        with self._lock:
+            for worker in self.workers:
+                worker.close()
+            self.workers = []
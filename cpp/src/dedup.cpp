@@ -6,8 +6,125 @@
 #include <map>
 #include <algorithm>
 #include <cctype>
+#include <cstdio>
+
+// news.json is a list of articles; changes since the Python collector last
+// compacted it are {"key": ..., "article": {...}} lines in news.log.jsonl
+const std::string NEWS_FILE = "../data/news.json";
+const std::string NEWS_LOG_FILE = "../data/news.log.jsonl";
+
+// Just enough JSON to pick string fields out of an article and keep the
+// article's original text, so saving doesn't drop fields this tool ignores
+namespace json {
+    void skip_ws(const std::string& s, size_t& i) {
+        while (i < s.size() && std::isspace((unsigned char)s[i])) i++;
+    }
+
+    void append_utf8(std::string& out, unsigned int cp) {
+        if (cp < 0x80) {
+            out += (char)cp;
+        } else if (cp < 0x800) {
+            out += (char)(0xC0 | (cp >> 6));
+            out += (char)(0x80 | (cp & 0x3F));
+        } else {
+            out += (char)(0xE0 | (cp >> 12));
+            out += (char)(0x80 | ((cp >> 6) & 0x3F));
+            out += (char)(0x80 | (cp & 0x3F));
+        }
+    }
+
+    // s[i] is the opening quote; leaves i after the closing one
+    std::string parse_string(const std::string& s, size_t& i) {
+        std::string out;
+        i++;
+        while (i < s.size() && s[i] != '"') {
+            char c = s[i++];
+            if (c != '\\' || i >= s.size()) {
+                out += c;
+                continue;
+            }
+            char e = s[i++];
+            switch (e) {
+                case 'n': out += '\n'; break;
+                case 't': out += '\t'; break;
+                case 'r': out += '\r'; break;
+                case 'b': out += '\b'; break;
+                case 'f': out += '\f'; break;
+                case 'u':
+                    if (i + 4 <= s.size()) {
+                        append_utf8(out, std::stoul(s.substr(i, 4), nullptr, 16));
+                        i += 4;
+                    }
+                    break;
+                default: out += e;
+            }
+        }
+        i++;
+        return out;
+    }
+
+    // Leaves i just past the value starting at s[i]
+    void skip_value(const std::string& s, size_t& i) {
+        skip_ws(s, i);
+        if (i >= s.size()) return;
+        if (s[i] == '"') {
+            parse_string(s, i);
+        } else if (s[i] == '{' || s[i] == '[') {
+            int depth = 0;
+            while (i < s.size()) {
+                if (s[i] == '"') {
+                    parse_string(s, i);
+                    continue;
+                }
+                if (s[i] == '{' || s[i] == '[') depth++;
+                if (s[i] == '}' || s[i] == ']') depth--;
+                i++;
+                if (depth == 0) break;
+            }
+        } else {
+            while (i < s.size() && s[i] != ',' && s[i] != '}' && s[i] != ']') i++;
+        }
+    }
+
+    // Top-level members of the object at s[i]: name -> raw value text
+    std::map<std::string, std::string> members(const std::string& s, size_t& i) {
+        std::map<std::string, std::string> out;
+        skip_ws(s, i);
+        if (i >= s.size() || s[i] != '{') {
+            skip_value(s, i);
+            return out;
+        }
+        i++;
+        while (true) {
+            skip_ws(s, i);
+            if (i >= s.size() || s[i] != '"') break;
+            std::string name = parse_string(s, i);
+            skip_ws(s, i);
+            if (i >= s.size() || s[i] != ':') break;
+            i++;
+            skip_ws(s, i);
+            size_t start = i;
+            skip_value(s, i);
+            out[name] = s.substr(start, i - start);
+            skip_ws(s, i);
+            if (i < s.size() && s[i] == ',') i++;
+        }
+        skip_ws(s, i);
+        if (i < s.size() && s[i] == '}') i++;
+        return out;
+    }
+
+    std::string string_member(const std::map<std::string, std::string>& m, const std::string& name) {
+        auto it = m.find(name);
+        if (it == m.end() || it->second.empty() || it->second[0] != '"') return "";
+        size_t i = 0;
+        return parse_string(it->second, i);
+    }
+}
 
 struct NewsItem {
+    std::string raw;   // the article's JSON as stored
+    std::string guid;
     std::string title;
     std::string link;
     std::string description;
@@ -21,6 +138,48 @@ struct NewsItem {
 class DuplicateDetector {
 private:
     std::vector<NewsItem> news;
+    std::map<std::string, size_t> positions;   // "key:", "guid:" or "link:" id -> index in news
+    
+    NewsItem make_item(const std::string& raw) {
+        size_t i = 0;
+        auto m = json::members(raw, i);
+        NewsItem item;
+        item.raw = raw;
+        item.guid = json::string_member(m, "guid");
+        item.title = json::string_member(m, "title");
+        item.link = json::string_member(m, "link");
+        item.description = json::string_member(m, "description");
+        if (item.description.empty()) item.description = json::string_member(m, "summary");
+        item.source = json::string_member(m, "source");
+        item.category = json::string_member(m, "category");
+        item.sentiment = json::string_member(m, "sentiment");
+        item.reading_time = 0;
+        return item;
+    }
+    
+    std::string identity(const NewsItem& item) {
+        if (!item.guid.empty()) return "guid:" + item.guid;
+        if (!item.link.empty()) return "link:" + item.link;
+        return "";
+    }
+    
+    // Insert an article, replacing the one it updates if there is one
+    void put(const NewsItem& item, const std::string& key) {
+        std::string id = identity(item);
+        size_t index = news.size();
+        if (!key.empty() && positions.count("key:" + key)) {
+            index = positions["key:" + key];
+        } else if (!id.empty() && positions.count(id)) {
+            index = positions[id];
+        }
+        if (index == news.size()) {
+            news.push_back(item);
+        } else {
+            news[index] = item;
+        }
+        if (!key.empty()) positions["key:" + key] = index;
+        if (!id.empty()) positions[id] = index;
+    }
     
     std::string to_lower(const std::string& s) {
         std::string result = s;
@@ -61,30 +220,47 @@ private:
     }
     
 public:
-    void load_news(const std::string& filename) {
+    void load_news(const std::string& filename, const std::string& log_filename) {
         std::ifstream file(filename);
         if (!file.is_open()) {
             std::cerr << "Cannot open: " << filename << std::endl;
             return;
         }
+        std::stringstream buffer;
+        buffer << file.rdbuf();
+        std::string content = buffer.str();
         
-        std::string line;
-        NewsItem item;
-        while (std::getline(file, line)) {
-            if (line.find("\"title\"") != std::string::npos) {
-                size_t start = line.find(":") + 1;
-                size_t end = line.find(",", start);
-                if (end == std::string::npos) end = line.find("}");
-                item.title = line.substr(start, end - start);
-                item.title = item.title.substr(1, item.title.length() - 2); // Remove quotes
+        size_t i = 0;
+        json::skip_ws(content, i);
+        if (i < content.size() && content[i] == '{') {
+            // Older snapshots were {"collected_at": ..., "articles": [...]}
+            content = json::members(content, i)["articles"];
+            i = 0;
+            json::skip_ws(content, i);
+        }
+        if (i < content.size() && content[i] == '[') {
+            i++;
+            while (true) {
+                json::skip_ws(content, i);
+                if (i >= content.size() || content[i] != '{') break;
+                size_t start = i;
+                json::skip_value(content, i);
+                put(make_item(content.substr(start, i - start)), "");
+                json::skip_ws(content, i);
+                if (i < content.size() && content[i] == ',') i++;
             }
-            if (line.find("\"source\"") != std::string::npos) {
-                size_t start = line.find(":") + 1;
-                item.source = line.substr(start);
-                item.source = item.source.substr(1, item.source.length() - 3);
+        }
+        
+        std::ifstream log(log_filename);
+        std::string line;
+        while (std::getline(log, line)) {
+            size_t j = 0;
+            auto record = json::members(line, j);
+            if (!record.count("article") || record["article"].empty() || record["article"][0] != '{') {
+                continue;   // collection time, or a torn write at the tail
             }
+            put(make_item(record["article"]), json::string_member(record, "key"));
         }
-        news.push_back(item);
     }
     
     std::vector<std::pair<int, int>> find_duplicates(double threshold = 0.7) {
@@ -128,15 +304,21 @@ public:
         return removed;
     }
     
-    void save_news(const std::string& filename) {
-        std::ofstream file(filename);
-        file << "[\n";
-        for (size_t i = 0; i < news.size(); i++) {
-            file << "  {\"title\": \"" << news[i].title << "\", ";
-            file << "\"source\": \"" << news[i].source << "\"}\n";
-            if (i < news.size() - 1) file << ",";
+    // Writes a new snapshot with the journal folded in, then drops the journal
+    void save_news(const std::string& filename, const std::string& log_filename) {
+        std::string tmp = filename + ".tmp";
+        {
+            std::ofstream file(tmp);
+            file << "[\n";
+            for (size_t i = 0; i < news.size(); i++) {
+                file << "  " << news[i].raw;
+                if (i < news.size() - 1) file << ",";
+                file << "\n";
+            }
+            file << "]\n";
         }
-        file << "]\n";
+        std::rename(tmp.c_str(), filename.c_str());
+        std::remove(log_filename.c_str());
     }
     
     void stats() {
@@ -167,18 +349,18 @@ int main(int argc, char* argv[]) {
     std::string command = (argc > 1) ? argv[1] : "stats";
     
     if (command == "stats") {
-        detector.load_news("../data/news.json");
+        detector.load_news(NEWS_FILE, NEWS_LOG_FILE);
         detector.stats();
     } else if (command == "dedup") {
         double threshold = (argc > 2) ? std::stod(argv[2]) : 0.7;
-        detector.load_news("../data/news.json");
+        detector.load_news(NEWS_FILE, NEWS_LOG_FILE);
         auto dups = detector.find_duplicates(threshold);
         std::cout << "Found " << dups.size() << " duplicate pairs" << std::endl;
     } else if (command == "remove") {
         double threshold = (argc > 2) ? std::stod(argv[2]) : 0.7;
-        detector.load_news("../data/news.json");
+        detector.load_news(NEWS_FILE, NEWS_LOG_FILE);
         int removed = detector.remove_duplicates(threshold);
-        detector.save_news("../data/news.json");
+        detector.save_news(NEWS_FILE, NEWS_LOG_FILE);
         std::cout << "Removed " << removed << " duplicates" << std::endl;
     } else {
         std::cout << "C++ Duplicate Detector" << std::endl;
@@ -120,6 +120,9 @@ func saveNews(news []NewsItem) {
 		return
 	}
 	os.WriteFile(filepath.Join(dataDir, "news.json"), data, 0644)
+	// The rewrite replaces the whole store, so the Python collector's
+	// journal of earlier changes must not be replayed over it
+	os.Remove(filepath.Join(dataDir, "news.log.jsonl"))
 }
 
 func runRustBinary(name string, args ...string) string {
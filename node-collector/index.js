@@ -19,7 +19,11 @@ const RSS_SOURCES = [
 ];
 
 const DATA_DIR = path.join(__dirname, '..', 'data');
+// Same layout as the Python store: a plain list of articles, the collection
+// time beside it, and a journal of later changes that a rewrite folds in
 const NEWS_FILE = path.join(DATA_DIR, 'news.json');
+const NEWS_META_FILE = path.join(DATA_DIR, 'news.meta.json');
+const NEWS_LOG_FILE = path.join(DATA_DIR, 'news.log.jsonl');
 
 /**
  * Fetch RSS feed
@@ -103,13 +107,12 @@ async function collect() {
     // Sort by date
     allNews.sort((a, b) => new Date(b.published) - new Date(a.published));
     
-    // Save to file
-    const data = {
-        collected_at: new Date().toISOString(),
-        articles: allNews
-    };
-    
-    fs.writeFileSync(NEWS_FILE, JSON.stringify(data, null, 2));
+    // Save to file, replacing the whole store
+    const tmp = NEWS_FILE + '.tmp';
+    fs.writeFileSync(tmp, JSON.stringify(allNews, null, 2));
+    fs.renameSync(tmp, NEWS_FILE);
+    fs.writeFileSync(NEWS_META_FILE, JSON.stringify({ collected_at: new Date().toISOString() }));
+    fs.rmSync(NEWS_LOG_FILE, { force: true });
     
     console.log(`\n✅ Collected ${allNews.length} articles total`);
     console.log(`💾 Saved to ${NEWS_FILE}`);
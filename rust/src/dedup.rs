@@ -2,12 +2,13 @@
 //! Build: cd rust && cargo build --release
 //! Run:   ./target/release/dedup [--threshold N]
 
+mod news_store;
+
 use similar::{ChangeTag, TextDiff};
 use serde::{Deserialize, Serialize};
+use serde_json::Value;
 use std::collections::HashSet;
 use std::env;
-use std::fs::File;
-use std::io::Read;
 
 #[derive(Debug, Serialize, Deserialize, Clone)]
 pub struct NewsItem {
@@ -18,22 +19,20 @@ pub struct NewsItem {
     pub category: String,
 }
 
-#[derive(Debug, Serialize, Deserialize)]
-struct Storage {
-    news: Vec<NewsItem>,
+impl NewsItem {
+    fn from_article(article: &Value) -> NewsItem {
+        NewsItem {
+            title: news_store::text(article, &["title"]),
+            link: news_store::text(article, &["link"]),
+            description: news_store::text(article, &["description", "summary"]),
+            source: news_store::text(article, &["source"]),
+            category: news_store::text(article, &["category"]),
+        }
+    }
 }
 
 fn load_news() -> Vec<NewsItem> {
-    let path = std::path::Path::new("../data/news.json");
-    if let Ok(mut file) = File::open(path) {
-        let mut content = String::new();
-        if file.read_to_string(&mut content).is_ok() {
-            if let Ok(storage) = serde_json::from_str::<Storage>(&content) {
-                return storage.news;
-            }
-        }
-    }
-    Vec::new()
+    news_store::load_articles().iter().map(NewsItem::from_article).collect()
 }
 
 fn similarity(a: &str, b: &str) -> f64 {
@@ -74,13 +73,13 @@ fn find_duplicates(threshold: f64) -> Vec<(usize, usize, f64)> {
 }
 
 fn remove_duplicates(threshold: f64) -> usize {
-    let news = load_news();
+    let news = news_store::load_articles();
     let mut seen: HashSet<String> = HashSet::new();
-    let mut unique: Vec<NewsItem> = Vec::new();
+    let mut unique: Vec<Value> = Vec::new();
     let mut removed = 0;
     
     for item in news {
-        let key = item.title.to_lowercase();
+        let key = news_store::text(&item, &["title"]).to_lowercase();
         let words: Vec<&str> = key.split_whitespace().collect();
         let mut is_duplicate = false;
         
@@ -103,9 +102,8 @@ fn remove_duplicates(threshold: f64) -> usize {
         }
     }
     
-    let storage = Storage { news: unique };
-    let json = serde_json::to_string_pretty(&storage).unwrap_or_default();
-    std::fs::write("../data/news.json", json).ok();
+    // Whole articles are written back, so fields this tool doesn't know survive
+    news_store::save_articles(&unique).ok();
     
     removed
 }
@@ -0,0 +1,258 @@
+//! News Store - The article store shared with the Python collector
+//!
+//! `data/news.json` is a list of articles. Changes made since the last
+//! compaction are lines in `data/news.log.jsonl`, either
+//! `{"key": ..., "article": {...}}` or `{"collected_at": ...}`, and have to
+//! be replayed over the list to see the current store.
+//!
+//! With `TANYA_STORAGE=segments` the store is instead the JSON-Lines
+//! segments listed in `data/segments/manifest.json`, where the last record
+//! written for a key wins. (The sqlite backend isn't readable from here.)
+
+#![allow(dead_code)] // each binary uses a different part
+
+use chrono::{DateTime, NaiveDateTime};
+use serde::de::DeserializeOwned;
+use serde_json::Value;
+use std::collections::{HashMap, HashSet};
+use std::fs::{self, File, OpenOptions};
+use std::io::{self, BufRead, BufReader};
+use std::path::Path;
+use std::time::SystemTime;
+
+pub const NEWS_PATH: &str = "../data/news.json";
+pub const NEWS_LOG_PATH: &str = "../data/news.log.jsonl";
+pub const SEGMENTS_DIR: &str = "../data/segments";
+const MANIFEST_PATH: &str = "../data/segments/manifest.json";
+// Held (flock) by the Python collector for every change to the segments
+const LOCK_PATH: &str = "../data/segments/lock";
+
+fn uses_segments() -> bool {
+    std::env::var("TANYA_STORAGE").map(|b| b == "segments").unwrap_or(false)
+}
+
+fn load_manifest() -> Value {
+    fs::read_to_string(MANIFEST_PATH)
+        .ok()
+        .and_then(|content| serde_json::from_str(&content).ok())
+        .unwrap_or_else(|| serde_json::json!({"segments": [], "next_id": 1, "collected_at": null}))
+}
+
+fn segment_names(manifest: &Value) -> Vec<String> {
+    manifest["segments"]
+        .as_array()
+        .map(|segments| {
+            segments
+                .iter()
+                .filter_map(|s| s["name"].as_str().map(String::from))
+                .collect()
+        })
+        .unwrap_or_default()
+}
+
+/// Latest article per key, most recently written first (the Python
+/// store's iter_news order; its load_news sorts by published time).
+fn load_segments() -> Vec<Value> {
+    let mut seen = HashSet::new();
+    let mut articles = Vec::new();
+    for name in segment_names(&load_manifest()).iter().rev() {
+        let content = fs::read_to_string(Path::new(SEGMENTS_DIR).join(name)).unwrap_or_default();
+        let mut records: Vec<Value> = content
+            .lines()
+            .filter_map(|line| serde_json::from_str(line).ok()) // skips a torn tail
+            .collect();
+        records.reverse();
+        for mut record in records {
+            let key = record["key"].as_str().unwrap_or_default().to_string();
+            if seen.insert(key) {
+                articles.push(record["article"].take());
+            }
+        }
+    }
+    articles
+}
+
+/// Seconds since the epoch of an article's published (else first seen)
+/// time, read the way the Python store's `article_time` does.
+fn article_timestamp(article: &Value) -> Option<f64> {
+    for field in ["published", "first_seen"] {
+        let value = match article.get(field).and_then(Value::as_str) {
+            Some(value) if !value.is_empty() => value,
+            _ => continue,
+        };
+        let parsed = DateTime::parse_from_rfc2822(value)
+            .or_else(|_| DateTime::parse_from_rfc3339(value))
+            .map(|t| t.timestamp_micros())
+            .or_else(|_| NaiveDateTime::parse_from_str(value, "%Y-%m-%dT%H:%M:%S%.f").map(|t| t.and_utc().timestamp_micros()));
+        if let Ok(micros) = parsed {
+            return Some(micros as f64 / 1e6);
+        }
+    }
+    None
+}
+
+/// Replace every segment with one holding `articles` (given newest first).
+///
+/// Takes the collector's lock file for the whole rewrite and bumps the
+/// manifest's `writes` counter, so a running collector rebuilds its key
+/// index instead of trusting the one it had cached.
+fn save_segments(articles: &[Value]) -> io::Result<()> {
+    let lock = OpenOptions::new().create(true).append(true).open(LOCK_PATH)?;
+    lock.lock()?; // released when `lock` is dropped
+    let mut manifest = load_manifest();
+    let old = segment_names(&manifest);
+    let next_id = manifest["next_id"].as_u64().unwrap_or(1);
+    let name = format!("{:06}.jsonl", next_id);
+
+    // Keep the keys the Python store gave these articles (it normalizes links)
+    let mut keys: HashMap<String, String> = HashMap::new();
+    for old_name in &old {
+        let content = fs::read_to_string(Path::new(SEGMENTS_DIR).join(old_name)).unwrap_or_default();
+        for record in content.lines().filter_map(|line| serde_json::from_str::<Value>(line).ok()) {
+            if let (Some(id), Some(key)) = (identity(&record["article"]), record["key"].as_str()) {
+                keys.insert(id, key.to_string());
+            }
+        }
+    }
+
+    let mut lines = String::new();
+    let mut oldest: Option<f64> = None;
+    for article in articles.iter().rev() {
+        if let Some(when) = article_timestamp(article) {
+            oldest = Some(oldest.map_or(when, |o| o.min(when)));
+        }
+        let id = identity(article).unwrap_or_default();
+        let key = keys.get(&id).cloned().unwrap_or(id);
+        lines.push_str(&serde_json::json!({"key": key, "article": article}).to_string());
+        lines.push('\n');
+    }
+    let path = Path::new(SEGMENTS_DIR).join(&name);
+    fs::write(path.with_extension("jsonl.tmp"), lines)?;
+    fs::rename(path.with_extension("jsonl.tmp"), &path)?;
+
+    manifest["segments"] = serde_json::json!([{"name": name, "records": articles.len(), "oldest": oldest}]);
+    manifest["next_id"] = (next_id + 1).into();
+    manifest["superseded"] = 0.into();
+    manifest["writes"] = (manifest["writes"].as_u64().unwrap_or(0) + 1).into();
+    let tmp = format!("{}.tmp", MANIFEST_PATH);
+    fs::write(&tmp, serde_json::to_string_pretty(&manifest)?)?;
+    fs::rename(&tmp, MANIFEST_PATH)?;
+    for old_name in old {
+        fs::remove_file(Path::new(SEGMENTS_DIR).join(old_name)).ok();
+    }
+    Ok(())
+}
+
+/// Identity used to match a journal entry with a snapshot entry: the guid,
+/// else the link (an update keeps both of the article it replaces).
+fn identity(article: &Value) -> Option<String> {
+    for field in ["guid", "link"] {
+        if let Some(value) = article.get(field).and_then(Value::as_str) {
+            if !value.is_empty() {
+                return Some(format!("{}:{}", field, value));
+            }
+        }
+    }
+    None
+}
+
+fn load_snapshot() -> Vec<Value> {
+    let parsed = fs::read_to_string(NEWS_PATH)
+        .ok()
+        .and_then(|content| serde_json::from_str::<Value>(&content).ok());
+    match parsed {
+        Some(Value::Array(articles)) => articles,
+        // Older snapshots were {"collected_at": ..., "articles": [...]}
+        Some(Value::Object(mut data)) => match data.remove("articles") {
+            Some(Value::Array(articles)) => articles,
+            _ => Vec::new(),
+        },
+        _ => Vec::new(),
+    }
+}
+
+/// Every stored article: the snapshot with the journal replayed over it.
+pub fn load_articles() -> Vec<Value> {
+    if uses_segments() {
+        return load_segments();
+    }
+    let mut articles = load_snapshot();
+    let mut positions: HashMap<String, usize> = articles
+        .iter()
+        .enumerate()
+        .filter_map(|(i, a)| identity(a).map(|id| (id, i)))
+        .collect();
+
+    if let Ok(file) = File::open(NEWS_LOG_PATH) {
+        for line in BufReader::new(file).lines().map_while(Result::ok) {
+            let mut record = match serde_json::from_str::<Value>(&line) {
+                Ok(record) => record,
+                Err(_) => continue, // torn write at the tail
+            };
+            let article = match record.get_mut("article") {
+                Some(article) => article.take(),
+                None => continue,
+            };
+            let key = record.get("key").and_then(Value::as_str).map(|k| format!("key:{}", k));
+            let id = identity(&article);
+            let existing = key.iter().chain(id.iter()).find_map(|k| positions.get(k).copied());
+            let index = existing.unwrap_or_else(|| {
+                articles.push(Value::Null);
+                articles.len() - 1
+            });
+            articles[index] = article;
+            for k in key.into_iter().chain(id) {
+                positions.insert(k, index);
+            }
+        }
+    }
+    articles
+}
+
+/// Articles converted to `T`, skipping entries that don't fit it.
+pub fn load_as<T: DeserializeOwned>() -> Vec<T> {
+    load_articles()
+        .into_iter()
+        .filter_map(|article| serde_json::from_value(article).ok())
+        .collect()
+}
+
+/// First non-empty string among `fields` (e.g. "description", "summary").
+pub fn text(article: &Value, fields: &[&str]) -> String {
+    fields
+        .iter()
+        .filter_map(|f| article.get(*f).and_then(Value::as_str))
+        .find(|s| !s.is_empty())
+        .unwrap_or_default()
+        .to_string()
+}
+
+/// Replace the whole store; the journal is folded into the new snapshot.
+pub fn save_articles(articles: &[Value]) -> io::Result<()> {
+    if uses_segments() {
+        return save_segments(articles);
+    }
+    let json = serde_json::to_string_pretty(articles)?;
+    let tmp = format!("{}.tmp", NEWS_PATH);
+    fs::write(&tmp, json)?;
+    fs::rename(&tmp, NEWS_PATH)?;
+    match fs::remove_file(NEWS_LOG_PATH) {
+        Err(e) if e.kind() != io::ErrorKind::NotFound => Err(e),
+        _ => Ok(()),
+    }
+}
+
+/// Changes whenever the store is rewritten or appended to (for segments,
+/// the manifest is rewritten on every write).
+pub fn data_version() -> [Option<(SystemTime, u64)>; 2] {
+    let paths = if uses_segments() {
+        [MANIFEST_PATH, MANIFEST_PATH]
+    } else {
+        [NEWS_PATH, NEWS_LOG_PATH]
+    };
+    paths.map(|path| {
+        fs::metadata(path)
+            .ok()
+            .and_then(|m| m.modified().ok().map(|t| (t, m.len())))
+    })
+}
@@ -1,13 +1,17 @@
 //! Search Engine - Full-text search using Rust
 //! Build: cd rust && cargo build --release
 //! Run:   ./target/release/search <query>
+//! Serve: ./target/release/search --serve
+//!        (newline-delimited JSON requests on stdin, one response line each)
+
+mod news_store;
 
 use serde::{Deserialize, Serialize};
+use serde_json::{json, Value};
 use similar::{ChangeTag, TextDiff};
 use std::collections::HashMap;
 use std::env;
-use std::fs;
-use std::path::Path;
+use std::io::{self, BufRead, Write};
 
 #[derive(Debug, Serialize, Deserialize, Clone)]
 pub struct SearchResult {
@@ -19,7 +23,8 @@ pub struct SearchResult {
     pub category: String,
 }
 
-#[derive(Debug, Serialize, Deserialize)]
+#[derive(Debug, Default, Serialize, Deserialize)]
+#[serde(default)]
 struct NewsItem {
     title: String,
     link: String,
@@ -28,14 +33,21 @@ struct NewsItem {
     category: String,
 }
 
-fn load_news() -> Vec<NewsItem> {
-    let news_path = Path::new("../data/news.json");
-    if let Ok(content) = fs::read_to_string(news_path) {
-        if let Ok(news) = serde_json::from_str::<Vec<NewsItem>>(&content) {
-            return news;
+impl NewsItem {
+    // The Python collectors store the description as "summary"
+    fn from_article(article: &Value) -> NewsItem {
+        NewsItem {
+            title: news_store::text(article, &["title"]),
+            link: news_store::text(article, &["link"]),
+            description: news_store::text(article, &["description", "summary"]),
+            source: news_store::text(article, &["source"]),
+            category: news_store::text(article, &["category"]),
         }
     }
-    Vec::new()
+}
+
+fn load_news() -> Vec<NewsItem> {
+    news_store::load_articles().iter().map(NewsItem::from_article).collect()
 }
 
 fn calculate_score(query: &str, item: &NewsItem) -> f64 {
@@ -72,18 +84,21 @@ fn calculate_score(query: &str, item: &NewsItem) -> f64 {
 }
 
 pub fn search(query: &str, limit: usize) -> Vec<SearchResult> {
-    let news = load_news();
+    search_in(&load_news(), query, limit)
+}
+
+fn search_in(news: &[NewsItem], query: &str, limit: usize) -> Vec<SearchResult> {
     let mut results: Vec<SearchResult> = news
-        .into_iter()
+        .iter()
         .map(|item| {
-            let score = calculate_score(query, &item);
+            let score = calculate_score(query, item);
             SearchResult {
-                title: item.title,
-                link: item.link,
-                description: item.description,
-                source: item.source,
+                title: item.title.clone(),
+                link: item.link.clone(),
+                description: item.description.clone(),
+                source: item.source.clone(),
                 score,
-                category: item.category,
+                category: item.category.clone(),
             }
         })
         .filter(|r| r.score > 0.0)
@@ -94,12 +109,78 @@ pub fn search(query: &str, limit: usize) -> Vec<SearchResult> {
     results
 }
 
+#[derive(Debug, Deserialize)]
+struct Request {
+    #[serde(default)]
+    id: serde_json::Value,
+    op: String,
+    #[serde(default)]
+    query: String,
+    #[serde(default = "default_limit")]
+    limit: usize,
+}
+
+fn default_limit() -> usize {
+    20
+}
+
+/// Long-lived worker: answers one JSON line per request line, keeping the
+/// news loaded between requests and reloading only when the store changes
+/// (a rewritten snapshot or new journal lines).
+fn serve() {
+    let stdin = io::stdin();
+    let stdout = io::stdout();
+    let mut out = stdout.lock();
+    let mut news = load_news();
+    let mut loaded_version = news_store::data_version();
+
+    for line in stdin.lock().lines() {
+        let line = match line {
+            Ok(line) => line,
+            Err(_) => break,
+        };
+        if line.trim().is_empty() {
+            continue;
+        }
+
+        let response = match serde_json::from_str::<Request>(&line) {
+            Ok(req) => {
+                let version = news_store::data_version();
+                if version != loaded_version {
+                    news = load_news();
+                    loaded_version = version;
+                }
+                match req.op.as_str() {
+                    "ping" => json!({"id": req.id, "ok": true, "articles": news.len()}),
+                    "search" => json!({
+                        "id": req.id,
+                        "ok": true,
+                        "results": search_in(&news, &req.query, req.limit)
+                    }),
+                    other => json!({"id": req.id, "ok": false, "error": format!("unknown op: {}", other)}),
+                }
+            }
+            Err(e) => json!({"id": null, "ok": false, "error": e.to_string()}),
+        };
+
+        if writeln!(out, "{}", response).is_err() || out.flush().is_err() {
+            break;
+        }
+    }
+}
+
 fn main() {
     let args: Vec<String> = env::args().collect();
     
+    if args.get(1).map(String::as_str) == Some("--serve") {
+        serve();
+        return;
+    }
+    
     if args.len() < 2 {
         println!("Tanya Search Engine (Rust)");
         println!("Usage: search <query> [--limit N]");
+        println!("       search --serve");
         println!("Example: search ai --limit 10");
         return;
     }
@@ -120,8 +201,8 @@ fn main() {
         println!("   Score: {:.1} | Source: {}", result.score, result.source);
         println!("   Link: {}", result.link);
         if !result.description.is_empty() {
-            let desc = if result.description.len() > 150 {
-                format!("{}...", &result.description[..150])
+            let desc = if result.description.chars().count() > 150 {
+                format!("{}...", result.description.chars().take(150).collect::<String>())
             } else {
                 result.description.clone()
             };
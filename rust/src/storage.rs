@@ -1,15 +1,23 @@
 //! Storage - JSON file operations in Rust
 //! Build: cd rust && cargo build --release
 //! Run:   ./target/release storage <command> [args]
+//!
+//! Articles live in the store shared with the Python collector (see
+//! news_store.rs); favorites are kept in their own file.
+
+mod news_store;
 
 use serde::{Deserialize, Serialize};
 use std::collections::HashMap;
 use std::env;
-use std::fs::{self, File};
-use std::io::{Read, Write};
+use std::fs;
 use std::path::Path;
 
-#[derive(Debug, Serialize, Deserialize, Clone)]
+const FAVORITES_PATH: &str = "../data/favorites.json";
+
+// Articles written by the collectors lack most of the analysis fields
+#[derive(Debug, Serialize, Deserialize, Clone, Default)]
+#[serde(default)]
 pub struct NewsItem {
     pub title: String,
     pub link: String,
@@ -22,59 +30,36 @@ pub struct NewsItem {
     pub keywords: Vec<String>,
 }
 
-#[derive(Debug, Serialize, Deserialize, Default)]
-pub struct Storage {
-    pub news: Vec<NewsItem>,
-    pub favorites: Vec<String>,
-    pub sources: Vec<FeedSource>,
+fn load_news() -> Vec<NewsItem> {
+    news_store::load_as()
 }
 
-#[derive(Debug, Serialize, Deserialize, Clone)]
-pub struct FeedSource {
-    pub name: String,
-    pub url: String,
-    pub category: String,
-    pub enabled: bool,
+fn load_favorites() -> Vec<String> {
+    fs::read_to_string(FAVORITES_PATH)
+        .ok()
+        .and_then(|content| serde_json::from_str(&content).ok())
+        .unwrap_or_default()
 }
 
-fn get_storage_path() -> PathBuf {
-    Path::new("../data/news.json").to_path_buf()
-}
-
-fn load_storage() -> Storage {
-    let path = get_storage_path();
-    if let Ok(mut file) = File::open(&path) {
-        let mut content = String::new();
-        if file.read_to_string(&mut content).is_ok() {
-            if let Ok(storage) = serde_json::from_str(&content) {
-                return storage;
-            }
-        }
-    }
-    Storage::default()
-}
-
-fn save_storage(storage: &Storage) -> Result<(), String> {
-    let path = get_storage_path();
-    let json = serde_json::to_string_pretty(storage).map_err(|e| e.to_string())?;
-    let mut file = File::create(&path).map_err(|e| e.to_string())?;
-    file.write_all(json.as_bytes()).map_err(|e| e.to_string())?;
-    Ok(())
+fn save_favorites(favorites: &[String]) -> Result<(), String> {
+    let json = serde_json::to_string_pretty(favorites).map_err(|e| e.to_string())?;
+    fs::write(Path::new(FAVORITES_PATH), json).map_err(|e| e.to_string())
 }
 
 fn add_item(item: NewsItem) {
-    let mut storage = load_storage();
-    storage.news.retain(|i| i.link != item.link);
-    storage.news.insert(0, item);
-    if storage.news.len() > 1000 {
-        storage.news.truncate(1000);
+    // Edit the raw articles so fields NewsItem doesn't know are kept
+    let mut news = news_store::load_articles();
+    news.retain(|a| news_store::text(a, &["link"]) != item.link);
+    news.insert(0, serde_json::to_value(&item).expect("Failed to encode"));
+    if news.len() > 1000 {
+        news.truncate(1000);
     }
-    save_storage(&storage).expect("Failed to save");
+    news_store::save_articles(&news).expect("Failed to save");
 }
 
 fn list_news(limit: usize) {
-    let storage = load_storage();
-    for (i, item) in storage.news.iter().enumerate().take(limit) {
+    let news = load_news();
+    for (i, item) in news.iter().enumerate().take(limit) {
         println!("[{}] {} - {}", i + 1, item.source, item.title);
         println!("    Category: {} | Sentiment: {} | Read time: {} min", 
                  item.category, item.sentiment, item.reading_time);
@@ -82,9 +67,9 @@ fn list_news(limit: usize) {
 }
 
 fn search(query: &str) {
-    let storage = load_storage();
+    let news = load_news();
     let query_lower = query.to_lowercase();
-    for item in &storage.news {
+    for item in &news {
         if item.title.to_lowercase().contains(&query_lower) || 
            item.description.to_lowercase().contains(&query_lower) {
             println!("{} | {}", item.source, item.title);
@@ -93,44 +78,42 @@ fn search(query: &str) {
 }
 
 fn add_favorite(link: &str) {
-    let mut storage = load_storage();
-    if !storage.favorites.contains(&link.to_string()) {
-        storage.favorites.push(link.to_string());
-        save_storage(&storage).expect("Failed to save");
+    let mut favorites = load_favorites();
+    if !favorites.contains(&link.to_string()) {
+        favorites.push(link.to_string());
+        save_favorites(&favorites).expect("Failed to save");
         println!("Added to favorites");
     }
 }
 
 fn list_favorites() {
-    let storage = load_storage();
-    println!("=== Favorites ({}) ===", storage.favorites.len());
-    for link in &storage.favorites {
+    let favorites = load_favorites();
+    println!("=== Favorites ({}) ===", favorites.len());
+    for link in &favorites {
         println!("{}", link);
     }
 }
 
 fn clear_news() {
-    let mut storage = load_storage();
-    storage.news.clear();
-    save_storage(&storage).expect("Failed to save");
+    news_store::save_articles(&[]).expect("Failed to save");
     println!("Cleared all news");
 }
 
 fn stats() {
-    let storage = load_storage();
+    let news = load_news();
     let mut by_category: HashMap<String, usize> = HashMap::new();
     let mut by_source: HashMap<String, usize> = HashMap::new();
     let mut by_sentiment: HashMap<String, usize> = HashMap::new();
     
-    for item in &storage.news {
+    for item in &news {
         *by_category.entry(item.category.clone()).or_insert(0) += 1;
         *by_source.entry(item.source.clone()).or_insert(0) += 1;
         *by_sentiment.entry(item.sentiment.clone()).or_insert(0) += 1;
     }
     
     println!("=== Tanya Statistics ===");
-    println!("Total articles: {}", storage.news.len());
-    println!("Favorites: {}", storage.favorites.len());
+    println!("Total articles: {}", news.len());
+    println!("Favorites: {}", load_favorites().len());
     println!("\nBy Category:");
     for (cat, count) in by_category {
         println!("  {}: {}", cat, count);
@@ -141,8 +124,6 @@ fn stats() {
     }
 }
 
-use std::path::PathBuf;
-
 fn main() {
     let args: Vec<String> = env::args().collect();
     
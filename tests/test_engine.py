@@ -0,0 +1,287 @@
+"""
+Tests for the async collection engine against a local stand-in server
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import aiohttp
+from aiohttp import web
+
+from collect import engine
+from collect.engine import CollectionEngine
+from collect.http_cache import ValidatorCache
+
+FEED = b"<rss><channel><title>Local</title></channel></rss>"
+
+def parse_body(url, body):
+    return {"url": url, "body": body.decode()}
+
+class StandInServer:
+    """aiohttp server on an ephemeral port with scriptable routes.
+
+    Each route records the requests it saw; `peers` collects the client
+    address of every request so tests can count distinct connections.
+    """
+
+    def __init__(self):
+        self.app = web.Application()
+        self.requests = {}
+        self.peers = []
+        self.runner = None
+        self.port = None
+
+    def route(self, path, handler):
+        self.requests[path] = []
+
+        async def wrapped(request):
+            self.requests[path].append(request.headers.copy())
+            self.peers.append(request.transport.get_extra_info("peername"))
+            return await handler(request, len(self.requests[path]))
+
+        self.app.router.add_get(path, wrapped)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, shutdown_timeout=0.1)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+class EngineTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = StandInServer()
+        # No real waiting between retries
+        patcher = mock.patch.object(engine, "BACKOFF_BASE", 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def start(self, **engine_args):
+        await self.server.start()
+        self.engine = CollectionEngine(**engine_args)
+        await self.engine.open()
+
+    async def asyncTearDown(self):
+        if getattr(self, "engine", None) is not None:
+            await self.engine.close()
+        if self.server.runner is not None:
+            await self.server.stop()
+
+class TimeoutTests(EngineTestCase):
+
+    async def test_slow_response_times_out(self):
+        async def slow(request, n):
+            await asyncio.sleep(2)
+            return web.Response(body=FEED)
+
+        self.server.route("/slow", slow)
+        await self.start(timeout=0.2, retries=0)
+        start = time.monotonic()
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.engine.fetch(self.server.url("/slow"))
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    async def test_timed_out_attempt_is_retried(self):
+        async def slow_once(request, n):
+            if n == 1:
+                await asyncio.sleep(2)
+            return web.Response(body=FEED)
+
+        self.server.route("/feed", slow_once)
+        await self.start(timeout=0.2, retries=1)
+        response = await self.engine.fetch(self.server.url("/feed"))
+        self.assertEqual(response["body"], FEED)
+        self.assertEqual(len(self.server.requests["/feed"]), 2)
+
+class RetryTests(EngineTestCase):
+
+    async def test_transient_status_is_retried(self):
+        async def flaky(request, n):
+            if n <= 2:
+                return web.Response(status=503)
+            return web.Response(body=FEED)
+
+        self.server.route("/feed", flaky)
+        await self.start(retries=2)
+        response = await self.engine.fetch(self.server.url("/feed"))
+        self.assertEqual(response["status"], 200)
+        self.assertEqual(len(self.server.requests["/feed"]), 3)
+
+    async def test_retries_exhausted_raises_last_error(self):
+        async def down(request, n):
+            return web.Response(status=502)
+
+        self.server.route("/feed", down)
+        await self.start(retries=1)
+        with self.assertRaises(aiohttp.ClientResponseError) as raised:
+            await self.engine.fetch(self.server.url("/feed"))
+        self.assertEqual(raised.exception.status, 502)
+        self.assertEqual(len(self.server.requests["/feed"]), 2)
+
+    async def test_client_error_is_not_retried(self):
+        async def missing(request, n):
+            return web.Response(status=404)
+
+        self.server.route("/feed", missing)
+        await self.start(retries=2)
+        with self.assertRaises(aiohttp.ClientResponseError):
+            await self.engine.fetch(self.server.url("/feed"))
+        self.assertEqual(len(self.server.requests["/feed"]), 1)
+
+    async def test_retry_after_is_honoured(self):
+        async def limited(request, n):
+            if n == 1:
+                return web.Response(status=429, headers={"Retry-After": "1"})
+            return web.Response(body=FEED)
+
+        self.server.route("/feed", limited)
+        await self.start(retries=1)
+        start = time.monotonic()
+        await self.engine.fetch(self.server.url("/feed"))
+        self.assertGreaterEqual(time.monotonic() - start, 0.9)
+
+    def test_backoff_is_jittered_and_capped(self):
+        eng = CollectionEngine()
+        for attempt in range(10):
+            cap = min(engine.BACKOFF_MAX, engine.BACKOFF_BASE * 2 ** attempt)
+            self.assertTrue(0 <= eng._backoff(attempt) <= cap)
+        self.assertEqual(eng._backoff(0, "3"), 3.0)
+        self.assertEqual(eng._backoff(0, "3600"), engine.BACKOFF_MAX)
+
+class ConditionalGetTests(EngineTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = ValidatorCache(os.path.join(tmp.name, "http_cache.json"))
+        self.parsed = []
+
+    def parse(self, url, body):
+        self.parsed.append(url)
+        return parse_body(url, body)
+
+    async def test_not_modified_reuses_cached_result(self):
+        async def feed(request, n):
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304)
+            return web.Response(body=FEED, headers={"ETag": '"v1"'})
+
+        self.server.route("/feed", feed)
+        await self.start(cache=self.cache)
+        url = self.server.url("/feed")
+        first = await self.engine.fetch_source(url, self.parse)
+        second = await self.engine.fetch_source(url, self.parse)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.parsed, [url])
+        self.assertNotIn("If-None-Match", self.server.requests["/feed"][0])
+        self.assertEqual(self.server.requests["/feed"][1]["If-None-Match"], '"v1"')
+        self.assertEqual(self.cache.hits, 1)
+
+    async def test_last_modified_is_sent_back(self):
+        stamp = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+        async def feed(request, n):
+            if request.headers.get("If-Modified-Since") == stamp:
+                return web.Response(status=304)
+            return web.Response(body=FEED, headers={"Last-Modified": stamp})
+
+        self.server.route("/feed", feed)
+        await self.start(cache=self.cache)
+        url = self.server.url("/feed")
+        await self.engine.fetch_source(url, self.parse)
+        await self.engine.fetch_source(url, self.parse)
+        self.assertEqual(len(self.parsed), 1)
+
+    async def test_not_modified_without_cached_result_refetches(self):
+        async def feed(request, n):
+            if "If-None-Match" in request.headers:
+                return web.Response(status=304)
+            return web.Response(body=FEED)
+
+        self.server.route("/feed", feed)
+        await self.start(cache=self.cache)
+        url = self.server.url("/feed")
+        self.cache.entries[url] = {"etag": '"stale"', "last_modified": None, "result": None}
+        result = await self.engine.fetch_source(url, self.parse)
+
+        self.assertEqual(result["body"], FEED.decode())
+        self.assertEqual(len(self.server.requests["/feed"]), 2)
+        self.assertNotIn("If-None-Match", self.server.requests["/feed"][1])
+
+class KeepAliveTests(EngineTestCase):
+
+    async def test_sequential_requests_reuse_one_connection(self):
+        async def feed(request, n):
+            return web.Response(body=FEED)
+
+        self.server.route("/feed", feed)
+        await self.start()
+        for _ in range(5):
+            await self.engine.fetch(self.server.url("/feed"))
+        self.assertEqual(len(self.server.peers), 5)
+        self.assertEqual(len(set(self.server.peers)), 1)
+
+    async def test_concurrent_requests_stay_within_per_host_limit(self):
+        async def feed(request, n):
+            await asyncio.sleep(0.05)
+            return web.Response(body=FEED)
+
+        self.server.route("/feed", feed)
+        await self.start(per_host=2)
+        urls = [self.server.url("/feed")] * 8
+        results = await self.engine.collect_all(urls, parse_body)
+        self.assertTrue(all(results))
+        self.assertLessEqual(len(set(self.server.peers)), 2)
+
+class DeadlineTests(EngineTestCase):
+
+    async def test_sources_past_the_deadline_are_cancelled(self):
+        async def fast(request, n):
+            return web.Response(body=FEED)
+
+        async def hanging(request, n):
+            await asyncio.sleep(10)
+            return web.Response(body=FEED)
+
+        self.server.route("/fast", fast)
+        self.server.route("/hang", hanging)
+        await self.start(deadline=0.3, timeout=5)
+        urls = [self.server.url("/hang"), self.server.url("/fast")]
+        start = time.monotonic()
+        results = await self.engine.collect_all(urls, parse_body)
+
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1]["body"], FEED.decode())
+        # Nothing of the cancelled fetch is left running
+        others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        self.assertFalse([t for t in others if "fetch_source" in repr(t.get_coro())])
+
+    async def test_results_keep_url_order(self):
+        async def delayed(request, n):
+            await asyncio.sleep(float(request.query["d"]))
+            return web.Response(body=request.query["d"].encode())
+
+        self.server.route("/d", delayed)
+        await self.start()
+        delays = ["0.15", "0.0", "0.1"]
+        results = await self.engine.collect_all([self.server.url(f"/d?d={d}") for d in delays], parse_body)
+        self.assertEqual([r["body"] for r in results], delays)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+Tests that both HTML parsers extract the same headlines
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import unittest
+from unittest import mock
+
+from collect import html_extract
+from collect.html_extract import ExtractionRules, extract_articles
+
+try:
+    import bs4  # noqa: F401
+    HAS_BS4 = True
+except ImportError:
+    HAS_BS4 = False
+
+PAGE = b"""<html><head><style>.headline { color: red }</style></head><body>
+<article><h2><a href="/news/1">First headline of the day</a></h2></article>
+<article><h3>Another headline<script>var x=1</script> is here<!-- ad --></h3></article>
+<div class="headline"><a href="/article/2">A <b>bold</b> front-page story</a></div>
+<ul><li><a href="/news/3">Short</a></li>
+<li><a href="https://other.example/news/4">An external <style>p{}</style>story link</a></li></ul>
+</body></html>"""
+
+def extract(use_lxml: bool, rules=None):
+    with mock.patch.object(html_extract, "HAS_LXML", use_lxml):
+        return extract_articles("https://example.com/", PAGE, rules)
+
+@unittest.skipUnless(html_extract.HAS_LXML and HAS_BS4, "needs both lxml and bs4")
+class ParserParityTests(unittest.TestCase):
+    def test_default_selectors_match(self):
+        self.assertEqual(extract(True), extract(False))
+
+    def test_custom_selectors_match(self):
+        rules = ExtractionRules(["article > h3", "div.headline a", "li a[href^='https://']"])
+        self.assertEqual(extract(True, rules), extract(False, rules))
+
+    def test_script_and_style_text_is_left_out(self):
+        titles = [a["title"] for a in extract(True)]
+        self.assertIn("Another headlineis here", titles)
+        self.assertIn("An externalstory link", titles)
+        self.assertFalse(any("var x" in t or "{" in t for t in titles))
+
+if __name__ == "__main__":
+    unittest.main()